@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    Employee, Item, Customer, Transaction, TransactionItem,
+    Employee, Item, Customer, CustomerActivity, Transaction, TransactionItem,
     Rental, Coupon, AuditLog
 )
 
@@ -49,6 +49,17 @@ class RentalAdmin(admin.ModelAdmin):
     search_fields = ['customer__phone_number', 'item__name']
 
 
+@admin.register(CustomerActivity)
+class CustomerActivityAdmin(admin.ModelAdmin):
+    list_display = ['customer', 'open_rentals', 'held_units', 'overdue_rentals', 'lifetime_rentals', 'last_activity']
+    search_fields = ['customer__phone_number']
+    # Maintained by the rental services; fix drift with rebuild_customer_activity
+    readonly_fields = [
+        'customer', 'open_rentals', 'held_units', 'overdue_rentals',
+        'earliest_due_date', 'lifetime_rentals', 'last_activity'
+    ]
+
+
 @admin.register(Coupon)
 class CouponAdmin(admin.ModelAdmin):
     list_display = ['code', 'discount_percentage', 'is_active', 'expires_at', 'created_at']
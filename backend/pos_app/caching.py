@@ -0,0 +1,197 @@
+"""
+Caching helpers: in-process caches and HTTP conditional GET support
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a time-to-live
+
+    Keeps hit/miss/eviction counters so cache sizes and TTLs can be tuned
+    from real traffic. The cache is local to the worker process; callers
+    are responsible for invalidating it when the underlying data changes.
+    """
+
+    def __init__(self, max_size=1024, ttl=300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key, default=None):
+        """Get a cached value, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Cache a value, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key):
+        """Remove a single entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Get size and hit/miss counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+            }
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one
+
+    The first caller for a key runs the function; callers arriving while
+    it runs wait for it and share its result (or its exception) instead
+    of repeating the work. Only calls in this worker process are merged.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._runs = 0
+        self._shared = 0
+
+    def do(self, key, func):
+        """Run func() for key unless a call for key is already running, and return its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+                self._runs += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = func()
+        except BaseException as exc:
+            call['error'] = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+        return call['result']
+
+    def stats(self):
+        """Get the number of calls run and of calls that shared a running call"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'runs': self._runs,
+                'shared': self._shared,
+            }
+
+
+class ConditionalGetStats:
+    """Per-endpoint counters of conditional GET requests answered with 304"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def record(self, name, status_code, conditional):
+        with self._lock:
+            counters = self._counters.setdefault(name, {'requests': 0, 'conditional': 0, 'not_modified': 0})
+            counters['requests'] += 1
+            if conditional:
+                counters['conditional'] += 1
+            if status_code == 304:
+                counters['not_modified'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+    def stats(self):
+        """Get counters and hit ratios (304s over all requests) per endpoint"""
+        with self._lock:
+            return {
+                name: dict(
+                    counters,
+                    hit_ratio=counters['not_modified'] / counters['requests'] if counters['requests'] else 0.0
+                )
+                for name, counters in self._counters.items()
+            }
+
+
+conditional_get_stats = ConditionalGetStats()
+
+
+def conditional_get(name, etag_func=None, last_modified_func=None):
+    """
+    Answer GETs with 304 Not Modified when the client's copy is current
+
+    Wraps django.views.decorators.http.condition, so the view body (and
+    its serializers) only runs when the ETag or Last-Modified changed.
+    Apply it below @api_view so authentication and permissions still run
+    first. Responses are marked private/no-cache so browsers revalidate
+    their copy every time. Hits are counted in conditional_get_stats
+    under name.
+    """
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header('ETag') or response.has_header('Last-Modified'):
+                # Let browsers keep the copy but revalidate it on every use
+                patch_cache_control(response, private=True, no_cache=True)
+            conditional_get_stats.record(
+                name,
+                response.status_code,
+                'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+            )
+            return response
+        return inner
+    return decorator
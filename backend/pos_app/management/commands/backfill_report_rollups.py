@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from pos_app.services import ReportingService
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily report rollups from the transactions (all days by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to rebuild, inclusive (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('start', 'end'):
+            value = options[name]
+            if value is None:
+                dates[name] = None
+                continue
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                raise CommandError(f'--{name} must be a date in YYYY-MM-DD format')
+        days = ReportingService.rebuild_rollups(dates['start'], dates['end'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt report rollups for {days} days"))
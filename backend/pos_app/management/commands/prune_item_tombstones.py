@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from pos_app.services import InventoryService
+
+
+class Command(BaseCommand):
+    help = 'Delete item tombstones older than ITEM_TOMBSTONE_RETENTION_DAYS'
+
+    def handle(self, *args, **options):
+        deleted = InventoryService.prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} tombstones older than {settings.ITEM_TOMBSTONE_RETENTION_DAYS} days"
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from pos_app.services import RentalService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the customer activity summaries from the rentals table'
+
+    def handle(self, *args, **options):
+        written = RentalService.rebuild_customer_activity()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt activity summaries of {written} customers"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from pos_app.services import RentalService
+
+
+class Command(BaseCommand):
+    help = 'Recompute days_overdue of open rentals and customer overdue counts (run nightly)'
+
+    def handle(self, *args, **options):
+        updated = RentalService.refresh_days_overdue()
+        self.stdout.write(self.style.SUCCESS(f"Updated days_overdue on {updated} open rentals"))
+        updated = RentalService.refresh_overdue_counts()
+        self.stdout.write(self.style.SUCCESS(f"Updated overdue counts of {updated} customers"))
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:21
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rental',
+            name='quantity',
+            field=models.IntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='returned_quantity',
+            field=models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+    ]
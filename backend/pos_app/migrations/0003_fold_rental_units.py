@@ -0,0 +1,77 @@
+from django.db import migrations
+from django.db.models import Count, F, Max, Min, Q
+
+
+def fold_rental_units(apps, schema_editor):
+    """Merge the per-unit rows of each rental line into one row with a quantity"""
+    Rental = apps.get_model('pos_app', 'Rental')
+
+    # Single-unit rows that were already returned keep their status
+    Rental.objects.filter(is_returned=True).update(returned_quantity=F('quantity'))
+
+    groups = Rental.objects.values(
+        'transaction_id', 'item_id', 'customer_id', 'rental_date', 'due_date'
+    ).annotate(
+        keep_id=Min('id'),
+        units=Count('id'),
+        returned=Count('id', filter=Q(is_returned=True)),
+        last_return=Max('return_date'),
+        max_overdue=Max('days_overdue'),
+    ).filter(units__gt=1)
+
+    for group in list(groups):
+        rows = Rental.objects.filter(
+            transaction_id=group['transaction_id'],
+            item_id=group['item_id'],
+            customer_id=group['customer_id'],
+            rental_date=group['rental_date'],
+            due_date=group['due_date'],
+        )
+        all_returned = group['returned'] == group['units']
+        rows.filter(id=group['keep_id']).update(
+            quantity=group['units'],
+            returned_quantity=group['returned'],
+            is_returned=all_returned,
+            return_date=group['last_return'],
+            days_overdue=group['max_overdue'],
+        )
+        rows.exclude(id=group['keep_id']).delete()
+
+
+def expand_rental_units(apps, schema_editor):
+    """Split multi-unit rows back into one row per unit"""
+    Rental = apps.get_model('pos_app', 'Rental')
+
+    for rental in list(Rental.objects.filter(quantity__gt=1)):
+        copies = []
+        for unit in range(1, rental.quantity):
+            returned = unit < rental.returned_quantity
+            copies.append(Rental(
+                transaction_id=rental.transaction_id,
+                item_id=rental.item_id,
+                customer_id=rental.customer_id,
+                rental_date=rental.rental_date,
+                due_date=rental.due_date,
+                return_date=rental.return_date if returned else None,
+                is_returned=returned,
+                days_overdue=rental.days_overdue,
+            ))
+        Rental.objects.bulk_create(copies)
+        first_returned = rental.returned_quantity > 0
+        Rental.objects.filter(id=rental.id).update(
+            quantity=1,
+            returned_quantity=1 if first_returned else 0,
+            is_returned=first_returned,
+            return_date=rental.return_date if first_returned else None,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0002_rental_quantity'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_rental_units, expand_rental_units),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0004_audit_log_event_timestamp'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['updated_at', 'id'], name='items_updated_22ed6d_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0005_item_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_key', models.CharField(max_length=40, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='pos_app.employee')),
+            ],
+            options={
+                'db_table': 'employee_sessions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['employee'], name='employee_se_employe_341b0c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0006_employee_session'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_transac_ddda52_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_employe_8de708_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_custome_72def0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_created_5c02ac_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['created_at', 'id'], name='transaction_created_eb5c48_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_type', 'created_at', 'id'], name='transaction_transac_05fa4b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['employee', 'created_at', 'id'], name='transaction_employe_4283b5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['customer', 'created_at', 'id'], name='transaction_custome_0b5fb9_idx'),
+        ),
+    ]
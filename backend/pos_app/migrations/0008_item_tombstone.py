@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0007_transaction_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.IntegerField(help_text='ID of the deleted item')),
+                ('legacy_item_id', models.IntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'item_tombstones',
+                'ordering': ['deleted_at', 'id'],
+                'indexes': [models.Index(fields=['deleted_at', 'id'], name='item_tombst_deleted_b02fc7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0008_item_tombstone'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='rental',
+            name='rentals_is_retu_cacaef_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rental',
+            name='rentals_due_dat_f32c15_idx',
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(condition=models.Q(('is_returned', False)), fields=['customer', 'due_date'], name='rentals_open_customer_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(condition=models.Q(('is_returned', False)), fields=['due_date'], name='rentals_open_due_idx'),
+        ),
+    ]
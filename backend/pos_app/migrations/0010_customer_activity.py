@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:04
+
+from datetime import date
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Min, Q, Sum
+import django.db.models.deletion
+
+
+def build_customer_activity(apps, schema_editor):
+    """Summarize the rentals written before the summaries were maintained"""
+    Rental = apps.get_model('pos_app', 'Rental')
+    Transaction = apps.get_model('pos_app', 'Transaction')
+    CustomerActivity = apps.get_model('pos_app', 'CustomerActivity')
+
+    today = date.today()
+    open_rental = Q(is_returned=False)
+    last_activity = dict(
+        Transaction.objects.filter(customer__isnull=False).values('customer_id')
+        .annotate(last=Max('created_at')).values_list('customer_id', 'last')
+    )
+    rows = Rental.objects.order_by().values('customer_id').annotate(
+        open_rentals=Count('id', filter=open_rental),
+        held_units=Sum(F('quantity') - F('returned_quantity'), filter=open_rental),
+        overdue_rentals=Count('id', filter=open_rental & Q(due_date__lt=today)),
+        earliest_due_date=Min('due_date', filter=open_rental),
+        lifetime_rentals=Count('id'),
+    )
+    CustomerActivity.objects.bulk_create([
+        CustomerActivity(
+            last_activity=last_activity.get(row['customer_id']),
+            **dict(row, held_units=row['held_units'] or 0)
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0009_rental_open_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerActivity',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity', serialize=False, to='pos_app.customer')),
+                ('open_rentals', models.IntegerField(default=0, help_text='Rental lines not fully returned')),
+                ('held_units', models.IntegerField(default=0, help_text='Units rented and not yet returned')),
+                ('overdue_rentals', models.IntegerField(default=0, help_text='Open rental lines past due, as of the last update')),
+                ('earliest_due_date', models.DateField(blank=True, help_text='Earliest due date of the open rentals', null=True)),
+                ('lifetime_rentals', models.IntegerField(default=0)),
+                ('last_activity', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'customer activity',
+                'db_table': 'customer_activity',
+            },
+        ),
+        migrations.RunPython(build_customer_activity, migrations.RunPython.noop),
+    ]
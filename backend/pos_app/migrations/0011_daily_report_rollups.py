@@ -0,0 +1,113 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:12
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def build_daily_rollups(apps, schema_editor):
+    """Roll up the transactions written before the rollups were maintained"""
+    Transaction = apps.get_model('pos_app', 'Transaction')
+    TransactionItem = apps.get_model('pos_app', 'TransactionItem')
+    DailyTransactionTotal = apps.get_model('pos_app', 'DailyTransactionTotal')
+    DailyEmployeeTotal = apps.get_model('pos_app', 'DailyEmployeeTotal')
+    DailyItemTotal = apps.get_model('pos_app', 'DailyItemTotal')
+
+    # TruncDate uses the current time zone, as the incremental updates do
+    transactions = Transaction.objects.order_by()
+    rollups = [
+        (DailyTransactionTotal, transactions.values('transaction_type', day=TruncDate('created_at')).annotate(
+            transaction_count=Count('id'), total_amount=Sum('total_amount')
+        )),
+        (DailyEmployeeTotal, transactions.values('employee_id', day=TruncDate('created_at')).annotate(
+            transaction_count=Count('id'), total_amount=Sum('total_amount')
+        )),
+        (DailyItemTotal, TransactionItem.objects.order_by().values(
+            'item_id',
+            day=TruncDate('transaction__created_at'),
+            transaction_type=F('transaction__transaction_type')
+        ).annotate(quantity=Sum('quantity'), revenue=Sum('subtotal'))),
+    ]
+    for model, rows in rollups:
+        batch = []
+        for row in rows.iterator(chunk_size=1000):
+            batch.append(model(**row))
+            if len(batch) == 1000:
+                model.objects.bulk_create(batch)
+                batch = []
+        model.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0010_customer_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyEmployeeTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'db_table': 'daily_employee_totals',
+                'ordering': ['day', 'employee'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyItemTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('Sale', 'Sale'), ('Rental', 'Rental'), ('Return', 'Return')], max_length=10)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'db_table': 'daily_item_totals',
+                'ordering': ['day', 'transaction_type', 'item'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyTransactionTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('Sale', 'Sale'), ('Rental', 'Rental'), ('Return', 'Return')], max_length=10)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'db_table': 'daily_transaction_totals',
+                'ordering': ['day', 'transaction_type'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailytransactiontotal',
+            constraint=models.UniqueConstraint(fields=('day', 'transaction_type'), name='daily_transaction_totals_key'),
+        ),
+        migrations.AddField(
+            model_name='dailyitemtotal',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_totals', to='pos_app.item'),
+        ),
+        migrations.AddField(
+            model_name='dailyemployeetotal',
+            name='employee',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_totals', to='pos_app.employee'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyitemtotal',
+            constraint=models.UniqueConstraint(fields=('day', 'transaction_type', 'item'), name='daily_item_totals_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyemployeetotal',
+            constraint=models.UniqueConstraint(fields=('day', 'employee'), name='daily_employee_totals_key'),
+        ),
+        migrations.RunPython(build_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0011_daily_report_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['rental_date', 'id'], name='rentals_rental__8981e2_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:05
+
+from importlib import import_module
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+
+def link_existing_sessions(apps, schema_editor):
+    """Record the logins made before sessions were tracked, so they can be ended too"""
+    Session = apps.get_model('sessions', 'Session')
+    Employee = apps.get_model('pos_app', 'Employee')
+    EmployeeSession = apps.get_model('pos_app', 'EmployeeSession')
+
+    # Only database-backed sessions can be listed; with another engine
+    # older sessions stay valid until they expire
+    if settings.SESSION_ENGINE not in ('django.contrib.sessions.backends.db',
+                                       'django.contrib.sessions.backends.cached_db'):
+        return
+    store = import_module(settings.SESSION_ENGINE).SessionStore()
+    employee_ids = set(Employee.objects.values_list('id', flat=True))
+    tracked = set(EmployeeSession.objects.values_list('session_key', flat=True))
+    links = []
+    for session_key, session_data in Session.objects.filter(
+        expire_date__gt=timezone.now()
+    ).values_list('session_key', 'session_data').iterator(chunk_size=1000):
+        employee_id = store.decode(session_data).get('employee_id')
+        if employee_id in employee_ids and session_key not in tracked:
+            links.append(EmployeeSession(employee_id=employee_id, session_key=session_key))
+    EmployeeSession.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos_app', '0012_rental_date_index'),
+        ('sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_existing_sessions, migrations.RunPython.noop),
+    ]
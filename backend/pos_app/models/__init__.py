@@ -1,19 +1,29 @@
 from .employee import Employee
+from .employee_session import EmployeeSession
 from .item import Item
+from .item_tombstone import ItemTombstone
 from .customer import Customer
+from .customer_activity import CustomerActivity
 from .transaction import Transaction, TransactionItem
 from .rental import Rental
 from .coupon import Coupon
 from .audit_log import AuditLog
+from .daily_rollup import DailyTransactionTotal, DailyEmployeeTotal, DailyItemTotal
 
 __all__ = [
     'Employee',
+    'EmployeeSession',
     'Item',
+    'ItemTombstone',
     'Customer',
+    'CustomerActivity',
     'Transaction',
     'TransactionItem',
     'Rental',
     'Coupon',
     'AuditLog',
+    'DailyTransactionTotal',
+    'DailyEmployeeTotal',
+    'DailyItemTotal',
 ]
 
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from .employee import Employee
 
 
@@ -18,7 +19,7 @@ class AuditLog(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.PROTECT, related_name='audit_logs')
     action = models.CharField(max_length=50, choices=ACTION_CHOICES)
     details = models.TextField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)  # Time of the action, not of the write
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     
     class Meta:
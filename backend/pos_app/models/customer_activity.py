@@ -0,0 +1,31 @@
+from datetime import date
+from django.db import models
+from .customer import Customer
+
+
+class CustomerActivity(models.Model):
+    """CustomerActivity model summarizing a customer's rentals, kept in step by the rental services"""
+    
+    customer = models.OneToOneField(
+        Customer,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='activity'
+    )
+    open_rentals = models.IntegerField(default=0, help_text="Rental lines not fully returned")
+    held_units = models.IntegerField(default=0, help_text="Units rented and not yet returned")
+    overdue_rentals = models.IntegerField(default=0, help_text="Open rental lines past due, as of the last update")
+    earliest_due_date = models.DateField(null=True, blank=True, help_text="Earliest due date of the open rentals")
+    lifetime_rentals = models.IntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'customer_activity'
+        verbose_name_plural = 'customer activity'
+    
+    def __str__(self):
+        return f"Customer {self.customer_id}: {self.open_rentals} open rentals"
+    
+    def has_overdue(self, today=None):
+        """Whether an open rental is past due (exact, unlike overdue_rentals)"""
+        return self.earliest_due_date is not None and self.earliest_due_date < (today or date.today())
@@ -0,0 +1,62 @@
+from django.db import models
+from .employee import Employee
+from .item import Item
+from .transaction import Transaction
+
+
+class DailyTransactionTotal(models.Model):
+    """DailyTransactionTotal model rolling up transactions per day and type"""
+    
+    day = models.DateField()
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    transaction_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'daily_transaction_totals'
+        ordering = ['day', 'transaction_type']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'transaction_type'], name='daily_transaction_totals_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.transaction_type}: {self.transaction_count} (${self.total_amount})"
+
+
+class DailyEmployeeTotal(models.Model):
+    """DailyEmployeeTotal model rolling up each employee's transactions per day"""
+    
+    day = models.DateField()
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='daily_totals')
+    transaction_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'daily_employee_totals'
+        ordering = ['day', 'employee']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'employee'], name='daily_employee_totals_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} employee {self.employee_id}: {self.transaction_count} (${self.total_amount})"
+
+
+class DailyItemTotal(models.Model):
+    """DailyItemTotal model rolling up units and revenue per day, transaction type and item"""
+    
+    day = models.DateField()
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='daily_totals')
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'daily_item_totals'
+        ordering = ['day', 'transaction_type', 'item']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'transaction_type', 'item'], name='daily_item_totals_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.transaction_type} item {self.item_id}: {self.quantity} (${self.revenue})"
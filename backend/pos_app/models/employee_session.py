@@ -0,0 +1,20 @@
+from django.db import models
+from .employee import Employee
+
+
+class EmployeeSession(models.Model):
+    """EmployeeSession model linking a login session to its employee"""
+    
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='sessions')
+    session_key = models.CharField(max_length=40, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'employee_sessions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['employee']),
+        ]
+    
+    def __str__(self):
+        return f"{self.employee.username} - session from {self.created_at}"
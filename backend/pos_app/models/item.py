@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import F
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 
 
 class Item(models.Model):
@@ -18,6 +20,7 @@ class Item(models.Model):
         indexes = [
             models.Index(fields=['legacy_item_id']),
             models.Index(fields=['name']),
+            models.Index(fields=['updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -28,16 +31,21 @@ class Item(models.Model):
         return self.quantity >= requested_quantity
     
     def reduce_quantity(self, amount):
-        """Reduce item quantity by specified amount"""
-        if self.quantity >= amount:
-            self.quantity -= amount
-            self.save()
-            return True
-        return False
+        """Reduce item quantity by specified amount if enough stock remains"""
+        updated = Item.objects.filter(pk=self.pk, quantity__gte=amount).update(
+            quantity=F('quantity') - amount,
+            updated_at=timezone.now()
+        )
+        if updated:
+            self.refresh_from_db(fields=['quantity', 'updated_at'])
+        return bool(updated)
     
     def increase_quantity(self, amount):
         """Increase item quantity by specified amount"""
-        self.quantity += amount
-        self.save()
+        Item.objects.filter(pk=self.pk).update(
+            quantity=F('quantity') + amount,
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['quantity', 'updated_at'])
         return True
 
@@ -0,0 +1,20 @@
+from django.db import models
+from django.utils import timezone
+
+
+class ItemTombstone(models.Model):
+    """ItemTombstone model recording deleted items for the inventory change feed"""
+    
+    item_id = models.IntegerField(help_text="ID of the deleted item")
+    legacy_item_id = models.IntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'item_tombstones'
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"Item {self.item_id} ({self.legacy_item_id}) deleted at {self.deleted_at}"
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import BooleanField, Case, F, Func, IntegerField, Q, Value, When
 from django.core.validators import MinValueValidator
 from .transaction import Transaction
 from .item import Item
@@ -6,31 +7,119 @@ from .customer import Customer
 from datetime import date, timedelta
 
 
+class DaysBetween(Func):
+    """Whole days from the second date expression to the first, computed in SQL"""
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = IntegerField()
+    
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+    
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='DATEDIFF(%(expressions)s)',
+            arg_joiner=', ',
+            **extra_context
+        )
+
+
+class RentalQuerySet(models.QuerySet):
+    """Rental queries with overdue status worked out by the database"""
+    
+    def overdue(self, today=None):
+        """Unreturned rentals past their due date (served by the open-rental partial indexes)"""
+        return self.filter(is_returned=False, due_date__lt=today or date.today())
+    
+    def with_overdue(self, today=None):
+        """
+        Annotate current_days_overdue and currently_overdue as of today
+        
+        Unlike the stored days_overdue column, these are never stale.
+        """
+        today = today or date.today()
+        return self.annotate(
+            current_days_overdue=Case(
+                When(is_returned=False, due_date__lt=today,
+                     then=DaysBetween(Value(today, output_field=models.DateField()), F('due_date'))),
+                When(is_returned=True, return_date__gt=F('due_date'),
+                     then=DaysBetween(F('return_date'), F('due_date'))),
+                default=None,
+                output_field=IntegerField()
+            ),
+            currently_overdue=Case(
+                When(is_returned=False, due_date__lt=today, then=True),
+                default=False,
+                output_field=BooleanField()
+            ),
+        )
+    
+    def refresh_days_overdue(self, today=None):
+        """
+        Bring the stored days_overdue column up to date in one UPDATE
+        
+        Only open rentals are touched: returned ones keep the value
+        recorded at return time.
+        
+        Returns:
+            Number of rows updated
+        """
+        today = today or date.today()
+        return self.filter(is_returned=False).filter(
+            Q(due_date__lt=today) | Q(days_overdue__isnull=False)
+        ).update(days_overdue=Case(
+            When(due_date__lt=today, then=DaysBetween(Value(today, output_field=models.DateField()), F('due_date'))),
+            default=None,
+            output_field=IntegerField()
+        ))
+
+
 class Rental(models.Model):
     """Rental model representing item rentals"""
     
     transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='rentals')
     item = models.ForeignKey(Item, on_delete=models.PROTECT, related_name='rentals')
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='rentals')
+    quantity = models.IntegerField(default=1, validators=[MinValueValidator(1)])
+    returned_quantity = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     rental_date = models.DateField(default=date.today)
     due_date = models.DateField()
     return_date = models.DateField(null=True, blank=True)
     is_returned = models.BooleanField(default=False)
     days_overdue = models.IntegerField(null=True, blank=True, validators=[MinValueValidator(0)])
     
+    objects = RentalQuerySet.as_manager()
+    
     class Meta:
         db_table = 'rentals'
         ordering = ['-rental_date']
         indexes = [
             models.Index(fields=['customer']),
             models.Index(fields=['item']),
-            models.Index(fields=['is_returned']),
-            models.Index(fields=['due_date']),
+            models.Index(fields=['rental_date', 'id']),
+            # Only open rentals are indexed, so overdue lookups skip the returned history
+            models.Index(
+                fields=['customer', 'due_date'],
+                name='rentals_open_customer_due_idx',
+                condition=Q(is_returned=False)
+            ),
+            models.Index(fields=['due_date'], name='rentals_open_due_idx', condition=Q(is_returned=False)),
         ]
     
     def __str__(self):
         status = "Returned" if self.is_returned else "Active"
-        return f"Rental #{self.id}: {self.item.name} - {self.customer.phone_number} ({status})"
+        return f"Rental #{self.id}: {self.item.name} x{self.quantity} - {self.customer.phone_number} ({status})"
+    
+    @property
+    def outstanding_quantity(self):
+        """Number of rented units not yet returned"""
+        return self.quantity - self.returned_quantity
     
     def save(self, *args, **kwargs):
         """Calculate due date and days overdue if not set"""
@@ -38,21 +127,36 @@ class Rental(models.Model):
             # Default rental period: 7 days
             self.due_date = self.rental_date + timedelta(days=7)
         
-        if not self.is_returned and self.due_date < date.today():
-            self.days_overdue = (date.today() - self.due_date).days
-        elif self.is_returned and self.return_date and self.return_date > self.due_date:
-            self.days_overdue = (self.return_date - self.due_date).days
-        else:
-            self.days_overdue = None
-        
+        self.days_overdue = self.compute_days_overdue()
         super().save(*args, **kwargs)
     
-    def mark_as_returned(self, return_date=None):
-        """Mark rental as returned"""
-        self.is_returned = True
+    def mark_as_returned(self, return_date=None, quantity=None):
+        """
+        Mark units of the rental as returned
+        
+        Args:
+            return_date: Date of the return (defaults to today)
+            quantity: Units being returned (defaults to all outstanding units)
+        """
+        if quantity is None:
+            quantity = self.outstanding_quantity
+        if quantity <= 0 or quantity > self.outstanding_quantity:
+            raise ValueError(f"Cannot return {quantity} of {self.outstanding_quantity} outstanding units")
+        
+        self.returned_quantity += quantity
+        self.is_returned = self.returned_quantity == self.quantity
         self.return_date = return_date or date.today()
         self.save()
     
+    def compute_days_overdue(self, today=None):
+        """Days overdue as of today (or at return), or None if not late"""
+        today = today or date.today()
+        if not self.is_returned and self.due_date < today:
+            return (today - self.due_date).days
+        if self.is_returned and self.return_date and self.return_date > self.due_date:
+            return (self.return_date - self.due_date).days
+        return None
+    
     def is_overdue(self):
         """Check if rental is overdue"""
         return not self.is_returned and self.due_date < date.today()
@@ -27,10 +27,11 @@ class Transaction(models.Model):
         db_table = 'transactions'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['transaction_type']),
-            models.Index(fields=['employee']),
-            models.Index(fields=['customer']),
-            models.Index(fields=['created_at']),
+            # Keyset pagination of the history, alone or behind one filter
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['transaction_type', 'created_at', 'id']),
+            models.Index(fields=['employee', 'created_at', 'id']),
+            models.Index(fields=['customer', 'created_at', 'id']),
         ]
     
     def __str__(self):
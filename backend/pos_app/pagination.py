@@ -0,0 +1,155 @@
+"""
+Pagination classes for POS system
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(payload):
+    """Encode a JSON-serializable cursor payload as an opaque URL-safe string"""
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('ascii')).decode('ascii')
+
+
+def decode_cursor(encoded):
+    """
+    Decode a cursor made by encode_cursor
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def decode_key(payload, key_field='k', id_field='i'):
+    """
+    Read a (timestamp, id) key from a decoded cursor payload
+
+    Raises:
+        ValueError: if the key is missing or malformed
+    """
+    try:
+        timestamp = parse_datetime(payload[key_field])
+        row_id = int(payload[id_field])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+    if timestamp is None:
+        raise ValueError('Invalid cursor')
+    return timestamp, row_id
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a unique (timestamp, id) key, newest first
+
+    The cursor holds the key of the last row seen, so every page is a
+    single range scan on a (timestamp, id) index (or a copy of it prefixed
+    with the filtered column) and page 10,000 costs the same as page 1.
+    Unlike offset pagination, rows added while paging do not shift pages.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('created_at', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        field, tiebreak = self.ordering
+
+        if reverse:
+            # Walking back towards newer rows: read ascending, then flip
+            queryset = queryset.order_by(field, tiebreak)
+            lookup = 'gt'
+        else:
+            queryset = queryset.order_by(f'-{field}', f'-{tiebreak}')
+            lookup = 'lt'
+        if position is not None:
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': position[0]}) |
+                Q(**{field: position[0], f'{tiebreak}__{lookup}': position[1]})
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        keys = [self.get_key(row) for row in rows]
+        self.next_position = keys[-1] if keys else position
+        self.previous_position = keys[0] if keys else position
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_key(self, row):
+        return getattr(row, self.ordering[0]), getattr(row, self.ordering[1])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        if position is None:
+            return remove_query_param(url, self.cursor_query_param)
+        payload = {'k': position[0].isoformat(), 'i': position[1]}
+        if reverse:
+            payload['r'] = 1
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(payload))
+
+    def decode_cursor(self, request):
+        """
+        Returns:
+            Tuple of ((timestamp, id) or None, reverse flag)
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = decode_cursor(encoded)
+            return decode_key(payload), bool(payload.get('r'))
+        except (ValueError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class TransactionHistoryPagination(KeysetPagination):
+    """Keyset pagination for the transaction history"""
+    page_size = 50
+    ordering = ('created_at', 'id')
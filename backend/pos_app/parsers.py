@@ -0,0 +1,28 @@
+"""
+Parsers for POS system
+"""
+import codecs
+import csv
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    """
+    Parses a text/csv body into a list of rows (lists of strings)
+
+    The body is decoded and split while it is read, so a large upload is
+    never held as one string.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if stream is None:
+            return []
+        try:
+            return list(csv.reader(codecs.iterdecode(stream, encoding)))
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f'CSV parse error - {exc}')
@@ -1,7 +1,51 @@
 """
 Custom permissions for POS system
 """
+from django.utils.functional import cached_property
 from rest_framework import permissions
+from .models import Employee
+
+
+class EmployeeIdentity:
+    """
+    The employee behind a request, as recorded in the session at login
+    
+    The role comes from the session, so permission checks need no query.
+    The Employee row is only loaded if a view asks for it, and then once.
+    """
+    
+    def __init__(self, employee_id, position):
+        self.id = employee_id
+        self.position = position
+    
+    def is_admin(self):
+        return self.position == 'Admin'
+    
+    def is_cashier(self):
+        return self.position == 'Cashier'
+    
+    @cached_property
+    def employee(self):
+        """The Employee row, loaded on first access"""
+        return Employee.objects.get(id=self.id)
+
+
+def get_employee_identity(request):
+    """
+    Get the identity of the logged-in employee for this request
+    
+    Returns:
+        EmployeeIdentity, or None if no employee is logged in
+    """
+    # Keep it on the Django request so it is shared by every wrapper of it
+    http_request = getattr(request, '_request', request)
+    if not hasattr(http_request, '_employee_identity'):
+        employee_id = request.session.get('employee_id')
+        http_request._employee_identity = EmployeeIdentity(
+            employee_id,
+            request.session.get('employee_position')
+        ) if employee_id else None
+    return http_request._employee_identity
 
 
 class IsEmployeeAuthenticated(permissions.BasePermission):
@@ -12,3 +56,16 @@ class IsEmployeeAuthenticated(permissions.BasePermission):
         # Check if employee_id exists in session
         return bool(request.session.get('employee_id'))
 
+
+class IsAdminEmployee(permissions.BasePermission):
+    """
+    Permission that only lets logged-in admins through
+    
+    Relies on the role stored in the session; EmployeeService ends every
+    session of an employee whose role changes or who is deactivated.
+    """
+    message = 'Only admins can access this endpoint'
+    
+    def has_permission(self, request, view):
+        identity = get_employee_identity(request)
+        return identity is not None and identity.is_admin()
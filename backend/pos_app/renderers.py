@@ -0,0 +1,59 @@
+"""
+Renderers for POS system
+"""
+import csv
+import io
+import json
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def format_event(kind, data, event_id=None):
+    """Format one server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {kind}')
+    lines.append('data: ' + json.dumps(data, cls=JSONEncoder))
+    return '\n'.join(lines) + '\n\n'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Accepts text/event-stream clients in content negotiation
+
+    Streaming views return their own response; this only renders errors
+    (such as a failed permission check) as an 'error' event.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event('error', data).encode(self.charset)
+
+
+def format_csv_row(values):
+    """Format one CSV line"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Offers text/csv (or ?format=csv) in content negotiation
+
+    Views stream their own CSV body; this renders other responses, such
+    as errors, as key/value rows.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            rows = [[key, value] for key, value in data.items()]
+        else:
+            rows = [[value] for value in data or []]
+        return ''.join(format_csv_row(row) for row in rows).encode(self.charset)
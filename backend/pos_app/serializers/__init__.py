@@ -1,10 +1,12 @@
+from .eager_loading import EagerLoadingMixin
 from .employee_serializer import EmployeeSerializer, EmployeeLoginSerializer, CreateEmployeeSerializer
 from .item_serializer import ItemSerializer
-from .transaction_serializer import TransactionSerializer, TransactionItemSerializer, CreateSaleSerializer, CreateRentalSerializer
+from .transaction_serializer import TransactionSerializer, TransactionItemSerializer, CreateSaleSerializer, CreateRentalSerializer, ProcessReturnSerializer
 from .rental_serializer import RentalSerializer
 from .customer_serializer import CustomerSerializer
 
 __all__ = [
+    'EagerLoadingMixin',
     'EmployeeSerializer',
     'EmployeeLoginSerializer',
     'CreateEmployeeSerializer',
@@ -13,6 +15,7 @@ __all__ = [
     'TransactionItemSerializer',
     'CreateSaleSerializer',
     'CreateRentalSerializer',
+    'ProcessReturnSerializer',
     'RentalSerializer',
     'CustomerSerializer',
 ]
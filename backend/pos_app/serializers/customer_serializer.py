@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from ..models import Customer
+from .eager_loading import EagerLoadingMixin
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Customer model"""
     
     class Meta:
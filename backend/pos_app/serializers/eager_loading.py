@@ -0,0 +1,130 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _get_relation(model, name):
+    """Return the relation field called name on model, or None"""
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def _get_model(serializer):
+    meta = getattr(serializer, 'Meta', None)
+    return getattr(meta, 'model', None)
+
+
+def build_loading_plan(serializer):
+    """
+    Work out which relations a model serializer reads
+    
+    Walks every readable field: dotted source= paths through forward
+    foreign keys become select_related joins, paths through reverse or
+    many-to-many relations become prefetches, and nested serializers are
+    planned recursively (a nested list gets its own planned queryset).
+    
+    Args:
+        serializer: ModelSerializer instance
+    
+    Returns:
+        Tuple of (set of select_related paths,
+                  list of (prefetch path, related model, nested serializer or None))
+    """
+    model = _get_model(serializer)
+    selects = set()
+    prefetches = []
+    if model is None:
+        return selects, prefetches
+    
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        path = []
+        current = model
+        attrs = field.source.split('.')
+        
+        for index, attr in enumerate(attrs):
+            relation = _get_relation(current, attr)
+            if relation is None:
+                break
+            path.append(attr)
+            last = index == len(attrs) - 1
+            joined = '__'.join(path)
+            
+            if relation.many_to_many or relation.one_to_many:
+                child = nested if last and isinstance(nested, serializers.ModelSerializer) else None
+                prefetches.append((joined, relation.related_model, child))
+                break
+            
+            if last and isinstance(field, serializers.PrimaryKeyRelatedField):
+                # The id is already on the row
+                break
+            
+            selects.add(joined)
+            if last and isinstance(field, serializers.ModelSerializer):
+                child_selects, child_prefetches = build_loading_plan(field)
+                selects.update(f'{joined}__{child_path}' for child_path in child_selects)
+                prefetches.extend(
+                    (f'{joined}__{child_path}', related_model, child)
+                    for child_path, related_model, child in child_prefetches
+                )
+            current = relation.related_model
+    
+    return selects, prefetches
+
+
+def apply_loading_plan(plan, queryset):
+    """
+    Add the select_related/prefetch_related calls of a plan to queryset
+    
+    Args:
+        plan: Tuple returned by build_loading_plan
+        queryset: QuerySet of the serializer's model
+    
+    Returns:
+        QuerySet
+    """
+    selects, prefetches = plan
+    if selects:
+        queryset = queryset.select_related(*sorted(selects))
+    if prefetches:
+        queryset = queryset.prefetch_related(*[
+            Prefetch(
+                path,
+                queryset=apply_loading_plan(
+                    build_loading_plan(child), related_model._default_manager.all()
+                ) if child is not None else None
+            )
+            for path, related_model, child in prefetches
+        ])
+    return queryset
+
+
+class EagerLoadingMixin:
+    """
+    Serializer mixin that loads everything the serializer reads up front
+    
+    Usage:
+        items = TransactionSerializer.setup_eager_loading(Transaction.objects.all())
+    
+    The plan is derived once per serializer class from its fields, so
+    adding a source='relation.field' field is enough to keep list and
+    detail endpoints at a fixed number of queries.
+    """
+    
+    @classmethod
+    def get_loading_plan(cls):
+        """Get the (select_related, prefetch) plan, computed on first use"""
+        if '_loading_plan' not in cls.__dict__:
+            cls._loading_plan = build_loading_plan(cls())
+        return cls._loading_plan
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Return queryset with the serializer's relations joined or prefetched"""
+        return apply_loading_plan(cls.get_loading_plan(), queryset)
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from ..models import Employee
+from .eager_loading import EagerLoadingMixin
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Employee model"""
     full_name = serializers.ReadOnlyField()
     
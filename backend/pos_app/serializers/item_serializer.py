@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from ..models import Item
+from .eager_loading import EagerLoadingMixin
 
 
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Item model"""
     
     class Meta:
@@ -1,24 +1,35 @@
 from rest_framework import serializers
 from ..models import Rental
+from .eager_loading import EagerLoadingMixin
 
 
-class RentalSerializer(serializers.ModelSerializer):
+class RentalSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Rental model"""
     item_name = serializers.CharField(source='item.name', read_only=True)
     item_id = serializers.IntegerField(source='item.id', read_only=True)
     customer_phone = serializers.CharField(source='customer.phone_number', read_only=True)
+    days_overdue = serializers.SerializerMethodField()
     is_overdue = serializers.SerializerMethodField()
     
     class Meta:
         model = Rental
         fields = [
             'id', 'transaction', 'item', 'item_id', 'item_name',
-            'customer', 'customer_phone', 'rental_date', 'due_date',
+            'customer', 'customer_phone', 'quantity', 'returned_quantity',
+            'rental_date', 'due_date',
             'return_date', 'is_returned', 'days_overdue', 'is_overdue'
         ]
         read_only_fields = ['id']
     
+    def get_days_overdue(self, obj):
+        """Days overdue as of today, from the with_overdue() annotation when present"""
+        if hasattr(obj, 'current_days_overdue'):
+            return obj.current_days_overdue
+        return obj.compute_days_overdue()
+    
     def get_is_overdue(self, obj):
         """Check if rental is overdue"""
+        if hasattr(obj, 'currently_overdue'):
+            return obj.currently_overdue
         return obj.is_overdue()
 
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from ..models import Transaction, TransactionItem
+from .eager_loading import EagerLoadingMixin
 
 
-class TransactionItemSerializer(serializers.ModelSerializer):
+class TransactionItemSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for TransactionItem model"""
     item_name = serializers.CharField(source='item.name', read_only=True)
     item_id = serializers.IntegerField(source='item.id', read_only=True)
@@ -13,7 +14,7 @@ class TransactionItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Transaction model"""
     items = TransactionItemSerializer(many=True, read_only=True)
     employee_username = serializers.CharField(source='employee.username', read_only=True)
@@ -74,3 +75,32 @@ class CreateRentalSerializer(serializers.Serializer):
                 raise serializers.ValidationError("Quantity must be greater than 0")
         return value
 
+
+class ProcessReturnSerializer(serializers.Serializer):
+    """Serializer for processing returns by item or by rental"""
+    customer_phone = serializers.CharField(max_length=15)
+    items = serializers.ListField(
+        child=serializers.DictField(
+            child=serializers.IntegerField()
+        ),
+        required=False
+    )
+    rental_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+    
+    def validate_items(self, value):
+        """Validate items list"""
+        for item in value:
+            if 'item_id' not in item or 'quantity' not in item:
+                raise serializers.ValidationError("Each item must have 'item_id' and 'quantity'")
+            if item['quantity'] <= 0:
+                raise serializers.ValidationError("Quantity must be greater than 0")
+        return value
+    
+    def validate(self, data):
+        """Require items or rental IDs"""
+        if not data.get('items') and not data.get('rental_ids'):
+            raise serializers.ValidationError("Either items or rental_ids must be provided")
+        return data
@@ -2,11 +2,18 @@ from .transaction_service import TransactionService
 from .inventory_service import InventoryService
 from .employee_service import EmployeeService
 from .rental_service import RentalService
+from .audit_service import AuditService, AuditLogWriter
+from .coupon_service import CouponService
+from .reporting_service import ReportingService
 
 __all__ = [
     'TransactionService',
     'InventoryService',
     'EmployeeService',
     'RentalService',
+    'AuditService',
+    'AuditLogWriter',
+    'CouponService',
+    'ReportingService',
 ]
 
@@ -0,0 +1,185 @@
+"""
+Audit Service - Buffered, asynchronous audit log writing
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from ..models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """
+    Queue audit entries in memory and write them in batches
+
+    Entries are queued only once the surrounding database transaction
+    commits, so they never lengthen a checkout transaction. A background
+    thread drains the queue with bulk_create when either batch_size entries
+    are waiting or flush_interval seconds have passed. When the queue is
+    full the entry is written synchronously instead of being lost. With
+    background=False every entry is written synchronously on commit.
+    """
+
+    def __init__(self, max_queue_size=10000, batch_size=500, flush_interval=1.0,
+                 late_after=5.0, background=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.late_after = late_after
+        self.background = background
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._counters = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'sync_fallbacks': 0,
+            'dropped': 0,
+            'late': 0,
+        }
+
+    def log(self, employee, action, details=None, ip_address=None):
+        """Record an audit entry once the current transaction commits"""
+        entry = {
+            'employee_id': employee.id,
+            'action': action,
+            'details': details,
+            'ip_address': ip_address,
+            'timestamp': timezone.now(),
+        }
+        transaction.on_commit(lambda: self._enqueue(entry))
+
+    def flush(self):
+        """Write every queued entry from the calling thread"""
+        while True:
+            batch = self._take_batch(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self, timeout=10.0):
+        """Stop the background thread after it has drained the queue"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def stats(self):
+        """Return queue depth and writer counters"""
+        with self._lock:
+            counters = dict(self._counters)
+        counters['queue_depth'] = self._queue.qsize()
+        return counters
+
+    def _enqueue(self, entry):
+        if not self.background:
+            self._write([entry])
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._count('sync_fallbacks')
+            self._write([entry])
+            return
+        self._count('enqueued')
+        self._ensure_thread()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while not (self._stopping.is_set() and self._queue.empty()):
+                batch = self._take_batch(block=True)
+                if batch:
+                    self._write(batch)
+        finally:
+            close_old_connections()
+
+    def _take_batch(self, block):
+        """Collect up to batch_size entries, waiting at most flush_interval"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if block and remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        with self._write_lock:
+            try:
+                AuditLog.objects.bulk_create([AuditLog(**entry) for entry in batch])
+            except Exception:
+                logger.exception("Dropped %d audit log entries", len(batch))
+                self._count('dropped', len(batch))
+                return
+
+        now = timezone.now()
+        late = sum(1 for entry in batch if (now - entry['timestamp']).total_seconds() > self.late_after)
+        self._count('written', len(batch))
+        self._count('batches')
+        if late:
+            self._count('late', late)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+
+class AuditService:
+    """Service class for recording employee actions in the audit log"""
+
+    _writer = None
+    _writer_lock = threading.Lock()
+
+    @staticmethod
+    def get_writer():
+        """Get the process-wide audit log writer, creating it on first use"""
+        if AuditService._writer is None:
+            with AuditService._writer_lock:
+                if AuditService._writer is None:
+                    writer = AuditLogWriter(
+                        max_queue_size=settings.AUDIT_LOG_QUEUE_SIZE,
+                        batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+                        flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL,
+                        background=settings.AUDIT_LOG_ASYNC
+                    )
+                    atexit.register(writer.stop)
+                    AuditService._writer = writer
+        return AuditService._writer
+
+    @staticmethod
+    def log(employee, action, details=None, ip_address=None):
+        """Record an employee action"""
+        AuditService.get_writer().log(employee, action, details, ip_address)
+
+    @staticmethod
+    def flush():
+        """Write any queued entries immediately"""
+        AuditService.get_writer().flush()
+
+    @staticmethod
+    def stats():
+        """Get queue depth and counters of the audit log writer"""
+        return AuditService.get_writer().stats()
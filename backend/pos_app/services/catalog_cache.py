@@ -0,0 +1,213 @@
+"""
+Catalog Cache - Read-through cache of item prices, names and stock hints
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from ..models import Item, ItemTombstone
+
+
+class CatalogEntry(namedtuple(
+    'CatalogEntry',
+    ['id', 'legacy_item_id', 'name', 'price', 'quantity', 'created_at', 'updated_at']
+)):
+    """Snapshot of one Item row"""
+    
+    __slots__ = ()
+    
+    def to_item(self):
+        """Build an Item instance (as if loaded from the database) from the snapshot"""
+        return Item.from_db(Item.objects.db, list(self._fields), list(self))
+
+
+class CatalogCache:
+    """
+    Per-worker cache of Item rows keyed on id and legacy_item_id
+    
+    Misses are loaded from the database (many at once where possible).
+    Every CATALOG_CACHE_REFRESH_INTERVAL seconds the next read pulls rows
+    whose updated_at moved since the last load, and drops items with a
+    tombstone since then, which picks up changes and deletions made by
+    other workers. Item saves in this process invalidate entries
+    immediately. Quantities are hints only; stock is checked by the
+    conditional decrement itself. The version counter increases with every
+    change applied to the cache.
+    
+    After warm() the cache holds the whole catalog, so a miss means the
+    item does not exist and needs no query; invalidated items are then
+    reloaded together on the next read.
+    """
+    
+    FIELDS = CatalogEntry._fields
+    
+    def __init__(self):
+        self._by_id = {}
+        self._by_legacy_id = {}
+        self._lock = threading.RLock()
+        self._high_water = None
+        self._deleted_since = None
+        self._last_refresh = time.monotonic()
+        self._complete = False
+        self._dirty = set()
+        self.version = 0
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+    
+    def get(self, item_id):
+        """Get the entry for an item ID, loading it on a miss"""
+        return self.get_many([item_id]).get(item_id)
+    
+    def get_many(self, item_ids):
+        """Get entries for several item IDs with at most one query for misses"""
+        self._maybe_refresh()
+        with self._lock:
+            found = {item_id: self._by_id[item_id] for item_id in item_ids if item_id in self._by_id}
+            missing = [item_id for item_id in item_ids if item_id not in found]
+            self._hits += len(found)
+            self._misses += len(missing)
+            complete = self._complete
+        if missing and not complete:
+            for entry in self._load(id__in=missing):
+                found[entry.id] = entry
+        return found
+    
+    def get_by_legacy_id(self, legacy_item_id):
+        """Get the entry for a legacy item ID, loading it on a miss"""
+        legacy_item_id = int(legacy_item_id)
+        return self.get_many_by_legacy_ids([legacy_item_id]).get(legacy_item_id)
+    
+    def get_many_by_legacy_ids(self, legacy_item_ids):
+        """Get entries for several legacy item IDs with at most one query for misses"""
+        self._maybe_refresh()
+        with self._lock:
+            found = {}
+            for legacy_item_id in legacy_item_ids:
+                item_id = self._by_legacy_id.get(legacy_item_id)
+                if item_id is not None:
+                    found[legacy_item_id] = self._by_id[item_id]
+            missing = [legacy_item_id for legacy_item_id in legacy_item_ids if legacy_item_id not in found]
+            self._hits += len(found)
+            self._misses += len(missing)
+            complete = self._complete
+        if missing and not complete:
+            for entry in self._load(legacy_item_id__in=missing):
+                found[entry.legacy_item_id] = entry
+        return found
+    
+    @property
+    def is_warm(self):
+        """Whether the cache holds the whole catalog"""
+        return self._complete
+    
+    def warm(self):
+        """Load the whole catalog"""
+        with self._lock:
+            self._dirty.clear()
+        self._load()
+        with self._lock:
+            self._complete = True
+    
+    def refresh(self):
+        """Pull rows changed and drop items deleted since the last load"""
+        with self._lock:
+            high_water = self._high_water
+            deleted_since = self._deleted_since
+            if deleted_since is not None:
+                self._deleted_since = timezone.now()
+            self._last_refresh = time.monotonic()
+            self._refreshes += 1
+        if high_water is None and deleted_since is None:
+            return
+        # Overlap the window so rows committed late with an older timestamp are not missed
+        overlap = timedelta(seconds=settings.CATALOG_CACHE_REFRESH_INTERVAL)
+        if high_water is not None:
+            self._load(updated_at__gte=high_water - overlap)
+        if deleted_since is not None:
+            # Read after the rows, so an item deleted in between is still dropped
+            deleted = list(ItemTombstone.objects.filter(
+                deleted_at__gte=deleted_since - overlap
+            ).values_list('item_id', flat=True))
+            if deleted:
+                self._drop(deleted)
+    
+    def invalidate(self, item_ids):
+        """Drop entries so the next read goes to the database"""
+        with self._lock:
+            self._drop(item_ids)
+            if self._complete:
+                self._dirty.update(item_ids)
+    
+    def adjust_quantities(self, deltas):
+        """Apply committed stock changes to the cached quantity hints"""
+        with self._lock:
+            for item_id, delta in deltas.items():
+                entry = self._by_id.get(item_id)
+                if entry is not None:
+                    self._by_id[item_id] = entry._replace(quantity=entry.quantity + delta)
+            self.version += 1
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._by_id.clear()
+            self._by_legacy_id.clear()
+            self._high_water = None
+            self._deleted_since = None
+            self._complete = False
+            self._dirty.clear()
+            self.version += 1
+    
+    def stats(self):
+        """Get size, version and hit/miss counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._by_id),
+                'version': self.version,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+                'refreshes': self._refreshes,
+                'warm': self._complete,
+            }
+    
+    def _maybe_refresh(self):
+        if time.monotonic() - self._last_refresh >= settings.CATALOG_CACHE_REFRESH_INTERVAL:
+            self.refresh()
+        if self._dirty:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+            self._load(id__in=dirty)
+    
+    def _drop(self, item_ids):
+        with self._lock:
+            for item_id in item_ids:
+                entry = self._by_id.pop(item_id, None)
+                if entry is not None and self._by_legacy_id.get(entry.legacy_item_id) == item_id:
+                    del self._by_legacy_id[entry.legacy_item_id]
+            self.version += 1
+    
+    def _load(self, **filters):
+        with self._lock:
+            if self._deleted_since is None:
+                # Deletions from here on are dropped by refresh()
+                self._deleted_since = timezone.now()
+        rows = Item.objects.filter(**filters).order_by().values_list(*self.FIELDS)
+        entries = [CatalogEntry(*row) for row in rows]
+        with self._lock:
+            for entry in entries:
+                previous = self._by_id.get(entry.id)
+                if previous is not None and previous.legacy_item_id != entry.legacy_item_id:
+                    self._by_legacy_id.pop(previous.legacy_item_id, None)
+                self._by_id[entry.id] = entry
+                self._by_legacy_id[entry.legacy_item_id] = entry.id
+                if self._high_water is None or entry.updated_at > self._high_water:
+                    self._high_water = entry.updated_at
+            if entries:
+                self.version += 1
+        return entries
+
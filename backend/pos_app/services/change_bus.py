@@ -0,0 +1,159 @@
+"""
+Change Bus - In-process fan-out of committed item changes to stream clients
+"""
+import secrets
+import threading
+from collections import deque, namedtuple
+from django.conf import settings
+
+
+ChangeEvent = namedtuple('ChangeEvent', ['id', 'sequence', 'kind', 'data'])
+
+
+class ChangeSubscription:
+    """
+    Bounded buffer of events waiting to be sent to one stream client
+    
+    A client that falls more than maxsize events behind loses its backlog
+    and is flagged as overflowed; it then has to reload instead of the
+    buffer (and this worker's memory) growing without limit.
+    """
+    
+    def __init__(self, maxsize):
+        self._events = deque()
+        self._maxsize = maxsize
+        self._ready = threading.Condition()
+        self._overflowed = False
+        # Id of the latest event when the subscription started
+        self.position = None
+    
+    def push(self, event):
+        """Queue an event, dropping the backlog if the buffer is full"""
+        with self._ready:
+            if len(self._events) >= self._maxsize:
+                self._events.clear()
+                self._overflowed = True
+            self._events.append(event)
+            self._ready.notify()
+    
+    def get(self, timeout):
+        """
+        Wait for events
+        
+        Args:
+            timeout: Seconds to wait when nothing is queued
+        
+        Returns:
+            Tuple of (list of ChangeEvents, whether events were dropped since the last call)
+        """
+        with self._ready:
+            if not self._events and not self._overflowed:
+                self._ready.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            overflowed, self._overflowed = self._overflowed, False
+        return events, overflowed
+    
+    def __len__(self):
+        return len(self._events)
+
+
+class ChangeBus:
+    """
+    Publishes item changes to every subscribed stream in this process
+    
+    Each event gets an id of the form '<epoch>-<sequence>'. The last
+    ITEM_STREAM_HISTORY events are kept so that a client reconnecting with
+    the id of the last event it saw gets what it missed replayed. An id
+    from another process (other epoch) or older than the history cannot be
+    resumed; the client is told to reload instead.
+    """
+    
+    def __init__(self, history=None):
+        self.epoch = secrets.token_hex(4)
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._history = deque(maxlen=history or settings.ITEM_STREAM_HISTORY)
+        self._subscribers = set()
+        self._published = 0
+        self._overflows = 0
+    
+    @property
+    def has_subscribers(self):
+        """Whether any stream is listening (publishers may skip work otherwise)"""
+        return bool(self._subscribers)
+    
+    @property
+    def position(self):
+        """Id of the latest event, for clients that start from now"""
+        return f'{self.epoch}-{self._sequence}'
+    
+    def publish(self, changes):
+        """
+        Send changes to every subscriber
+        
+        Args:
+            changes: Iterable of (kind, data) pairs
+        """
+        with self._lock:
+            for kind, data in changes:
+                self._sequence += 1
+                event = ChangeEvent(f'{self.epoch}-{self._sequence}', self._sequence, kind, data)
+                self._history.append(event)
+                self._published += 1
+                for subscription in self._subscribers:
+                    subscription.push(event)
+    
+    def subscribe(self, last_event_id=None, maxsize=None):
+        """
+        Start listening, replaying events after last_event_id if possible
+        
+        Args:
+            last_event_id: Id of the last event the client saw, or None
+            maxsize: Buffer size; defaults to ITEM_STREAM_BUFFER_SIZE
+        
+        Returns:
+            Tuple of (ChangeSubscription, whether the client resumed without a gap)
+        """
+        subscription = ChangeSubscription(maxsize or settings.ITEM_STREAM_BUFFER_SIZE)
+        with self._lock:
+            sequence = self._parse(last_event_id)
+            oldest = self._history[0].sequence if self._history else self._sequence + 1
+            resumed = sequence is not None and oldest - 1 <= sequence <= self._sequence
+            if resumed:
+                for event in self._history:
+                    if event.sequence > sequence:
+                        subscription.push(event)
+            subscription.position = self.position
+            self._subscribers.add(subscription)
+        return subscription, resumed
+    
+    def unsubscribe(self, subscription):
+        """Stop sending events to a subscription"""
+        with self._lock:
+            self._subscribers.discard(subscription)
+    
+    def record_overflow(self):
+        """Count a client that fell behind and had to reload"""
+        with self._lock:
+            self._overflows += 1
+    
+    def stats(self):
+        """Get subscriber and event counters"""
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self._published,
+                'history': len(self._history),
+                'overflows': self._overflows,
+                'position': self.position,
+            }
+    
+    def _parse(self, event_id):
+        """Sequence number of an event id from this bus, or None"""
+        if not event_id:
+            return None
+        epoch, _, sequence = str(event_id).partition('-')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
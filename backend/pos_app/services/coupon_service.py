@@ -0,0 +1,51 @@
+"""
+Coupon Service - Business logic for coupon lookups
+"""
+from django.conf import settings
+from ..caching import TTLCache
+from ..models import Coupon
+
+
+class CouponService:
+    """
+    Service class for resolving coupon codes
+
+    Coupons are cached per worker with a TTL. Unknown codes are cached too
+    (for a shorter time) so repeated invalid codes cost no query. Expiry is
+    checked against the cached expires_at, and any Coupon save or delete in
+    this process clears the cache; other workers catch up within the TTL.
+    """
+
+    _cache = TTLCache(max_size=settings.COUPON_CACHE_SIZE, ttl=settings.COUPON_CACHE_TTL)
+    _UNKNOWN = object()
+
+    @staticmethod
+    def get_valid_coupon(code):
+        """
+        Resolve a coupon code
+
+        Returns:
+            Coupon object if the code exists and is currently valid, None otherwise
+        """
+        coupon = CouponService._cache.get(code)
+        if coupon is None:
+            try:
+                coupon = Coupon.objects.get(code=code)
+                CouponService._cache.set(code, coupon)
+            except Coupon.DoesNotExist:
+                coupon = CouponService._UNKNOWN
+                CouponService._cache.set(code, coupon, ttl=settings.COUPON_NEGATIVE_CACHE_TTL)
+
+        if coupon is CouponService._UNKNOWN or not coupon.is_valid():
+            return None
+        return coupon
+
+    @staticmethod
+    def invalidate():
+        """Drop every cached coupon"""
+        CouponService._cache.clear()
+
+    @staticmethod
+    def cache_stats():
+        """Get hit/miss statistics of the coupon cache"""
+        return CouponService._cache.stats()
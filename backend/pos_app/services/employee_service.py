@@ -1,7 +1,12 @@
 """
 Employee Service - Business logic for employee operations
 """
-from ..models import Employee, AuditLog
+from importlib import import_module
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from ..models import Employee, EmployeeSession
+from .audit_service import AuditService
 
 
 class EmployeeService:
@@ -19,7 +24,7 @@ class EmployeeService:
             employee = Employee.objects.get(username=username, is_active=True)
             if employee.check_password(password):
                 # Log successful login
-                AuditLog.objects.create(
+                AuditService.log(
                     employee=employee,
                     action='login',
                     details=f"Employee {username} logged in"
@@ -30,11 +35,46 @@ class EmployeeService:
         return None
     
     @staticmethod
-    def logout(employee_id):
+    def start_session(employee_id, session_key):
+        """Remember a login session so it can be ended later"""
+        # Forget sessions that have expired on their own by now
+        EmployeeSession.objects.filter(
+            created_at__lt=timezone.now() - timedelta(seconds=settings.SESSION_COOKIE_AGE)
+        ).delete()
+        EmployeeSession.objects.update_or_create(
+            session_key=session_key,
+            defaults={'employee_id': employee_id}
+        )
+    
+    @staticmethod
+    def end_sessions(employee_id):
+        """
+        End every active session of an employee
+        
+        Covers the sessions recorded by start_session, and database-backed
+        sessions from before that, which migration 0013 recorded. With
+        another session engine those older sessions last until they expire.
+        
+        Returns:
+            Number of sessions ended
+        """
+        session_keys = list(
+            EmployeeSession.objects.filter(employee_id=employee_id).values_list('session_key', flat=True)
+        )
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        for session_key in session_keys:
+            store.delete(session_key)
+        EmployeeSession.objects.filter(session_key__in=session_keys).delete()
+        return len(session_keys)
+    
+    @staticmethod
+    def logout(employee_id, session_key=None):
         """Log employee logout"""
+        if session_key:
+            EmployeeSession.objects.filter(session_key=session_key).delete()
         try:
             employee = Employee.objects.get(id=employee_id)
-            AuditLog.objects.create(
+            AuditService.log(
                 employee=employee,
                 action='logout',
                 details=f"Employee {employee.username} logged out"
@@ -55,7 +95,7 @@ class EmployeeService:
         employee.save()
         
         # Log employee creation
-        AuditLog.objects.create(
+        AuditService.log(
             employee=employee,
             action='employee_created',
             details=f"New employee {username} created"
@@ -67,6 +107,7 @@ class EmployeeService:
     def update_employee(employee_id, **kwargs):
         """Update employee information"""
         employee = Employee.objects.get(id=employee_id)
+        position, is_active = employee.position, employee.is_active
         
         if 'password' in kwargs:
             employee.set_password(kwargs.pop('password'))
@@ -77,8 +118,12 @@ class EmployeeService:
         
         employee.save()
         
+        # Sessions carry the role, so they must not outlive a role change
+        if employee.position != position or (is_active and not employee.is_active):
+            EmployeeService.end_sessions(employee.id)
+        
         # Log employee update
-        AuditLog.objects.create(
+        AuditService.log(
             employee=employee,
             action='employee_updated',
             details=f"Employee {employee.username} updated"
@@ -92,9 +137,10 @@ class EmployeeService:
         employee = Employee.objects.get(id=employee_id)
         employee.is_active = False
         employee.save()
+        EmployeeService.end_sessions(employee.id)
         
         # Log employee deletion
-        AuditLog.objects.create(
+        AuditService.log(
             employee=employee,
             action='employee_deleted',
             details=f"Employee {employee.username} deactivated"
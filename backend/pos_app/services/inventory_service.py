@@ -1,12 +1,27 @@
 """
 Inventory Service - Business logic for inventory operations
 """
-from ..models import Item
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Max, Q, When
+from django.utils import timezone
+from ..models import Item, ItemTombstone
+from .catalog_cache import CatalogCache
+from .change_bus import ChangeBus
+from .search_index import ItemSearchIndex
 
 
 class InventoryService:
     """Service class for handling inventory operations"""
     
+    _catalog = CatalogCache()
+    _search_index = ItemSearchIndex()
+    _change_bus = ChangeBus()
+    
+    CHANGE_FIELDS = ('id', 'legacy_item_id', 'name', 'price', 'quantity', 'updated_at')
+    STREAM_FIELDS = ('id', 'legacy_item_id', 'name', 'price', 'quantity')
+    
     @staticmethod
     def get_all_items():
         """Get all items in inventory"""
@@ -14,22 +29,274 @@ class InventoryService:
     
     @staticmethod
     def get_item_by_id(item_id):
-        """Get item by ID"""
-        return Item.objects.get(id=item_id)
+        """Get item by ID (served from the catalog cache)"""
+        entry = InventoryService._catalog.get(int(item_id))
+        if entry is None:
+            raise Item.DoesNotExist("Item matching query does not exist.")
+        return entry.to_item()
     
     @staticmethod
     def get_item_by_legacy_id(legacy_item_id):
-        """Get item by legacy item ID"""
-        return Item.objects.get(legacy_item_id=legacy_item_id)
+        """Get item by legacy item ID (served from the catalog cache)"""
+        entry = InventoryService._catalog.get_by_legacy_id(legacy_item_id)
+        if entry is None:
+            raise Item.DoesNotExist("Item matching query does not exist.")
+        return entry.to_item()
     
     @staticmethod
-    def search_items(query):
-        """Search items by name or legacy ID"""
-        return Item.objects.filter(
-            name__icontains=query
-        ) | Item.objects.filter(
-            legacy_item_id__icontains=query
-        )
+    def lookup_items(codes):
+        """
+        Resolve scanned or keyed legacy item IDs from the warm catalog
+        
+        The first call loads the whole catalog into this worker; after that
+        a lookup is a dictionary access and unknown codes need no query.
+        
+        Args:
+            codes: List of legacy item IDs (ints or digit strings)
+        
+        Returns:
+            Tuple of (dict mapping each found code to its CatalogEntry,
+                      list of codes that matched no item)
+        """
+        catalog = InventoryService._catalog
+        if not catalog.is_warm:
+            catalog.warm()
+        
+        numeric = {}
+        for code in codes:
+            code = str(code).strip()
+            if code.isdigit():
+                numeric[code] = int(code)
+        entries = catalog.get_many_by_legacy_ids(list(numeric.values()))
+        
+        found = {}
+        missing = []
+        for code in codes:
+            entry = entries.get(numeric.get(str(code).strip()))
+            if entry is None:
+                missing.append(code)
+            else:
+                found[code] = entry
+        return found, missing
+    
+    @staticmethod
+    def get_catalog_entries(item_ids):
+        """
+        Get cached price/name snapshots for several items
+        
+        Returns:
+            Dict mapping item ID to CatalogEntry (unknown IDs are left out)
+        """
+        return InventoryService._catalog.get_many(item_ids)
+    
+    @staticmethod
+    def invalidate_catalog(item_ids):
+        """Drop items from the catalog cache after they changed"""
+        InventoryService._catalog.invalidate(item_ids)
+    
+    @staticmethod
+    def clear_catalog_cache():
+        """Drop every item from the catalog cache"""
+        InventoryService._catalog.clear()
+    
+    @staticmethod
+    def catalog_stats():
+        """Get hit/miss statistics of the catalog cache"""
+        return InventoryService._catalog.stats()
+    
+    @staticmethod
+    def search_items(query, limit=50):
+        """
+        Search items by name or legacy ID prefix using the in-memory index
+        
+        Args:
+            query: Search text
+            limit: Maximum number of items returned
+        
+        Returns:
+            List of Item objects, best match first
+        """
+        item_ids = InventoryService._search_index.search(query, limit)
+        entries = InventoryService._catalog.get_many(item_ids)
+        return [entries[item_id].to_item() for item_id in item_ids if item_id in entries]
+    
+    @staticmethod
+    def index_item(item):
+        """Add or update an item in the search index"""
+        InventoryService._search_index.add(item.pk, item.legacy_item_id, item.name)
+    
+    @staticmethod
+    def unindex_item(item_id):
+        """Remove an item from the search index"""
+        InventoryService._search_index.remove(item_id)
+    
+    @staticmethod
+    def clear_search_index():
+        """Drop the search index; it is rebuilt on the next search"""
+        InventoryService._search_index.clear()
+    
+    @staticmethod
+    def search_stats():
+        """Get size counters of the search index"""
+        return InventoryService._search_index.stats()
+    
+    @staticmethod
+    def get_changes(items_after=None, tombstones_after=None, limit=1000):
+        """
+        Get items created, modified or deleted after a sync position
+        
+        Both streams are read in (timestamp, id) order with a range scan on
+        their (timestamp, id) index. Rows younger than
+        ITEM_CHANGES_SETTLE_SECONDS are left for the next poll, so a
+        concurrent transaction that commits late cannot slip behind the
+        returned position.
+        
+        Args:
+            items_after: (updated_at, id) of the last item change already
+                seen, or None to start a full sync
+            tombstones_after: (deleted_at, id) of the last deletion already
+                seen, or None to start from the current end
+            limit: Maximum number of rows read from each stream
+        
+        Returns:
+            Dict with 'items' (value dicts of CHANGE_FIELDS), 'deleted'
+            (tombstone value dicts), the new 'items_after' and
+            'tombstones_after' positions and 'has_more'
+        """
+        cutoff = timezone.now() - timedelta(seconds=settings.ITEM_CHANGES_SETTLE_SECONDS)
+        
+        items = Item.objects.filter(updated_at__lte=cutoff)
+        if items_after is not None:
+            items = items.filter(
+                Q(updated_at__gt=items_after[0]) | Q(updated_at=items_after[0], id__gt=items_after[1])
+            )
+        items = list(items.order_by('updated_at', 'id').values(*InventoryService.CHANGE_FIELDS)[:limit + 1])
+        
+        tombstones = ItemTombstone.objects.filter(deleted_at__lte=cutoff)
+        if tombstones_after is None:
+            # A full sync has nothing to delete; start from the cutoff
+            tombstones = []
+        else:
+            tombstones = list(tombstones.filter(
+                Q(deleted_at__gt=tombstones_after[0]) |
+                Q(deleted_at=tombstones_after[0], id__gt=tombstones_after[1])
+            ).order_by('deleted_at', 'id').values('id', 'item_id', 'legacy_item_id', 'deleted_at')[:limit + 1])
+        
+        truncated = len(tombstones) > limit
+        has_more = len(items) > limit or truncated
+        items, tombstones = items[:limit], tombstones[:limit]
+        if items:
+            items_after = (items[-1]['updated_at'], items[-1]['id'])
+        if tombstones:
+            tombstones_after = (tombstones[-1]['deleted_at'], tombstones[-1]['id'])
+        if not truncated and (tombstones_after is None or tombstones_after[0] < cutoff):
+            # Every deletion up to the cutoff has been read; move the position
+            # there so it keeps ageing with the polls rather than with the
+            # last deletion, and does not expire while nothing is deleted
+            tombstones_after = (cutoff, 0)
+        
+        return {
+            'items': items,
+            'deleted': tombstones,
+            'items_after': items_after,
+            'tombstones_after': tombstones_after,
+            'has_more': has_more,
+        }
+    
+    @staticmethod
+    def catalog_version():
+        """
+        Get a value that changes whenever an item is written or deleted
+        
+        Read from the database, so writes from any process count: other
+        workers, the admin and scripts alike. Every write sets updated_at
+        (the newest is read from the (updated_at, id) index); deletions
+        change the item count and the newest tombstone. Within
+        ITEM_CHANGES_SETTLE_SECONDS of the newest write the current time
+        is used instead, since a transaction committing late with an older
+        updated_at would not move the newest one.
+        
+        Returns:
+            Version string
+        """
+        items = Item.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
+        deleted = ItemTombstone.objects.aggregate(last=Max('id'))['last']
+        updated = items['updated']
+        now = timezone.now()
+        if updated is not None and updated > now - timedelta(seconds=settings.ITEM_CHANGES_SETTLE_SECONDS):
+            updated = now
+        stamp = int(updated.timestamp() * 1000000) if updated is not None else 0
+        return f"{stamp}-{items['count']}-{deleted or 0}"
+    
+    @staticmethod
+    def is_change_position_expired(tombstones_after):
+        """Whether deletions after this position may already have been pruned"""
+        retention = timedelta(days=settings.ITEM_TOMBSTONE_RETENTION_DAYS)
+        return tombstones_after is not None and tombstones_after[0] < timezone.now() - retention
+    
+    @staticmethod
+    def prune_tombstones():
+        """
+        Delete tombstones older than ITEM_TOMBSTONE_RETENTION_DAYS
+        
+        Returns:
+            Number of tombstones deleted
+        """
+        retention = timedelta(days=settings.ITEM_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = ItemTombstone.objects.filter(deleted_at__lt=timezone.now() - retention).delete()
+        return deleted
+    
+    @staticmethod
+    def publish_item_changes(item_ids):
+        """
+        Push the committed price and stock of items to change stream clients
+        
+        Reads the rows only when a stream in this process is listening.
+        Call after commit.
+        """
+        bus = InventoryService._change_bus
+        if not item_ids or not bus.has_subscribers:
+            return
+        rows = Item.objects.filter(id__in=item_ids).order_by('id').values(*InventoryService.STREAM_FIELDS)
+        bus.publish(('item', dict(row, price=str(row['price']))) for row in rows)
+    
+    @staticmethod
+    def publish_item_deleted(item_id):
+        """Tell change stream clients an item is gone. Call after commit."""
+        InventoryService._change_bus.publish([('delete', {'id': item_id})])
+    
+    @staticmethod
+    def subscribe_changes(last_event_id=None):
+        """
+        Start listening to item changes committed in this process
+        
+        Args:
+            last_event_id: Id of the last event the client saw, to replay what it missed
+        
+        Returns:
+            Tuple of (ChangeSubscription, whether the client resumed without a gap)
+        """
+        return InventoryService._change_bus.subscribe(last_event_id)
+    
+    @staticmethod
+    def unsubscribe_changes(subscription):
+        """Stop listening to item changes"""
+        InventoryService._change_bus.unsubscribe(subscription)
+    
+    @staticmethod
+    def change_position():
+        """Id of the latest change event in this process"""
+        return InventoryService._change_bus.position
+    
+    @staticmethod
+    def record_change_overflow():
+        """Count a change stream client that fell behind"""
+        InventoryService._change_bus.record_overflow()
+    
+    @staticmethod
+    def change_stream_stats():
+        """Get subscriber and event counters of the change bus"""
+        return InventoryService._change_bus.stats()
     
     @staticmethod
     def update_item_quantity(item_id, new_quantity):
@@ -44,4 +311,91 @@ class InventoryService:
         """Check if item is available in requested quantity"""
         item = Item.objects.get(id=item_id)
         return item.is_available(requested_quantity)
-
+    
+    
+    @staticmethod
+    def decrement_stock(quantities):
+        """
+        Take stock for several items without a read-modify-write cycle
+        
+        Each row is only decremented if it still holds enough units
+        (UPDATE ... SET quantity = quantity - n WHERE quantity >= n), so two
+        registers selling the last unit can never both succeed. The batch is
+        all-or-nothing: if any line is short, no quantity is changed.
+        
+        Args:
+            quantities: Dict mapping item ID to the number of units to take
+        
+        Returns:
+            Dict mapping item ID to True if that line could be fulfilled
+        """
+        if not quantities:
+            return {}
+        
+        with transaction.atomic():
+            updated = Item.objects.filter(
+                id__in=quantities,
+                quantity__gte=InventoryService._per_item(quantities)
+            ).update(
+                quantity=F('quantity') - InventoryService._per_item(quantities),
+                updated_at=timezone.now()
+            )
+            if updated == len(quantities):
+                InventoryService._adjust_catalog_on_commit(quantities, -1)
+                return {item_id: True for item_id in quantities}
+            transaction.set_rollback(True)
+        
+        # Some line is short: retry line by line to find out which ones,
+        # keeping the result only if every line succeeds this time
+        results = {}
+        with transaction.atomic():
+            for item_id, amount in quantities.items():
+                results[item_id] = bool(Item.objects.filter(
+                    id=item_id,
+                    quantity__gte=amount
+                ).update(quantity=F('quantity') - amount, updated_at=timezone.now()))
+            if not all(results.values()):
+                transaction.set_rollback(True)
+            else:
+                InventoryService._adjust_catalog_on_commit(quantities, -1)
+        return results
+    
+    @staticmethod
+    def increment_stock(quantities):
+        """
+        Return stock for several items in a single UPDATE
+        
+        Args:
+            quantities: Dict mapping item ID to the number of units to add back
+        
+        Returns:
+            Number of item rows updated
+        """
+        if not quantities:
+            return 0
+        
+        updated = Item.objects.filter(id__in=quantities).update(
+            quantity=F('quantity') + InventoryService._per_item(quantities),
+            updated_at=timezone.now()
+        )
+        InventoryService._adjust_catalog_on_commit(quantities, 1)
+        return updated
+    
+    @staticmethod
+    def _adjust_catalog_on_commit(quantities, sign):
+        """Move cached quantity hints and notify streams once the stock change is committed"""
+        deltas = {item_id: sign * amount for item_id, amount in quantities.items()}
+        
+        def adjust():
+            InventoryService._catalog.adjust_quantities(deltas)
+            InventoryService.publish_item_changes(list(deltas))
+        
+        transaction.on_commit(adjust)
+    
+    @staticmethod
+    def _per_item(quantities):
+        """Build a CASE expression selecting each item's amount by ID"""
+        return Case(
+            *[When(id=item_id, then=amount) for item_id, amount in quantities.items()],
+            output_field=IntegerField()
+        )
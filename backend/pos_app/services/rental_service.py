@@ -2,42 +2,272 @@
 Rental Service - Business logic for rental operations
 """
 from datetime import date
-from ..models import Rental, Customer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from ..caching import TTLCache
+from ..models import CustomerActivity, Rental, Transaction
 
 
 class RentalService:
     """Service class for handling rental operations"""
     
+    # Phone number -> customer ID, so rental lookups can skip the join
+    _customer_ids = TTLCache(max_size=settings.CUSTOMER_ID_CACHE_SIZE, ttl=settings.CUSTOMER_ID_CACHE_TTL)
+    
+    @staticmethod
+    def customer_filter(customer_phone):
+        """
+        Filter kwargs selecting a customer's rows by phone number in the same query
+        
+        Uses the cached customer ID when known, otherwise a join on the
+        customer's unique phone number. An unknown phone simply matches nothing.
+        """
+        customer_id = RentalService._customer_ids.get(customer_phone)
+        if customer_id is not None:
+            return {'customer_id': customer_id}
+        return {'customer__phone_number': customer_phone}
+    
+    @staticmethod
+    def remember_customer(customer_phone, customer_id):
+        """Cache the customer ID of a phone number"""
+        RentalService._customer_ids.set(customer_phone, customer_id)
+    
+    @staticmethod
+    def invalidate_customer_ids():
+        """Forget cached customer IDs after a customer changed or was deleted"""
+        RentalService._customer_ids.clear()
+    
+    @staticmethod
+    def customer_id_cache_stats():
+        """Get hit/miss statistics of the phone number cache"""
+        return RentalService._customer_ids.stats()
+    
     @staticmethod
     def get_customer_rentals(customer_phone):
-        """Get all rentals for a customer"""
-        customer = Customer.objects.get(phone_number=customer_phone)
-        return Rental.objects.filter(customer=customer).order_by('-rental_date')
+        """Get all rentals for a customer (empty for unknown customers)"""
+        return Rental.objects.filter(**RentalService.customer_filter(customer_phone)).order_by('-rental_date')
     
     @staticmethod
     def get_active_rentals(customer_phone):
-        """Get active (unreturned) rentals for a customer"""
-        customer = Customer.objects.get(phone_number=customer_phone)
-        return Rental.objects.filter(customer=customer, is_returned=False)
+        """Get active (unreturned) rentals for a customer, annotated with their overdue status"""
+        return Rental.objects.filter(
+            is_returned=False,
+            **RentalService.customer_filter(customer_phone)
+        ).with_overdue()
     
     @staticmethod
     def get_overdue_rentals(customer_phone=None):
-        """Get overdue rentals, optionally filtered by customer"""
-        query = Rental.objects.filter(
-            is_returned=False,
-            due_date__lt=date.today()
-        )
+        """Get overdue rentals, optionally filtered by customer, with days overdue computed in SQL"""
+        today = date.today()
+        query = Rental.objects.overdue(today).with_overdue(today)
         
         if customer_phone:
-            customer = Customer.objects.get(phone_number=customer_phone)
-            query = query.filter(customer=customer)
+            query = query.filter(**RentalService.customer_filter(customer_phone))
         
         return query.order_by('due_date')
     
+    @staticmethod
+    def iter_outstanding_rentals(customer_phones, chunk_size=None):
+        """
+        Outstanding rentals of many customers, grouped by customer
+        
+        Phones are resolved chunk_size at a time with one query per chunk
+        (customer__phone_number IN (...), read through the open-rental
+        partial index), so the cost grows with the number of chunks rather
+        than the number of customers, and only one chunk is held at a time.
+        
+        Args:
+            customer_phones: Iterable of phone numbers; repeats are skipped
+            chunk_size: Phones per query (defaults to BULK_RENTAL_LOOKUP_CHUNK_SIZE)
+        
+        Yields:
+            Tuples of (phone number, list of rental value dicts) for the
+            customers holding something, in input order
+        """
+        chunk_size = chunk_size or settings.BULK_RENTAL_LOOKUP_CHUNK_SIZE
+        seen = set()
+        chunk = []
+        for phone in customer_phones:
+            if phone in seen:
+                continue
+            seen.add(phone)
+            chunk.append(phone)
+            if len(chunk) == chunk_size:
+                yield from RentalService._outstanding_rentals_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from RentalService._outstanding_rentals_chunk(chunk)
+    
+    @staticmethod
+    def _outstanding_rentals_chunk(customer_phones):
+        rows = Rental.objects.filter(
+            is_returned=False,
+            customer__phone_number__in=customer_phones
+        ).with_overdue().order_by('customer_id', 'due_date', 'id').values(
+            'id', 'transaction_id', 'item_id', 'quantity', 'returned_quantity',
+            'rental_date', 'due_date', 'current_days_overdue', 'currently_overdue',
+            customer_phone=F('customer__phone_number'),
+            item_name=F('item__name'),
+        )
+        grouped = {}
+        for row in rows:
+            # Same names as RentalSerializer
+            row['days_overdue'] = row.pop('current_days_overdue')
+            row['is_overdue'] = row.pop('currently_overdue')
+            grouped.setdefault(row.pop('customer_phone'), []).append(row)
+        for phone in customer_phones:
+            if phone in grouped:
+                yield phone, grouped[phone]
+    
+    @staticmethod
+    def get_customer_activity(customer_phone):
+        """
+        Get the rental activity summary of a customer
+        
+        A single primary key read once the customer ID is cached (one
+        join on the phone number before that).
+        
+        Returns:
+            CustomerActivity, or None if the customer never rented anything
+        """
+        activities = list(CustomerActivity.objects.filter(**RentalService.customer_filter(customer_phone))[:1])
+        if not activities:
+            return None
+        RentalService.remember_customer(customer_phone, activities[0].customer_id)
+        return activities[0]
+    
     @staticmethod
     def check_customer_has_outstanding_returns(customer_phone):
-        """Check if customer has outstanding (unreturned) rentals"""
-        return RentalService.get_active_rentals(customer_phone).exists()
+        """Check if customer has outstanding (unreturned) rentals, from the activity summary"""
+        activity = RentalService.get_customer_activity(customer_phone)
+        return activity is not None and activity.open_rentals > 0
+    
+    @staticmethod
+    def record_rentals(customer_id, rentals, units, due_date):
+        """
+        Add new rentals to a customer's activity summary
+        
+        Called inside the transaction creating the rentals; the counters
+        are moved with F() expressions, so concurrent checkouts add up.
+        
+        Args:
+            customer_id: Customer the rentals belong to
+            rentals: Number of rental lines created
+            units: Number of units rented
+            due_date: Due date of the new rentals
+        """
+        changes = {
+            'open_rentals': F('open_rentals') + rentals,
+            'held_units': F('held_units') + units,
+            'lifetime_rentals': F('lifetime_rentals') + rentals,
+            # Every open rental was due no later than a new one
+            'earliest_due_date': Coalesce(F('earliest_due_date'), Value(due_date)),
+            'last_activity': timezone.now(),
+        }
+        if CustomerActivity.objects.filter(customer_id=customer_id).update(**changes):
+            return
+        # First rental since the summaries were built: derive the row from the rentals already written
+        RentalService.rebuild_customer_activity(customer_ids=[customer_id])
+    
+    @staticmethod
+    def refresh_customer_activity(customer_id):
+        """
+        Recompute a customer's open-rental counters after a return
+        
+        One aggregate over the customer's open rentals (served by the
+        open-rental partial index) and one UPDATE, in the caller's transaction.
+        """
+        today = date.today()
+        summary = Rental.objects.filter(customer_id=customer_id, is_returned=False).aggregate(
+            open_rentals=Count('id'),
+            held_units=Coalesce(Sum(F('quantity') - F('returned_quantity')), 0),
+            overdue_rentals=Count('id', filter=Q(due_date__lt=today)),
+            earliest_due_date=Min('due_date'),
+        )
+        if not CustomerActivity.objects.filter(customer_id=customer_id).update(
+            last_activity=timezone.now(), **summary
+        ):
+            RentalService.rebuild_customer_activity(customer_ids=[customer_id])
+    
+    @staticmethod
+    @transaction.atomic
+    def rebuild_customer_activity(customer_ids=None):
+        """
+        Rebuild activity summaries from the rentals table
+        
+        Args:
+            customer_ids: Optional list of customers to rebuild; defaults to everyone
+        
+        Returns:
+            Number of summaries written
+        """
+        today = date.today()
+        rentals = Rental.objects.order_by()
+        summaries = CustomerActivity.objects.all()
+        if customer_ids is not None:
+            rentals = rentals.filter(customer_id__in=customer_ids)
+            summaries = summaries.filter(customer_id__in=customer_ids)
+        
+        open_rental = Q(is_returned=False)
+        last_transaction = Transaction.objects.filter(
+            customer_id=OuterRef('customer_id')
+        ).order_by('-created_at').values('created_at')[:1]
+        rows = rentals.values('customer_id').annotate(
+            open_rentals=Count('id', filter=open_rental),
+            held_units=Coalesce(Sum(F('quantity') - F('returned_quantity'), filter=open_rental), 0),
+            overdue_rentals=Count('id', filter=open_rental & Q(due_date__lt=today)),
+            earliest_due_date=Min('due_date', filter=open_rental),
+            lifetime_rentals=Count('id'),
+            last_activity=Subquery(last_transaction),
+        ).iterator(chunk_size=2000)
+        
+        summaries.delete()
+        written = 0
+        batch = []
+        for row in rows:
+            batch.append(CustomerActivity(**row))
+            if len(batch) == 1000:
+                CustomerActivity.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        CustomerActivity.objects.bulk_create(batch)
+        return written + len(batch)
+    
+    @staticmethod
+    def refresh_overdue_counts(today=None):
+        """
+        Recount overdue rentals in the activity summaries with one UPDATE
+        
+        Only summaries with an open rental past due, or a stale non-zero
+        count, are touched. Run nightly with refresh_days_overdue.
+        
+        Returns:
+            Number of summaries updated
+        """
+        today = today or date.today()
+        overdue = Rental.objects.overdue(today).filter(
+            customer_id=OuterRef('customer_id')
+        ).order_by().values('customer_id').annotate(count=Count('id')).values('count')
+        return CustomerActivity.objects.filter(
+            Q(earliest_due_date__lt=today) | Q(overdue_rentals__gt=0)
+        ).update(overdue_rentals=Coalesce(Subquery(overdue, output_field=IntegerField()), 0))
+    
+    @staticmethod
+    def refresh_days_overdue(today=None):
+        """
+        Recompute the stored days_overdue of open rentals with one UPDATE
+        
+        Run nightly (refresh_rental_overdue command, which also calls
+        refresh_overdue_counts); reads that need an exact figure use
+        Rental.objects.with_overdue() instead.
+        
+        Returns:
+            Number of rentals updated
+        """
+        return Rental.objects.refresh_days_overdue(today)
     
     @staticmethod
     def get_rental_by_id(rental_id):
@@ -0,0 +1,511 @@
+"""
+Reporting Service - Daily rollups of transactions and the reports read from them
+"""
+import hashlib
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, CharField, Count, DecimalField, ExpressionWrapper, F, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from ..caching import SingleFlight
+from ..models import (
+    DailyEmployeeTotal, DailyItemTotal, DailyTransactionTotal, Item, Rental, Transaction, TransactionItem
+)
+from .inventory_service import InventoryService
+
+
+class ReportingService:
+    """
+    Service class for report rollups
+    
+    Every transaction is added to three rollups once it commits: per day
+    and transaction type, per day and employee, and per day, transaction
+    type and item. Reports sum at most one row per day and key, so their
+    cost depends on the length of the period, not on how busy it was.
+    
+    The rollups are written in their own short transaction after the
+    checkout commits, so checkouts never wait on each other for the hot
+    (day, type) row. If a process dies between the two, rebuild_rollups
+    (the backfill_report_rollups command) recomputes the affected days.
+    """
+    
+    BATCH_SIZE = 1000
+    LOW_STOCK_THRESHOLD = 10
+    
+    # Columns of the rows streamed by the *_rows methods
+    SALES_COLUMNS = ['Date', 'Transaction ID', 'Employee', 'Total Amount']
+    RENTAL_COLUMNS = [
+        'Rental Date', 'Item', 'Customer', 'Quantity', 'Returned Quantity', 'Due Date', 'Returned', 'Return Date'
+    ]
+    INVENTORY_COLUMNS = ['Item ID', 'Name', 'Price', 'Quantity', 'Total Value', 'Status']
+    EMPLOYEE_COLUMNS = ['Employee', 'Username', 'Transactions', 'Total Revenue', 'Avg Transaction']
+    
+    REPORTS = ('sales', 'rentals', 'employees', 'inventory')
+    _report_flights = SingleFlight()
+    _report_counters = {'hits': 0, 'misses': 0}
+    _report_counters_lock = threading.Lock()
+    
+    @staticmethod
+    def record_transaction(transaction_obj, line_items):
+        """
+        Add a transaction to the rollups once the current transaction commits
+        
+        Args:
+            transaction_obj: The Transaction just created
+            line_items: List of dicts with 'item_id', 'quantity' and 'subtotal'
+        """
+        day = timezone.localdate(transaction_obj.created_at)
+        transaction_type = transaction_obj.transaction_type
+        employee_id = transaction_obj.employee_id
+        amount = transaction_obj.total_amount
+        
+        items = {}
+        for line in line_items:
+            totals = items.setdefault(line['item_id'], {'quantity': 0, 'revenue': Decimal('0.00')})
+            totals['quantity'] += line['quantity']
+            totals['revenue'] += Decimal(line['subtotal'])
+        
+        def apply():
+            with transaction.atomic():
+                ReportingService._add(
+                    DailyTransactionTotal, {'day': day}, 'transaction_type',
+                    {transaction_type: {'transaction_count': 1, 'total_amount': amount}}
+                )
+                ReportingService._add(
+                    DailyEmployeeTotal, {'day': day}, 'employee_id',
+                    {employee_id: {'transaction_count': 1, 'total_amount': amount}}
+                )
+                if items:
+                    ReportingService._add(
+                        DailyItemTotal, {'day': day, 'transaction_type': transaction_type}, 'item_id', items
+                    )
+        
+        transaction.on_commit(apply)
+    
+    @staticmethod
+    @transaction.atomic
+    def rebuild_rollups(start_date=None, end_date=None):
+        """
+        Recompute the rollups of a range of days from the transactions
+        
+        Args:
+            start_date: First day to rebuild (defaults to the first transaction)
+            end_date: Last day to rebuild, inclusive (defaults to today)
+        
+        Returns:
+            Number of days rebuilt
+        """
+        if start_date is None:
+            first = Transaction.objects.aggregate(first=Min('created_at'))['first']
+            start_date = timezone.localdate(first) if first else timezone.localdate()
+        if end_date is None:
+            end_date = timezone.localdate()
+        start, end = ReportingService.day_bounds(start_date, end_date)
+        
+        for model in (DailyTransactionTotal, DailyEmployeeTotal, DailyItemTotal):
+            model.objects.filter(day__gte=start_date, day__lte=end_date).delete()
+        
+        transactions = Transaction.objects.filter(created_at__gte=start, created_at__lt=end).order_by()
+        ReportingService._bulk_create(DailyTransactionTotal, transactions.values(
+            'transaction_type', day=TruncDate('created_at')
+        ).annotate(transaction_count=Count('id'), total_amount=Sum('total_amount')))
+        ReportingService._bulk_create(DailyEmployeeTotal, transactions.values(
+            'employee_id', day=TruncDate('created_at')
+        ).annotate(transaction_count=Count('id'), total_amount=Sum('total_amount')))
+        ReportingService._bulk_create(DailyItemTotal, TransactionItem.objects.filter(
+            transaction__created_at__gte=start, transaction__created_at__lt=end
+        ).order_by().values(
+            'item_id',
+            day=TruncDate('transaction__created_at'),
+            transaction_type=F('transaction__transaction_type')
+        ).annotate(quantity=Sum('quantity'), revenue=Sum('subtotal')))
+        
+        return (end_date - start_date).days + 1
+    
+    @staticmethod
+    def day_bounds(start_date, end_date):
+        """
+        Half-open datetime range [start, end) covering whole local days
+        
+        Comparing created_at against bounds (rather than created_at__date)
+        lets the database use the created_at indexes.
+        """
+        start = timezone.make_aware(datetime.combine(start_date, time.min))
+        end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+        return start, end
+    
+    @staticmethod
+    def get_report(name, start_date, end_date):
+        """
+        Get a report's aggregates, from the cache when the data is unchanged
+        
+        Results are cached in the Django cache under (report, period, data
+        version) for REPORT_CACHE_TTL seconds. A transaction landing in the
+        period changes the version, so the next request recomputes the
+        report. Requests for the same report arriving while it is computed
+        wait for that computation instead of starting their own.
+        
+        Args:
+            name: One of REPORTS
+            start_date: First day of the period
+            end_date: Last day of the period, inclusive
+        
+        Returns:
+            Dict of report data
+        """
+        version = ReportingService.data_version(name, start_date, end_date)
+        key = 'pos:report:' + hashlib.sha1(repr((name, start_date, end_date, version)).encode()).hexdigest()
+        data = cache.get(key)
+        with ReportingService._report_counters_lock:
+            ReportingService._report_counters['hits' if data is not None else 'misses'] += 1
+        if data is not None:
+            return data
+        
+        def compute():
+            # Another worker may have stored it while this one waited
+            data = cache.get(key)
+            if data is None:
+                data = ReportingService.build_report(name, start_date, end_date)
+                cache.set(key, data, settings.REPORT_CACHE_TTL)
+            return data
+        
+        return ReportingService._report_flights.do(key, compute)
+    
+    @staticmethod
+    def data_version(name, start_date, end_date):
+        """
+        Get a value that changes whenever the data behind a report changes
+        
+        Always read from the database, so a report cached by one worker is
+        not served after another worker, the admin or a script changed its
+        data. Transaction reports use the rollup totals of the period (one
+        small aggregate over at most one row per day and type) and the
+        newest rollup row, which moves when a backfill rebuilds the period;
+        the rental report also counts returns made since the period
+        started, which close its rentals, and the current date, which makes
+        them overdue. The inventory report uses the catalog version.
+        """
+        if name == 'inventory':
+            return InventoryService.catalog_version()
+        totals = DailyTransactionTotal.objects.filter(day__gte=start_date).aggregate(
+            count=Sum('transaction_count', filter=Q(day__lte=end_date)),
+            amount=Sum('total_amount', filter=Q(day__lte=end_date)),
+            rebuilt=Max('id'),
+            returns=Sum('transaction_count', filter=Q(transaction_type='Return'))
+        )
+        if name == 'rentals':
+            return totals['count'], totals['amount'], totals['rebuilt'], totals['returns'], timezone.localdate()
+        return totals['count'], totals['amount'], totals['rebuilt']
+    
+    @staticmethod
+    def build_report(name, start_date, end_date):
+        """Compute a report's aggregates (uncached)"""
+        if name == 'sales':
+            return {
+                'summary': ReportingService.sales_summary(start_date, end_date),
+                'top_items': ReportingService.top_items(start_date, end_date),
+                'daily': ReportingService.daily_totals(start_date, end_date),
+            }
+        if name == 'rentals':
+            return {
+                'summary': ReportingService.sales_summary(start_date, end_date, transaction_type='Rental'),
+                'units': ReportingService.rental_summary(start_date, end_date),
+                'top_items': ReportingService.top_rented_items(start_date, end_date),
+                'daily': ReportingService.daily_totals(start_date, end_date, transaction_type='Rental'),
+            }
+        if name == 'employees':
+            return {'employees': ReportingService.employee_performance(start_date, end_date)}
+        if name == 'inventory':
+            return {
+                'summary': ReportingService.inventory_summary(),
+                'low_stock': ReportingService.low_stock_items(),
+            }
+        raise ValueError(f"Unknown report '{name}'")
+    
+    @staticmethod
+    def report_rows(name, start_date, end_date):
+        """
+        Get the CSV columns and streamed detail rows of a report
+        
+        Returns:
+            Tuple of (column names, iterable of rows)
+        """
+        if name == 'sales':
+            return ReportingService.SALES_COLUMNS, ReportingService.sales_rows(start_date, end_date)
+        if name == 'rentals':
+            return ReportingService.RENTAL_COLUMNS, ReportingService.rental_rows(start_date, end_date)
+        if name == 'employees':
+            return ReportingService.EMPLOYEE_COLUMNS, ReportingService.employee_rows(start_date, end_date)
+        if name == 'inventory':
+            return ReportingService.INVENTORY_COLUMNS, ReportingService.inventory_rows()
+        raise ValueError(f"Unknown report '{name}'")
+    
+    @staticmethod
+    def report_cache_stats():
+        """Get report cache hits/misses and single-flight counters"""
+        with ReportingService._report_counters_lock:
+            counters = dict(ReportingService._report_counters)
+        lookups = counters['hits'] + counters['misses']
+        return dict(
+            counters,
+            hit_ratio=counters['hits'] / lookups if lookups else 0.0,
+            **ReportingService._report_flights.stats()
+        )
+    
+    @staticmethod
+    def sales_summary(start_date, end_date, transaction_type='Sale'):
+        """
+        Get the total, count and average of transactions in a period
+        
+        Returns:
+            Dict with 'total', 'count' and 'avg' (None without transactions)
+        """
+        totals = DailyTransactionTotal.objects.filter(
+            day__gte=start_date, day__lte=end_date, transaction_type=transaction_type
+        ).aggregate(total=Sum('total_amount'), count=Sum('transaction_count'))
+        count = totals['count'] or 0
+        return {
+            'total': totals['total'],
+            'count': count,
+            'avg': totals['total'] / count if count else None,
+        }
+    
+    @staticmethod
+    def daily_totals(start_date, end_date, transaction_type='Sale'):
+        """Get (day, transaction count, total amount) for each day with transactions"""
+        return list(DailyTransactionTotal.objects.filter(
+            day__gte=start_date, day__lte=end_date, transaction_type=transaction_type
+        ).order_by('day').values('day', 'transaction_count', 'total_amount'))
+    
+    @staticmethod
+    def top_items(start_date, end_date, transaction_type='Sale', limit=10):
+        """
+        Get the items with the most units in a period
+        
+        Returns:
+            List of dicts with 'item_id', 'item__name', 'total_quantity' and 'total_revenue'
+        """
+        return list(DailyItemTotal.objects.filter(
+            day__gte=start_date, day__lte=end_date, transaction_type=transaction_type
+        ).values('item_id', 'item__name').annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum('revenue')
+        ).order_by('-total_quantity', 'item_id')[:limit])
+    
+    @staticmethod
+    def employee_performance(start_date, end_date):
+        """
+        Get transaction counts and revenue per employee in a period
+        
+        Returns:
+            List of dicts with 'employee_id', 'employee__username',
+            'employee__first_name', 'employee__last_name',
+            'transaction_count', 'total_revenue' and 'avg_transaction',
+            highest revenue first
+        """
+        stats = list(DailyEmployeeTotal.objects.filter(
+            day__gte=start_date, day__lte=end_date
+        ).values(
+            'employee_id', 'employee__username', 'employee__first_name', 'employee__last_name'
+        ).annotate(
+            transaction_count=Sum('transaction_count'),
+            total_revenue=Sum('total_amount')
+        ).order_by('-total_revenue', 'employee_id'))
+        for stat in stats:
+            stat['avg_transaction'] = stat['total_revenue'] / stat['transaction_count']
+        return stats
+    
+    @staticmethod
+    def employee_rows(start_date, end_date):
+        """
+        Rows of the employee performance report
+        
+        Yields:
+            Tuples matching EMPLOYEE_COLUMNS
+        """
+        for stat in ReportingService.employee_performance(start_date, end_date):
+            yield (
+                f"{stat['employee__first_name']} {stat['employee__last_name']}",
+                stat['employee__username'],
+                stat['transaction_count'],
+                stat['total_revenue'],
+                stat['avg_transaction'],
+            )
+    
+    @staticmethod
+    def sales_rows(start_date, end_date):
+        """
+        Stream the sales of a period, oldest first
+        
+        Rows are read in chunks of REPORT_CHUNK_SIZE with the employee
+        joined in, so memory stays flat however long the period is.
+        
+        Yields:
+            Tuples matching SALES_COLUMNS
+        """
+        start, end = ReportingService.day_bounds(start_date, end_date)
+        rows = Transaction.objects.filter(
+            transaction_type='Sale', created_at__gte=start, created_at__lt=end
+        ).order_by('created_at', 'id').annotate(
+            day=TruncDate('created_at')
+        ).values_list('day', 'id', 'employee__username', 'total_amount')
+        return rows.iterator(chunk_size=settings.REPORT_CHUNK_SIZE)
+    
+    @staticmethod
+    def rental_summary(start_date, end_date, today=None):
+        """
+        Count rented, returned, active and overdue units of rentals made in a period
+        
+        Rental records carry a quantity, so units are counted rather than rows.
+        
+        Returns:
+            Dict with 'total', 'active', 'returned' and 'overdue'
+        """
+        today = today or timezone.localdate()
+        counts = Rental.objects.filter(
+            rental_date__gte=start_date, rental_date__lte=end_date
+        ).aggregate(
+            total=Sum('quantity'),
+            returned=Sum('returned_quantity'),
+            overdue=Sum(
+                F('quantity') - F('returned_quantity'),
+                filter=Q(is_returned=False, due_date__lt=today)
+            )
+        )
+        total = counts['total'] or 0
+        returned = counts['returned'] or 0
+        return {
+            'total': total,
+            'active': total - returned,
+            'returned': returned,
+            'overdue': counts['overdue'] or 0,
+        }
+    
+    @staticmethod
+    def top_rented_items(start_date, end_date, limit=10):
+        """Get the items with the most rented units in a period ('item__name', 'count')"""
+        return list(Rental.objects.filter(
+            rental_date__gte=start_date, rental_date__lte=end_date
+        ).values('item_id', 'item__name').annotate(
+            count=Sum('quantity')
+        ).order_by('-count', 'item_id')[:limit])
+    
+    @staticmethod
+    def rental_rows(start_date, end_date):
+        """
+        Stream the rentals made in a period, oldest first
+        
+        Yields:
+            Tuples matching RENTAL_COLUMNS
+        """
+        rows = Rental.objects.filter(
+            rental_date__gte=start_date, rental_date__lte=end_date
+        ).order_by('rental_date', 'id').values_list(
+            'rental_date', 'item__name', 'customer__phone_number', 'quantity',
+            'returned_quantity', 'due_date', 'is_returned', 'return_date'
+        )
+        for rental_date, name, phone, quantity, returned, due_date, is_returned, return_date in rows.iterator(
+            chunk_size=settings.REPORT_CHUNK_SIZE
+        ):
+            yield (
+                rental_date, name, phone or 'N/A', quantity, returned, due_date,
+                'Yes' if is_returned else 'No', return_date or 'N/A'
+            )
+    
+    @staticmethod
+    def inventory_summary():
+        """
+        Get item counts and stock value in one aggregate query
+        
+        Returns:
+            Dict with 'total', 'total_value', 'low_stock' and 'out_of_stock'
+        """
+        totals = Item.objects.aggregate(
+            total=Count('id'),
+            total_value=Sum(
+                ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2))
+            ),
+            low_stock=Count('id', filter=Q(quantity__lt=ReportingService.LOW_STOCK_THRESHOLD)),
+            out_of_stock=Count('id', filter=Q(quantity=0))
+        )
+        totals['total_value'] = (totals['total_value'] or Decimal('0')).quantize(Decimal('0.01'))
+        return totals
+    
+    @staticmethod
+    def low_stock_items(limit=10):
+        """Get items below LOW_STOCK_THRESHOLD ('name', 'quantity'), lowest stock first"""
+        return list(Item.objects.filter(
+            quantity__lt=ReportingService.LOW_STOCK_THRESHOLD
+        ).order_by('quantity', 'id').values('name', 'quantity')[:limit])
+    
+    @staticmethod
+    def inventory_rows():
+        """
+        Stream every item with its stock value and status
+        
+        Yields:
+            Tuples matching INVENTORY_COLUMNS
+        """
+        rows = Item.objects.order_by('id').annotate(
+            status=Case(
+                When(quantity=0, then=Value('Out of Stock')),
+                When(quantity__lt=ReportingService.LOW_STOCK_THRESHOLD, then=Value('Low Stock')),
+                default=Value('In Stock'),
+                output_field=CharField()
+            )
+        ).values_list('legacy_item_id', 'name', 'price', 'quantity', 'status')
+        # The value is multiplied here: computed columns lose their scale on SQLite (970 for 970.00)
+        for legacy_item_id, name, price, quantity, stock_status in rows.iterator(
+            chunk_size=settings.REPORT_CHUNK_SIZE
+        ):
+            yield legacy_item_id, name, price, quantity, price * quantity, stock_status
+    
+    @staticmethod
+    def _add(model, common, key_field, totals):
+        """
+        Add amounts to rollup rows, creating the rows that do not exist yet
+        
+        Args:
+            model: Rollup model
+            common: Field values shared by every row (e.g. the day)
+            key_field: Field telling the rows apart
+            totals: Dict mapping each key to a dict of field -> amount to add
+        """
+        def increments(keys):
+            fields = next(iter(totals.values())).keys()
+            return {
+                field: F(field) + Case(
+                    *[When(**{key_field: key}, then=Value(totals[key][field])) for key in keys],
+                    output_field=model._meta.get_field(field)
+                )
+                for field in fields
+            }
+        
+        rows = model.objects.filter(**common, **{f'{key_field}__in': list(totals)})
+        if rows.update(**increments(list(totals))) == len(totals):
+            return
+        
+        existing = set(rows.values_list(key_field, flat=True))
+        missing = [key for key in totals if key not in existing]
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create([
+                    model(**common, **{key_field: key}, **totals[key]) for key in missing
+                ])
+        except IntegrityError:
+            # Another worker created them meanwhile
+            model.objects.filter(**common, **{f'{key_field}__in': missing}).update(**increments(missing))
+    
+    @staticmethod
+    def _bulk_create(model, rows):
+        batch = []
+        for row in rows.iterator(chunk_size=ReportingService.BATCH_SIZE):
+            batch.append(model(**row))
+            if len(batch) == ReportingService.BATCH_SIZE:
+                model.objects.bulk_create(batch)
+                batch = []
+        model.objects.bulk_create(batch)
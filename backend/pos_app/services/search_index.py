@@ -0,0 +1,249 @@
+"""
+Item Search Index - In-process trigram/prefix index for item search
+"""
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from datetime import timedelta
+from django.conf import settings
+from ..models import Item
+
+
+def trigrams(text):
+    """Return the set of 3-character substrings of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ItemSearchIndex:
+    """
+    Ranked top-K search over item names and legacy IDs, held in memory
+    
+    Names are indexed by trigram postings (compact arrays of item ids);
+    a query is answered by verifying the candidates of its rarest trigram,
+    so the cost depends on how selective the query is, not on catalog
+    size. Sorted key lists give legacy-ID and name prefix matches with a
+    binary search. Results are ranked in tiers: legacy ID prefix (exact
+    first), name prefix, then substring matches ordered by word start,
+    match position and name length.
+    
+    The index is built on first use and kept current by Item save/delete
+    signals in this process, plus an incremental refresh from updated_at
+    every ITEM_SEARCH_REFRESH_INTERVAL seconds for changes made elsewhere.
+    Postings of renamed or deleted items are dropped lazily: candidates
+    are always checked against the current name, and the postings are
+    compacted once half of them are stale.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._names = {}
+        self._legacy = {}
+        self._postings = {}
+        self._name_keys = []
+        self._legacy_keys = []
+        self._short_names = set()
+        self._posting_count = 0
+        self._stale = 0
+        self._built = False
+        self._high_water = None
+        self._last_refresh = time.monotonic()
+        self._queries = 0
+    
+    def build(self, rows=None):
+        """
+        (Re)build the whole index
+        
+        Args:
+            rows: Optional iterable of (id, legacy_item_id, name, updated_at);
+                defaults to every Item in the database
+        """
+        if rows is None:
+            rows = Item.objects.order_by().values_list(
+                'id', 'legacy_item_id', 'name', 'updated_at'
+            ).iterator(chunk_size=5000)
+        
+        names, legacy, high_water = {}, {}, None
+        for item_id, legacy_item_id, name, updated_at in rows:
+            names[item_id] = name.lower()
+            legacy[item_id] = str(legacy_item_id)
+            if updated_at is not None and (high_water is None or updated_at > high_water):
+                high_water = updated_at
+        
+        with self._lock:
+            self._names = names
+            self._legacy = legacy
+            self._name_keys = sorted((name, item_id) for item_id, name in names.items())
+            self._legacy_keys = sorted((code, item_id) for item_id, code in legacy.items())
+            self._rebuild_postings()
+            self._high_water = high_water
+            self._last_refresh = time.monotonic()
+            self._built = True
+    
+    def add(self, item_id, legacy_item_id, name):
+        """Index an item, replacing any previous entry for the same id"""
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(item_id)
+            name = name.lower()
+            code = str(legacy_item_id)
+            self._names[item_id] = name
+            self._legacy[item_id] = code
+            insort(self._name_keys, (name, item_id))
+            insort(self._legacy_keys, (code, item_id))
+            self._post(item_id, name)
+    
+    def remove(self, item_id):
+        """Drop an item from the index"""
+        with self._lock:
+            if self._built:
+                self._remove(item_id)
+    
+    def clear(self):
+        """Forget everything; the next search rebuilds from the database"""
+        with self._lock:
+            self._names, self._legacy, self._postings = {}, {}, {}
+            self._name_keys, self._legacy_keys = [], []
+            self._short_names = set()
+            self._posting_count = self._stale = 0
+            self._high_water = None
+            self._built = False
+    
+    def search(self, query, limit=50):
+        """
+        Find the best matching items
+        
+        Args:
+            query: Text to find in names, or the start of a legacy ID
+            limit: Maximum number of results
+        
+        Returns:
+            List of item IDs, best match first
+        """
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+        if not self._built:
+            self.build()
+        elif time.monotonic() - self._last_refresh >= settings.ITEM_SEARCH_REFRESH_INTERVAL:
+            self.refresh()
+        
+        with self._lock:
+            self._queries += 1
+            results = []
+            seen = set()
+            
+            if query.isdigit():
+                self._take_prefix(self._legacy_keys, query, results, seen, limit)
+            if len(results) < limit:
+                self._take_prefix(self._name_keys, query, results, seen, limit)
+            if len(results) < limit:
+                matches = []
+                for item_id in self._candidates(query):
+                    name = self._names.get(item_id)
+                    if item_id in seen or name is None:
+                        continue
+                    position = name.find(query)
+                    if position < 0:
+                        continue
+                    seen.add(item_id)
+                    word_start = position == 0 or not name[position - 1].isalnum()
+                    matches.append((not word_start, position, len(name), name, item_id))
+                results.extend(match[-1] for match in heapq.nsmallest(limit - len(results), matches))
+            return results
+    
+    def refresh(self):
+        """Re-index rows changed since the last load"""
+        with self._lock:
+            high_water = self._high_water
+            self._last_refresh = time.monotonic()
+        if high_water is None:
+            return
+        # Overlap the window so rows committed late with an older timestamp are not missed
+        overlap = timedelta(seconds=settings.ITEM_SEARCH_REFRESH_INTERVAL)
+        rows = Item.objects.filter(updated_at__gte=high_water - overlap).order_by().values_list(
+            'id', 'legacy_item_id', 'name', 'updated_at'
+        )
+        with self._lock:
+            for item_id, legacy_item_id, name, updated_at in rows:
+                if self._names.get(item_id) != name.lower() or self._legacy.get(item_id) != str(legacy_item_id):
+                    self.add(item_id, legacy_item_id, name)
+                if self._high_water is None or updated_at > self._high_water:
+                    self._high_water = updated_at
+    
+    def stats(self):
+        """Get size and posting counters"""
+        with self._lock:
+            return {
+                'items': len(self._names),
+                'trigrams': len(self._postings),
+                'postings': self._posting_count,
+                'stale_postings': self._stale,
+                'queries': self._queries,
+            }
+    
+    def _take_prefix(self, keys, prefix, results, seen, limit):
+        """Append ids whose key starts with prefix, in key order"""
+        index = bisect_left(keys, (prefix,))
+        while index < len(keys) and len(results) < limit:
+            key, item_id = keys[index]
+            if not key.startswith(prefix):
+                break
+            if item_id not in seen:
+                seen.add(item_id)
+                results.append(item_id)
+            index += 1
+    
+    def _candidates(self, query):
+        """Ids that may contain query (a superset; callers verify)"""
+        if len(query) >= 3:
+            postings = []
+            for gram in trigrams(query):
+                posting = self._postings.get(gram)
+                if posting is None:
+                    return ()
+                postings.append(posting)
+            # Every match is in every posting, so the shortest one suffices
+            return set(min(postings, key=len))
+        
+        # Too short for a trigram: union the postings of trigrams containing it
+        candidates = set(self._short_names)
+        for gram, posting in self._postings.items():
+            if query in gram:
+                candidates.update(posting)
+        return candidates
+    
+    def _post(self, item_id, name):
+        grams = trigrams(name)
+        if not grams:
+            self._short_names.add(item_id)
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                # Item ids are 64-bit (BigAutoField)
+                posting = self._postings[gram] = array('Q')
+            posting.append(item_id)
+        self._posting_count += len(grams)
+    
+    def _remove(self, item_id):
+        name = self._names.pop(item_id, None)
+        code = self._legacy.pop(item_id, None)
+        if name is None:
+            return
+        for keys, key in ((self._name_keys, name), (self._legacy_keys, code)):
+            index = bisect_left(keys, (key, item_id))
+            if index < len(keys) and keys[index] == (key, item_id):
+                del keys[index]
+        self._short_names.discard(item_id)
+        self._stale += len(trigrams(name))
+        if self._stale * 2 > self._posting_count:
+            self._rebuild_postings()
+    
+    def _rebuild_postings(self):
+        self._postings = {}
+        self._short_names = set()
+        self._posting_count = self._stale = 0
+        for item_id, name in self._names.items():
+            self._post(item_id, name)
@@ -3,8 +3,13 @@ Transaction Service - Business logic for transaction operations
 """
 from decimal import Decimal
 from django.db import transaction
-from ..models import Transaction, TransactionItem, Item, Employee, Customer, Coupon
-from ..models.audit_log import AuditLog
+from django.db.models import Case, F, IntegerField, When
+from ..models import Transaction, TransactionItem, Item, Employee, Customer
+from .audit_service import AuditService
+from .coupon_service import CouponService
+from .inventory_service import InventoryService
+from .rental_service import RentalService
+from .reporting_service import ReportingService
 
 
 class TransactionService:
@@ -28,41 +33,26 @@ class TransactionService:
             Transaction object
         """
         employee = Employee.objects.get(id=employee_id)
-        total_amount = Decimal('0.00')
-        transaction_items = []
         
         # Validate and prepare items
-        for item_data in items_data:
-            item = Item.objects.get(id=item_data['item_id'])
-            quantity = item_data['quantity']
-            
-            if not item.is_available(quantity):
-                raise ValueError(f"Insufficient quantity for item {item.name}")
-            
-            subtotal = item.price * quantity
-            total_amount += subtotal
-            
-            transaction_items.append({
-                'item': item,
-                'quantity': quantity,
-                'unit_price': item.price,
-                'subtotal': subtotal
-            })
+        transaction_items, total_amount = TransactionService._prepare_line_items(items_data)
         
         # Apply coupon discount if provided
         discount_applied = False
         if coupon_code:
-            try:
-                coupon = Coupon.objects.get(code=coupon_code)
-                if coupon.is_valid():
-                    total_amount = Decimal(str(coupon.apply_discount(total_amount)))
-                    discount_applied = True
-            except Coupon.DoesNotExist:
-                pass  # Invalid coupon, proceed without discount
+            coupon = CouponService.get_valid_coupon(coupon_code)
+            if coupon:
+                total_amount = Decimal(str(coupon.apply_discount(total_amount)))
+                discount_applied = True
+            # Invalid coupon, proceed without discount
         
         # Apply tax
         tax_rate = TransactionService.DEFAULT_TAX_RATE
-        total_with_tax = total_amount * (1 + tax_rate)
+        # Round as the stored total is, so the rollups add up the same amounts
+        total_with_tax = (total_amount * (1 + tax_rate)).quantize(Decimal('0.01'))
+        
+        # Reduce inventory (authoritative stock check)
+        TransactionService._take_stock(transaction_items)
         
         # Create transaction
         sale_transaction = Transaction.objects.create(
@@ -74,20 +64,15 @@ class TransactionService:
             coupon_code=coupon_code if discount_applied else None
         )
         
-        # Create transaction items and update inventory
-        for item_data in transaction_items:
-            TransactionItem.objects.create(
-                transaction=sale_transaction,
-                item=item_data['item'],
-                quantity=item_data['quantity'],
-                unit_price=item_data['unit_price'],
-                subtotal=item_data['subtotal']
-            )
-            # Reduce inventory
-            item_data['item'].reduce_quantity(item_data['quantity'])
+        # Create transaction items
+        TransactionItem.objects.bulk_create([
+            TransactionItem(transaction=sale_transaction, **item_data)
+            for item_data in transaction_items
+        ])
+        ReportingService.record_transaction(sale_transaction, transaction_items)
         
         # Log transaction
-        AuditLog.objects.create(
+        AuditService.log(
             employee=employee,
             action='transaction_created',
             details=f"Sale transaction #{sale_transaction.id} created"
@@ -95,6 +80,55 @@ class TransactionService:
         
         return sale_transaction
     
+    @staticmethod
+    def _prepare_line_items(items_data):
+        """
+        Price each line from the catalog cache
+        
+        Stock is not checked here; cached quantities are only hints and
+        _take_stock performs the authoritative check.
+        
+        Args:
+            items_data: List of dicts with 'item_id', 'quantity'
+        
+        Returns:
+            Tuple of (list of TransactionItem field dicts, total amount)
+        """
+        entries = InventoryService.get_catalog_entries({item_data['item_id'] for item_data in items_data})
+        total_amount = Decimal('0.00')
+        transaction_items = []
+        
+        for item_data in items_data:
+            entry = entries.get(item_data['item_id'])
+            if entry is None:
+                raise Item.DoesNotExist("Item matching query does not exist.")
+            quantity = item_data['quantity']
+            subtotal = entry.price * quantity
+            total_amount += subtotal
+            
+            transaction_items.append({
+                'item_id': entry.id,
+                'quantity': quantity,
+                'unit_price': entry.price,
+                'subtotal': subtotal
+            })
+        
+        return transaction_items, total_amount
+    
+    @staticmethod
+    def _take_stock(transaction_items):
+        """Decrement stock for all lines, raising ValueError if any line is short"""
+        requested = {}
+        for item_data in transaction_items:
+            item_id = item_data['item_id']
+            requested[item_id] = requested.get(item_id, 0) + item_data['quantity']
+        
+        results = InventoryService.decrement_stock(requested)
+        short = [item_id for item_id in requested if not results[item_id]]
+        if short:
+            entry = InventoryService.get_catalog_entries(short)[short[0]]
+            raise ValueError(f"Insufficient quantity for item {entry.name}")
+    
     @staticmethod
     @transaction.atomic
     def create_rental(employee_id, customer_phone, items_data):
@@ -116,44 +150,32 @@ class TransactionService:
         
         # Get or create customer
         customer, created = Customer.objects.get_or_create(phone_number=customer_phone)
-        
-        total_amount = Decimal('0.00')
-        transaction_items = []
-        rentals_to_create = []
+        RentalService.remember_customer(customer_phone, customer.id)
         
         # Validate and prepare items
-        for item_data in items_data:
-            item = Item.objects.get(id=item_data['item_id'])
-            quantity = item_data['quantity']
-            
-            if not item.is_available(quantity):
-                raise ValueError(f"Insufficient quantity for item {item.name}")
-            
-            subtotal = item.price * quantity
-            total_amount += subtotal
-            
-            transaction_items.append({
-                'item': item,
-                'quantity': quantity,
-                'unit_price': item.price,
-                'subtotal': subtotal
-            })
-            
-            # Prepare rental entries
-            rental_date = date.today()
-            due_date = rental_date + timedelta(days=7)  # 7-day rental period
-            
-            for _ in range(quantity):
-                rentals_to_create.append({
-                    'item': item,
-                    'customer': customer,
-                    'rental_date': rental_date,
-                    'due_date': due_date
-                })
+        transaction_items, total_amount = TransactionService._prepare_line_items(items_data)
+        
+        # Prepare rental entries (one record per line, carrying its quantity)
+        rental_date = date.today()
+        due_date = rental_date + timedelta(days=7)  # 7-day rental period
+        rentals_to_create = [
+            {
+                'item_id': item_data['item_id'],
+                'customer': customer,
+                'quantity': item_data['quantity'],
+                'rental_date': rental_date,
+                'due_date': due_date
+            }
+            for item_data in transaction_items
+        ]
         
         # Apply tax
         tax_rate = TransactionService.DEFAULT_TAX_RATE
-        total_with_tax = total_amount * (1 + tax_rate)
+        # Round as the stored total is, so the rollups add up the same amounts
+        total_with_tax = (total_amount * (1 + tax_rate)).quantize(Decimal('0.01'))
+        
+        # Reduce inventory (authoritative stock check)
+        TransactionService._take_stock(transaction_items)
         
         # Create transaction
         rental_transaction = Transaction.objects.create(
@@ -164,27 +186,27 @@ class TransactionService:
             tax_rate=tax_rate
         )
         
-        # Create transaction items and rentals, update inventory
-        for item_data in transaction_items:
-            TransactionItem.objects.create(
-                transaction=rental_transaction,
-                item=item_data['item'],
-                quantity=item_data['quantity'],
-                unit_price=item_data['unit_price'],
-                subtotal=item_data['subtotal']
-            )
-            # Reduce inventory
-            item_data['item'].reduce_quantity(item_data['quantity'])
+        # Create transaction items
+        TransactionItem.objects.bulk_create([
+            TransactionItem(transaction=rental_transaction, **item_data)
+            for item_data in transaction_items
+        ])
+        ReportingService.record_transaction(rental_transaction, transaction_items)
         
         # Create rental records
-        for rental_data in rentals_to_create:
-            Rental.objects.create(
-                transaction=rental_transaction,
-                **rental_data
-            )
+        Rental.objects.bulk_create([
+            Rental(transaction=rental_transaction, **rental_data)
+            for rental_data in rentals_to_create
+        ])
+        RentalService.record_rentals(
+            customer.id,
+            len(rentals_to_create),
+            sum(rental_data['quantity'] for rental_data in rentals_to_create),
+            due_date
+        )
         
         # Log transaction
-        AuditLog.objects.create(
+        AuditService.log(
             employee=employee,
             action='transaction_created',
             details=f"Rental transaction #{rental_transaction.id} created for customer {customer_phone}"
@@ -194,13 +216,16 @@ class TransactionService:
     
     @staticmethod
     @transaction.atomic
-    def process_return(customer_phone, item_ids):
+    def process_return(employee_id, customer_phone, items_data=None, rental_ids=None):
         """
-        Process item returns
+        Process item returns as a single Return transaction
         
         Args:
+            employee_id: ID of the employee processing the return
             customer_phone: Customer phone number
-            item_ids: List of item IDs to return
+            items_data: List of dicts with 'item_id', 'quantity'; units are
+                taken from the customer's oldest-due rentals of that item
+            rental_ids: List of rental IDs whose outstanding units are all returned
         
         Returns:
             List of updated Rental objects
@@ -208,26 +233,168 @@ class TransactionService:
         from datetime import date
         from ..models import Customer, Rental
         
+        if not items_data and not rental_ids:
+            raise ValueError("Either items or rental IDs must be provided")
+        
+        employee = Employee.objects.get(id=employee_id)
         customer = Customer.objects.get(phone_number=customer_phone)
-        returned_rentals = []
         
-        # Find active rentals for these items
-        active_rentals = Rental.objects.filter(
+        # Load every candidate rental in one query
+        active_rentals = Rental.objects.select_for_update().filter(
             customer=customer,
-            item_id__in=item_ids,
             is_returned=False
-        )
+        ).order_by('due_date', 'id')
+        if rental_ids:
+            active_rentals = active_rentals.filter(id__in=rental_ids)
+        else:
+            active_rentals = active_rentals.filter(item_id__in=[item_data['item_id'] for item_data in items_data])
+        active_rentals = list(active_rentals.values('id', 'item_id', 'quantity', 'returned_quantity', 'due_date'))
         
-        if not active_rentals.exists():
-            raise ValueError("No active rentals found for these items")
+        returns = TransactionService._allocate_returns(active_rentals, items_data, rental_ids)
+        if not returns:
+            raise ValueError("Nothing to return")
         
+        # Close or reduce all affected rentals with one UPDATE
         return_date = date.today()
+        returning = [rental for rental in active_rentals if rental['id'] in returns]
+        amounts = Case(
+            *[When(id=rental_id, then=amount) for rental_id, amount in returns.items()],
+            output_field=IntegerField()
+        )
+        closed_ids = [
+            rental['id'] for rental in returning
+            if rental['quantity'] - rental['returned_quantity'] == returns[rental['id']]
+        ]
+        days_overdue = [
+            When(id=rental['id'], then=(return_date - rental['due_date']).days)
+            for rental in returning if rental['due_date'] < return_date
+        ]
+        
+        updated = Rental.objects.filter(
+            id__in=returns,
+            returned_quantity__lte=F('quantity') - amounts
+        ).update(
+            returned_quantity=F('returned_quantity') + amounts,
+            is_returned=Case(When(id__in=closed_ids, then=True), default=False),
+            return_date=return_date,
+            days_overdue=Case(*days_overdue, default=None, output_field=IntegerField())
+        )
+        if updated != len(returns):
+            raise ValueError("Rentals were returned concurrently, please retry")
+        RentalService.refresh_customer_activity(customer.id)
+        
+        # Increase inventory, one increment per item
+        restock = {}
+        for rental in returning:
+            restock[rental['item_id']] = restock.get(rental['item_id'], 0) + returns[rental['id']]
+        InventoryService.increment_stock(restock)
+        
+        # Record the return
+        return_transaction = Transaction.objects.create(
+            transaction_type='Return',
+            employee=employee,
+            customer=customer,
+            total_amount=Decimal('0.00')
+        )
+        TransactionItem.objects.bulk_create([
+            TransactionItem(
+                transaction=return_transaction,
+                item_id=item_id,
+                quantity=quantity,
+                unit_price=Decimal('0.00'),
+                subtotal=Decimal('0.00')
+            )
+            for item_id, quantity in restock.items()
+        ])
+        ReportingService.record_transaction(return_transaction, [
+            {'item_id': item_id, 'quantity': quantity, 'subtotal': Decimal('0.00')}
+            for item_id, quantity in restock.items()
+        ])
+        
+        # Log transaction
+        AuditService.log(
+            employee=employee,
+            action='transaction_created',
+            details=f"Return transaction #{return_transaction.id} created for customer {customer_phone}"
+        )
+        
+        return list(Rental.objects.filter(id__in=returns).select_related('item', 'customer'))
+    
+    @staticmethod
+    def get_transaction_history(transaction_type=None, employee_id=None, customer_phone=None,
+                                created_from=None, created_before=None):
+        """
+        Build the filtered transaction history query
+        
+        Args:
+            transaction_type: Optional 'Sale', 'Rental' or 'Return'
+            employee_id: Optional ID of the processing employee
+            customer_phone: Optional customer phone number
+            created_from: Optional datetime, inclusive
+            created_before: Optional datetime, exclusive
+        
+        Returns:
+            Unordered QuerySet of transactions; the paginator orders it
+        """
+        transactions = Transaction.objects.all()
+        
+        if transaction_type:
+            transactions = transactions.filter(transaction_type=transaction_type)
+        if employee_id:
+            transactions = transactions.filter(employee_id=employee_id)
+        if customer_phone:
+            # Resolve the phone first so the (customer, created_at, id) index is used
+            customer_id = Customer.objects.filter(
+                phone_number=customer_phone
+            ).values_list('id', flat=True).first()
+            if customer_id is None:
+                return Transaction.objects.none()
+            transactions = transactions.filter(customer_id=customer_id)
+        if created_from:
+            transactions = transactions.filter(created_at__gte=created_from)
+        if created_before:
+            transactions = transactions.filter(created_at__lt=created_before)
+        
+        return transactions
+    
+    @staticmethod
+    def _allocate_returns(active_rentals, items_data, rental_ids):
+        """
+        Work out how many units to return from each rental
+        
+        Args:
+            active_rentals: Rental value dicts, oldest due first
+            items_data: List of dicts with 'item_id', 'quantity', or None
+            rental_ids: List of rental IDs, or None
+        
+        Returns:
+            Dict mapping rental ID to the number of units returned
+        """
+        returns = {}
+        
+        if rental_ids:
+            for rental in active_rentals:
+                returns[rental['id']] = rental['quantity'] - rental['returned_quantity']
+            missing = set(rental_ids) - set(returns)
+            if missing:
+                raise ValueError(f"No active rentals found for rental IDs {sorted(missing)}")
+            return returns
+        
+        remaining = {}
+        for item_data in items_data:
+            if item_data['quantity'] <= 0:
+                raise ValueError("Quantity must be greater than 0")
+            remaining[item_data['item_id']] = remaining.get(item_data['item_id'], 0) + item_data['quantity']
         
         for rental in active_rentals:
-            rental.mark_as_returned(return_date)
-            # Increase inventory
-            rental.item.increase_quantity(1)
-            returned_rentals.append(rental)
+            wanted = remaining.get(rental['item_id'], 0)
+            if wanted <= 0:
+                continue
+            amount = min(wanted, rental['quantity'] - rental['returned_quantity'])
+            returns[rental['id']] = amount
+            remaining[rental['item_id']] -= amount
         
-        return returned_rentals
-
+        unreturned = sorted(item_id for item_id, wanted in remaining.items() if wanted > 0)
+        if unreturned:
+            raise ValueError(f"No active rentals found for items {unreturned}")
+        return returns
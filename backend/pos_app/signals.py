@@ -0,0 +1,73 @@
+"""
+Signal handlers keeping in-process caches in step with model changes
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Coupon, Customer, Item, ItemTombstone
+from .services.coupon_service import CouponService
+from .services.inventory_service import InventoryService
+from .services.rental_service import RentalService
+
+
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def invalidate_coupon_cache(sender, **kwargs):
+    """Forget cached coupons whenever a coupon changes"""
+    CouponService.invalidate()
+    # Clear again once committed, in case another request re-cached the old row meanwhile
+    transaction.on_commit(CouponService.invalidate)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_ids(sender, instance, created=False, **kwargs):
+    """Keep cached phone number -> customer ID mappings in step with customer changes"""
+    if created:
+        # A new customer only replaces whatever its phone number mapped to
+        RentalService.remember_customer(instance.phone_number, instance.pk)
+        return
+    RentalService.invalidate_customer_ids()
+    transaction.on_commit(RentalService.invalidate_customer_ids)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """Forget the cached copy of an item whenever it is saved or deleted"""
+    item_id = instance.pk
+    InventoryService.invalidate_catalog([item_id])
+    # Deleting clears instance.pk, so keep the id for the commit hook
+    transaction.on_commit(lambda: InventoryService.invalidate_catalog([item_id]))
+
+
+@receiver(post_save, sender=Item)
+def index_saved_item(sender, instance, **kwargs):
+    """Keep the item search index in step with saved items"""
+    InventoryService.index_item(instance)
+
+
+@receiver(post_delete, sender=Item)
+def unindex_deleted_item(sender, instance, **kwargs):
+    """Drop deleted items from the item search index"""
+    InventoryService.unindex_item(instance.pk)
+
+
+@receiver(post_delete, sender=Item)
+def record_item_tombstone(sender, instance, **kwargs):
+    """Leave a tombstone so registers syncing from the change feed drop the item"""
+    ItemTombstone.objects.create(item_id=instance.pk, legacy_item_id=instance.legacy_item_id)
+
+
+@receiver(post_save, sender=Item)
+def publish_saved_item(sender, instance, **kwargs):
+    """Push the saved price and stock to item change stream clients once committed"""
+    item_id = instance.pk
+    transaction.on_commit(lambda: InventoryService.publish_item_changes([item_id]))
+
+
+@receiver(post_delete, sender=Item)
+def publish_deleted_item(sender, instance, **kwargs):
+    """Tell item change stream clients about the deletion once committed"""
+    item_id = instance.pk
+    transaction.on_commit(lambda: InventoryService.publish_item_deleted(item_id))
@@ -0,0 +1,31 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+    """TestCase mixin for checking that endpoints run a fixed number of queries"""
+
+    def assertFixedQueryCount(self, client, url, num, grow=None, rounds=2):
+        """
+        Assert that GET url runs exactly num queries, however many rows it returns
+
+        Args:
+            client: Test client (already logged in if the endpoint needs it)
+            url: Endpoint to request
+            num: Expected number of queries per request
+            grow: Optional callable adding rows between rounds
+            rounds: Number of requests to make, calling grow before each but the first
+        """
+        for round_number in range(rounds):
+            if round_number and grow is not None:
+                grow()
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            executed = len(context.captured_queries)
+            self.assertEqual(
+                executed, num,
+                f"GET {url} ran {executed} queries in round {round_number + 1}, expected {num}:\n" +
+                '\n'.join(query['sql'] for query in context.captured_queries)
+            )
+        return response
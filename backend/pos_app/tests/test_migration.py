@@ -1,7 +1,16 @@
 from django.test import TestCase
+from django.apps import apps
+from datetime import date, timedelta
+from importlib import import_module
 from pos_app.models.employee import Employee
 from pos_app.models.item import Item
 from pos_app.models.customer import Customer
+from pos_app.models.transaction import Transaction
+from pos_app.models.rental import Rental
+from pos_app.models.daily_rollup import DailyTransactionTotal
+from pos_app.services import EmployeeService, ReportingService, TransactionService
+from django.contrib.sessions.backends.db import SessionStore
+from django.utils import timezone
 import os
 
 
@@ -64,3 +73,95 @@ class DataMigrationTest(TestCase):
         self.assertIsNotNone(employee.id)
         self.assertIsNotNone(item.id)
 
+
+
+class RentalFoldMigrationTest(TestCase):
+    """Test folding of legacy one-row-per-unit rentals"""
+
+    def test_fold_rental_units(self):
+        migration = import_module('pos_app.migrations.0003_fold_rental_units')
+        employee = Employee.objects.create(
+            username='cashier',
+            first_name='Cash',
+            last_name='Ier',
+            position='Cashier'
+        )
+        item = Item.objects.create(legacy_item_id='1001', name='Item', price=10.00, quantity=10)
+        customer = Customer.objects.create(phone_number='1234567890')
+        transaction = Transaction.objects.create(
+            employee=employee,
+            customer=customer,
+            transaction_type='Rental',
+            total_amount=31.80
+        )
+        due_date = date.today() + timedelta(days=7)
+        for returned in (True, False, False):
+            Rental.objects.create(
+                transaction=transaction,
+                item=item,
+                customer=customer,
+                due_date=due_date,
+                is_returned=returned,
+                return_date=date.today() if returned else None
+            )
+
+        migration.fold_rental_units(apps, None)
+
+        rental = Rental.objects.get(transaction=transaction)
+        self.assertEqual(rental.quantity, 3)
+        self.assertEqual(rental.returned_quantity, 1)
+        self.assertFalse(rental.is_returned)
+        self.assertEqual(rental.outstanding_quantity, 2)
+
+
+class DailyRollupMigrationTest(TestCase):
+    """Test that existing transactions are rolled up when the rollups are created"""
+
+    def test_build_daily_rollups(self):
+        migration = import_module('pos_app.migrations.0011_daily_report_rollups')
+        employee = Employee.objects.create(
+            username='cashier',
+            first_name='Cash',
+            last_name='Ier',
+            position='Cashier'
+        )
+        item = Item.objects.create(legacy_item_id='1001', name='Item', price=10.00, quantity=10)
+        # Rollups are written on commit, which TestCase never reaches
+        for quantity in (1, 2):
+            TransactionService.create_sale(employee_id=employee.id, items_data=[{'item_id': item.id, 'quantity': quantity}])
+        self.assertFalse(DailyTransactionTotal.objects.exists())
+
+        migration.build_daily_rollups(apps, None)
+
+        today = timezone.localdate()
+        summary = ReportingService.sales_summary(today, today)
+        self.assertEqual(summary['count'], 2)
+        self.assertEqual(summary['total'], sum(sale.total_amount for sale in Transaction.objects.all()))
+        self.assertEqual(ReportingService.top_items(today, today)[0]['total_quantity'], 3)
+        self.assertEqual(ReportingService.employee_performance(today, today)[0]['transaction_count'], 2)
+
+
+class SessionLinkMigrationTest(TestCase):
+    """Test that logins made before sessions were tracked can still be ended"""
+
+    def test_link_existing_sessions(self):
+        migration = import_module('pos_app.migrations.0013_link_existing_sessions')
+        employee = Employee.objects.create(
+            username='cashier',
+            first_name='Cash',
+            last_name='Ier',
+            position='Cashier'
+        )
+        session = SessionStore()
+        session['employee_id'] = employee.id
+        session.create()
+        anonymous = SessionStore()
+        anonymous['cart'] = []
+        anonymous.create()
+
+        migration.link_existing_sessions(apps, None)
+        migration.link_existing_sessions(apps, None)
+
+        self.assertEqual(EmployeeService.end_sessions(employee.id), 1)
+        self.assertFalse(SessionStore().exists(session.session_key))
+        self.assertTrue(SessionStore().exists(anonymous.session_key))
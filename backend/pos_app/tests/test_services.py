@@ -1,15 +1,34 @@
-from django.test import TestCase
+import threading
+import time
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.contrib.sessions.backends.db import SessionStore
+from django.utils import timezone
+from django.db import connection, transaction, OperationalError
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
 from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 from pos_app.models.employee import Employee
+from pos_app.models.employee_session import EmployeeSession
 from pos_app.models.item import Item
 from pos_app.models.customer import Customer
 from pos_app.models.transaction import Transaction
 from pos_app.models.rental import Rental
+from pos_app.models.audit_log import AuditLog
+from pos_app.models.coupon import Coupon
+from pos_app.models.daily_rollup import DailyEmployeeTotal, DailyItemTotal, DailyTransactionTotal
 from pos_app.services.employee_service import EmployeeService
 from pos_app.services.inventory_service import InventoryService
 from pos_app.services.transaction_service import TransactionService
 from pos_app.services.rental_service import RentalService
+from pos_app.services.audit_service import AuditLogWriter, AuditService
+from pos_app.services.coupon_service import CouponService
+from pos_app.services.change_bus import ChangeBus
+from pos_app.services.reporting_service import ReportingService
+from pos_app.caching import SingleFlight
 
 
 class EmployeeServiceTest(TestCase):
@@ -36,6 +55,119 @@ class EmployeeServiceTest(TestCase):
         employee = EmployeeService.authenticate('wronguser', 'testpass123')
         self.assertIsNone(employee)
 
+    def test_role_change_ends_sessions(self):
+        session = SessionStore()
+        session['employee_id'] = self.employee.id
+        session.create()
+        EmployeeService.start_session(self.employee.id, session.session_key)
+
+        EmployeeService.update_employee(self.employee.id, first_name='Renamed')
+        self.assertTrue(SessionStore().exists(session.session_key))
+
+        EmployeeService.update_employee(self.employee.id, position='Admin')
+        self.assertFalse(SessionStore().exists(session.session_key))
+        self.assertFalse(EmployeeSession.objects.filter(employee=self.employee).exists())
+
+    def test_deactivation_ends_sessions(self):
+        session = SessionStore()
+        session.create()
+        EmployeeService.start_session(self.employee.id, session.session_key)
+        EmployeeService.delete_employee(self.employee.id)
+        self.assertFalse(SessionStore().exists(session.session_key))
+
+
+class AuditLogWriterTest(TransactionTestCase):
+    def setUp(self):
+        self.employee = Employee.objects.create(
+            username='cashier1',
+            first_name='Cashier',
+            last_name='One',
+            position='Cashier'
+        )
+
+    def test_background_writer_batches_entries(self):
+        writer = AuditLogWriter(batch_size=10, flush_interval=0.05)
+        for i in range(25):
+            writer.log(self.employee, 'login', f"Login {i}")
+        writer.stop()
+
+        self.assertEqual(AuditLog.objects.count(), 25)
+        stats = writer.stats()
+        self.assertEqual(stats['written'], 25)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertEqual(stats['dropped'], 0)
+        self.assertGreaterEqual(stats['batches'], 3)
+
+    def test_entries_wait_for_commit(self):
+        writer = AuditLogWriter(background=False)
+        with transaction.atomic():
+            writer.log(self.employee, 'login')
+            self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                writer.log(self.employee, 'logout')
+                raise ValueError("rolled back")
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+    def test_full_queue_falls_back_to_synchronous_write(self):
+        writer = AuditLogWriter(max_queue_size=2)
+        with mock.patch.object(writer, '_ensure_thread'):
+            for i in range(5):
+                writer.log(self.employee, 'login', f"Login {i}")
+
+        stats = writer.stats()
+        self.assertEqual(stats['queue_depth'], 2)
+        self.assertEqual(stats['sync_fallbacks'], 3)
+        self.assertEqual(AuditLog.objects.count(), 3)
+
+        writer.flush()
+        self.assertEqual(AuditLog.objects.count(), 5)
+
+
+class CouponServiceTest(TestCase):
+    def setUp(self):
+        CouponService.invalidate()
+        self.coupon = Coupon.objects.create(
+            code='SAVE10',
+            discount_percentage=10,
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+    def test_valid_coupon_is_cached(self):
+        self.assertEqual(CouponService.get_valid_coupon('SAVE10'), self.coupon)
+        with self.assertNumQueries(0):
+            self.assertEqual(CouponService.get_valid_coupon('SAVE10'), self.coupon)
+
+    def test_unknown_code_is_negatively_cached(self):
+        self.assertIsNone(CouponService.get_valid_coupon('BOGUS'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(CouponService.get_valid_coupon('BOGUS'))
+
+    def test_expiry_checked_without_query(self):
+        CouponService.get_valid_coupon('SAVE10')
+        later = timezone.now() + timedelta(hours=2)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            with self.assertNumQueries(0):
+                self.assertIsNone(CouponService.get_valid_coupon('SAVE10'))
+
+    def test_save_invalidates_cache(self):
+        CouponService.get_valid_coupon('SAVE10')
+        self.assertIsNone(CouponService.get_valid_coupon('NEW20'))
+        self.coupon.is_active = False
+        self.coupon.save()
+        Coupon.objects.create(code='NEW20', discount_percentage=20)
+        self.assertIsNone(CouponService.get_valid_coupon('SAVE10'))
+        self.assertIsNotNone(CouponService.get_valid_coupon('NEW20'))
+
+    def test_cache_stats(self):
+        CouponService.get_valid_coupon('SAVE10')
+        CouponService.get_valid_coupon('SAVE10')
+        stats = CouponService.cache_stats()
+        self.assertGreaterEqual(stats['hits'], 1)
+        self.assertGreaterEqual(stats['misses'], 1)
+
 
 class InventoryServiceTest(TestCase):
     def setUp(self):
@@ -62,6 +194,196 @@ class InventoryServiceTest(TestCase):
         self.assertEqual(items[0].name, 'Test Item')
 
 
+    def test_decrement_stock_all_or_nothing(self):
+        other = Item.objects.create(legacy_item_id='1002', name='Other Item', price=5.00, quantity=1)
+        results = InventoryService.decrement_stock({self.item.id: 5, other.id: 2})
+        self.assertEqual(results, {self.item.id: True, other.id: False})
+        self.item.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.item.quantity, 50)
+        self.assertEqual(other.quantity, 1)
+
+        results = InventoryService.decrement_stock({self.item.id: 5, other.id: 1})
+        self.assertTrue(all(results.values()))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 45)
+
+    def test_increment_stock(self):
+        InventoryService.increment_stock({self.item.id: 3})
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 53)
+
+    def test_search_ranks_legacy_id_and_name_prefix_first(self):
+        InventoryService.clear_search_index()
+        Item.objects.create(legacy_item_id='2001', name='Star Wars', price=3.00, quantity=1)
+        Item.objects.create(legacy_item_id='2002', name='Lone Star', price=3.00, quantity=1)
+        Item.objects.create(legacy_item_id='2003', name='Mustard', price=3.00, quantity=1)
+        Item.objects.create(legacy_item_id='1001000', name='Popcorn', price=3.00, quantity=1)
+
+        names = [item.name for item in InventoryService.search_items('star')]
+        self.assertEqual(names, ['Star Wars', 'Lone Star', 'Mustard'])
+        names = [item.name for item in InventoryService.search_items('1001')]
+        self.assertEqual(names, ['Test Item', 'Popcorn'])
+        names = [item.name for item in InventoryService.search_items('st', limit=2)]
+        self.assertEqual(names, ['Star Wars', 'Lone Star'])
+
+    def test_search_index_follows_saves_and_deletes(self):
+        InventoryService.clear_search_index()
+        self.assertEqual(len(InventoryService.search_items('test')), 1)
+        self.item.name = 'Renamed'
+        self.item.save()
+        self.assertEqual(InventoryService.search_items('test'), [])
+        self.assertEqual(InventoryService.search_items('renamed')[0].id, self.item.id)
+        self.item.delete()
+        self.assertEqual(InventoryService.search_items('renamed'), [])
+
+    def test_search_index_takes_64_bit_ids(self):
+        InventoryService.clear_search_index()
+        self.assertEqual(len(InventoryService.search_items('test')), 1)
+        item = Item.objects.create(id=2 ** 32 + 1, legacy_item_id='3001', name='Big Id', price=3.00, quantity=1)
+        self.assertEqual(InventoryService.search_items('big id')[0].id, item.id)
+
+    @override_settings(CATALOG_CACHE_REFRESH_INTERVAL=3600)
+    def test_catalog_cache_serves_repeat_lookups(self):
+        InventoryService.clear_catalog_cache()
+        with self.assertNumQueries(1):
+            InventoryService.get_item_by_id(self.item.id)
+        with self.assertNumQueries(0):
+            item = InventoryService.get_item_by_id(self.item.id)
+            by_legacy_id = InventoryService.get_item_by_legacy_id(1001)
+        self.assertEqual(str(item.price), '19.99')
+        self.assertEqual(by_legacy_id.id, self.item.id)
+
+    @override_settings(CATALOG_CACHE_REFRESH_INTERVAL=3600)
+    def test_catalog_cache_invalidated_on_save(self):
+        InventoryService.get_item_by_id(self.item.id)
+        self.item.price = 24.99
+        self.item.save()
+        item = InventoryService.get_item_by_id(self.item.id)
+        self.assertEqual(str(item.price), '24.99')
+
+        self.item.delete()
+        with self.assertRaises(Item.DoesNotExist):
+            InventoryService.get_item_by_id(item.id)
+
+    def test_catalog_cache_refresh_picks_up_bulk_updates(self):
+        InventoryService.get_item_by_id(self.item.id)
+        Item.objects.filter(id=self.item.id).update(price=9.99, updated_at=timezone.now())
+        InventoryService._catalog.refresh()
+        self.assertEqual(str(InventoryService.get_item_by_id(self.item.id).price), '9.99')
+
+
+class StockConcurrencyTest(TransactionTestCase):
+    """Several registers selling the same items at once must never oversell"""
+
+    REGISTERS = 8
+
+    def test_concurrent_decrements_never_oversell(self):
+        hot = Item.objects.create(legacy_item_id='1001', name='Hot Item', price=1.00, quantity=60)
+        warm = Item.objects.create(legacy_item_id='1002', name='Warm Item', price=1.00, quantity=45)
+        sold = {hot.id: [], warm.id: []}
+        lock = threading.Lock()
+
+        def register(index):
+            basket = {hot.id: 1 + index % 3, warm.id: 1 + index % 2}
+            try:
+                while True:
+                    try:
+                        results = InventoryService.decrement_stock(basket)
+                    except OperationalError:
+                        # The test database serializes writers; retry like a busy register would
+                        time.sleep(0.001)
+                        continue
+                    if not all(results.values()):
+                        break
+                    with lock:
+                        for item_id, amount in basket.items():
+                            sold[item_id].append(amount)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=register, args=(i,)) for i in range(self.REGISTERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for item, initial in ((hot, 60), (warm, 45)):
+            item.refresh_from_db()
+            self.assertGreaterEqual(item.quantity, 0)
+            self.assertEqual(sum(sold[item.id]), initial - item.quantity)
+
+
+class ChangeBusTest(TestCase):
+    def setUp(self):
+        self.bus = ChangeBus(history=3)
+
+    def test_subscribers_get_published_events(self):
+        subscription, resumed = self.bus.subscribe()
+        self.assertFalse(resumed)
+        self.bus.publish([('item', {'id': 1}), ('delete', {'id': 2})])
+        events, overflowed = subscription.get(timeout=0)
+        self.assertEqual([(event.kind, event.data) for event in events], [('item', {'id': 1}), ('delete', {'id': 2})])
+        self.assertFalse(overflowed)
+        self.bus.unsubscribe(subscription)
+        self.assertFalse(self.bus.has_subscribers)
+
+    def test_resume_replays_missed_events(self):
+        self.bus.publish([('item', {'id': 1})])
+        last_seen = self.bus.position
+        self.bus.publish([('item', {'id': 2}), ('item', {'id': 3})])
+        subscription, resumed = self.bus.subscribe(last_seen)
+        self.assertTrue(resumed)
+        self.assertEqual([event.data['id'] for event in subscription.get(timeout=0)[0]], [2, 3])
+
+    def test_cannot_resume_past_history_or_from_another_process(self):
+        self.bus.publish([('item', {'id': 1})])
+        last_seen = self.bus.position
+        self.bus.publish([('item', {'id': item_id}) for item_id in range(2, 6)])
+        self.assertFalse(self.bus.subscribe(last_seen)[1])
+        self.assertFalse(self.bus.subscribe(ChangeBus().position)[1])
+        self.assertFalse(self.bus.subscribe('garbage')[1])
+
+    def test_slow_subscriber_overflows_instead_of_growing(self):
+        subscription, _ = self.bus.subscribe(maxsize=2)
+        self.bus.publish([('item', {'id': item_id}) for item_id in range(5)])
+        self.assertLessEqual(len(subscription), 2)
+        events, overflowed = subscription.get(timeout=0)
+        self.assertTrue(overflowed)
+        self.assertEqual(events[-1].data['id'], 4)
+
+
+class ItemChangePublishingTest(TransactionTestCase):
+    def setUp(self):
+        self.item = Item.objects.create(legacy_item_id='1001', name='Test Item', price=19.99, quantity=50)
+        self.subscription, _ = InventoryService.subscribe_changes()
+
+    def tearDown(self):
+        InventoryService.unsubscribe_changes(self.subscription)
+        InventoryService.clear_catalog_cache()
+
+    def test_stock_changes_are_published_after_commit(self):
+        with transaction.atomic():
+            InventoryService.decrement_stock({self.item.id: 3})
+            self.assertEqual(self.subscription.get(timeout=0)[0], [])
+        events, _ = self.subscription.get(timeout=0)
+        self.assertEqual(events[-1].kind, 'item')
+        self.assertEqual(events[-1].data['quantity'], 47)
+        self.assertEqual(events[-1].data['price'], '19.99')
+
+    def test_rolled_back_changes_are_not_published(self):
+        with transaction.atomic():
+            InventoryService.decrement_stock({self.item.id: 3})
+            transaction.set_rollback(True)
+        self.assertEqual(self.subscription.get(timeout=0)[0], [])
+
+    def test_deletions_are_published(self):
+        item_id = self.item.id
+        self.item.delete()
+        events, _ = self.subscription.get(timeout=0)
+        self.assertEqual((events[-1].kind, events[-1].data), ('delete', {'id': item_id}))
+
+
 class TransactionServiceTest(TestCase):
     def setUp(self):
         self.employee = Employee.objects.create(
@@ -100,6 +422,81 @@ class TransactionServiceTest(TestCase):
         self.item.refresh_from_db()
         self.assertEqual(self.item.quantity, initial_quantity - 2)
 
+    def test_create_sale_with_coupon(self):
+        CouponService.invalidate()
+        Coupon.objects.create(code='SAVE10', discount_percentage=10)
+        transaction = TransactionService.create_sale(
+            employee_id=self.employee.id,
+            items_data=[{'item_id': self.item.id, 'quantity': 2}],
+            coupon_code='SAVE10'
+        )
+        # $20 - 10% = $18, + 6% tax = $19.08
+        self.assertAlmostEqual(float(transaction.total_amount), 19.08, places=2)
+        self.assertTrue(transaction.discount_applied)
+
+    def test_create_sale_with_multiple_lines(self):
+        other = Item.objects.create(legacy_item_id='1002', name='Other Item', price=5.00, quantity=4)
+        items_data = [
+            {'item_id': self.item.id, 'quantity': 2},
+            {'item_id': other.id, 'quantity': 3},
+            {'item_id': self.item.id, 'quantity': 1},
+        ]
+        transaction = TransactionService.create_sale(
+            employee_id=self.employee.id,
+            items_data=items_data
+        )
+        self.assertEqual(transaction.items.count(), 3)
+        # (3 * $10 + 3 * $5) = $45, + 6% tax = $47.70
+        self.assertAlmostEqual(float(transaction.total_amount), 47.70, places=2)
+        self.item.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.item.quantity, 7)
+        self.assertEqual(other.quantity, 1)
+
+    @override_settings(CATALOG_CACHE_REFRESH_INTERVAL=3600)
+    def test_create_sale_query_count_is_constant(self):
+        items = [
+            Item.objects.create(legacy_item_id=str(2000 + i), name=f'Bulk {i}', price=1.00, quantity=5)
+            for i in range(20)
+        ]
+        with self.assertNumQueries(9):
+            TransactionService.create_sale(
+                employee_id=self.employee.id,
+                items_data=[{'item_id': items[0].id, 'quantity': 1}]
+            )
+        with self.assertNumQueries(9):
+            TransactionService.create_sale(
+                employee_id=self.employee.id,
+                items_data=[{'item_id': item.id, 'quantity': 1} for item in items]
+            )
+        # Prices now come from the catalog cache
+        with self.assertNumQueries(8):
+            TransactionService.create_sale(
+                employee_id=self.employee.id,
+                items_data=[{'item_id': item.id, 'quantity': 1} for item in items]
+            )
+
+    def test_create_sale_insufficient_quantity(self):
+        items_data = [
+            {'item_id': self.item.id, 'quantity': 6},
+            {'item_id': self.item.id, 'quantity': 5},
+        ]
+        with self.assertRaises(ValueError):
+            TransactionService.create_sale(
+                employee_id=self.employee.id,
+                items_data=items_data
+            )
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 10)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_create_sale_unknown_item(self):
+        with self.assertRaises(Item.DoesNotExist):
+            TransactionService.create_sale(
+                employee_id=self.employee.id,
+                items_data=[{'item_id': self.item.id + 100, 'quantity': 1}]
+            )
+
     def test_create_rental_transaction(self):
         customer = Customer.objects.create(phone_number='1234567890')
         items_data = [{'item_id': self.item.id, 'quantity': 2}]
@@ -122,7 +519,8 @@ class TransactionServiceTest(TestCase):
             items_data=items_data
         )
         rentals = Rental.objects.filter(transaction=transaction)
-        self.assertEqual(rentals.count(), 2)  # 2 items rented
+        self.assertEqual(rentals.count(), 1)  # one record per line
+        self.assertEqual(rentals.first().quantity, 2)  # 2 items rented
 
     def test_process_return(self):
         customer = Customer.objects.create(phone_number='1234567890')
@@ -137,15 +535,89 @@ class TransactionServiceTest(TestCase):
         quantity_after_rental = self.item.quantity
         
         rentals = Rental.objects.filter(transaction=transaction)
-        item_ids = [rental.item.id for rental in rentals]
+        rental_ids = [rental.id for rental in rentals]
         
-        returned = TransactionService.process_return('1234567890', item_ids)
-        self.assertEqual(len(returned), 2)
+        returned = TransactionService.process_return(self.employee.id, '1234567890', rental_ids=rental_ids)
+        self.assertEqual(len(returned), 1)
         self.assertTrue(all(r.is_returned for r in returned))
+        self.assertEqual(returned[0].returned_quantity, 2)
         
         # After return, quantity should be restored
         self.item.refresh_from_db()
         self.assertEqual(self.item.quantity, quantity_after_rental + 2)
+        
+        # The return is recorded as its own transaction
+        return_transaction = Transaction.objects.get(transaction_type='Return')
+        self.assertEqual(return_transaction.customer, customer)
+        self.assertEqual(list(return_transaction.items.values_list('item_id', 'quantity')), [(self.item.id, 2)])
+
+    def test_process_partial_return(self):
+        items_data = [{'item_id': self.item.id, 'quantity': 3}]
+        TransactionService.create_rental(
+            employee_id=self.employee.id,
+            customer_phone='1234567890',
+            items_data=items_data
+        )
+
+        returned = TransactionService.process_return(
+            self.employee.id, '1234567890', items_data=[{'item_id': self.item.id, 'quantity': 2}]
+        )
+        self.assertEqual(len(returned), 1)
+        self.assertFalse(returned[0].is_returned)
+        self.assertEqual(returned[0].outstanding_quantity, 1)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 9)
+
+        with self.assertRaises(ValueError):
+            TransactionService.process_return(
+                self.employee.id, '1234567890', items_data=[{'item_id': self.item.id, 'quantity': 2}]
+            )
+
+        returned = TransactionService.process_return(
+            self.employee.id, '1234567890', rental_ids=[returned[0].id]
+        )
+        self.assertTrue(returned[0].is_returned)
+        self.assertEqual(returned[0].returned_quantity, 3)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 10)
+
+    def test_process_return_rejects_empty_returns(self):
+        TransactionService.create_rental(
+            employee_id=self.employee.id,
+            customer_phone='1234567890',
+            items_data=[{'item_id': self.item.id, 'quantity': 2}]
+        )
+        returns = Transaction.objects.filter(transaction_type='Return')
+        for quantity in (0, -3):
+            with self.assertRaises(ValueError):
+                TransactionService.process_return(
+                    self.employee.id, '1234567890', items_data=[{'item_id': self.item.id, 'quantity': quantity}]
+                )
+        self.assertFalse(returns.exists())
+
+    @override_settings(CATALOG_CACHE_REFRESH_INTERVAL=3600)
+    def test_process_return_query_count_is_constant(self):
+        items = [
+            Item.objects.create(legacy_item_id=str(2000 + i), name=f'Rent {i}', price=1.00, quantity=5)
+            for i in range(5)
+        ]
+        for item in items:
+            TransactionService.create_rental(
+                employee_id=self.employee.id,
+                customer_phone='1234567890',
+                items_data=[{'item_id': item.id, 'quantity': 2}]
+            )
+
+        # Includes recounting the customer's activity summary (aggregate + update)
+        with self.assertNumQueries(12):
+            TransactionService.process_return(
+                self.employee.id, '1234567890', items_data=[{'item_id': items[0].id, 'quantity': 1}]
+            )
+        with self.assertNumQueries(12):
+            TransactionService.process_return(
+                self.employee.id, '1234567890',
+                items_data=[{'item_id': item.id, 'quantity': 1} for item in items]
+            )
 
 
 class RentalServiceTest(TestCase):
@@ -201,3 +673,330 @@ class RentalServiceTest(TestCase):
         has_outstanding = RentalService.check_customer_has_outstanding_returns('1234567890')
         self.assertTrue(has_outstanding)
 
+
+    def test_customer_lookups_run_one_query(self):
+        TransactionService.create_rental(
+            employee_id=self.employee.id,
+            customer_phone='1234567890',
+            items_data=[{'item_id': self.item.id, 'quantity': 1}]
+        )
+        RentalService.invalidate_customer_ids()
+        
+        # Joined on the phone number while the customer ID is not cached
+        with self.assertNumQueries(1):
+            self.assertTrue(RentalService.check_customer_has_outstanding_returns('1234567890'))
+        # Then by the cached customer ID, without the join
+        with self.assertNumQueries(1):
+            rentals = list(RentalService.get_active_rentals('1234567890'))
+        self.assertEqual(len(rentals), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(RentalService.get_customer_rentals('1234567890')), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(RentalService.get_overdue_rentals('1234567890')), [])
+
+    def test_unknown_customer_has_no_rentals(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(RentalService.check_customer_has_outstanding_returns('0000000000'))
+        self.assertEqual(list(RentalService.get_active_rentals('0000000000')), [])
+        self.assertEqual(list(RentalService.get_customer_rentals('0000000000')), [])
+
+    def test_phone_change_invalidates_customer_id_cache(self):
+        TransactionService.create_rental(
+            employee_id=self.employee.id,
+            customer_phone='1234567890',
+            items_data=[{'item_id': self.item.id, 'quantity': 1}]
+        )
+        customer = Customer.objects.get(phone_number='1234567890')
+        customer.phone_number = '5555555555'
+        customer.save()
+        self.assertEqual(list(RentalService.get_active_rentals('1234567890')), [])
+        self.assertEqual(len(RentalService.get_active_rentals('5555555555')), 1)
+
+    def test_activity_summary_follows_rentals_and_returns(self):
+        other = Item.objects.create(legacy_item_id='1002', name='Other Item', price=5.00, quantity=10)
+        TransactionService.create_rental(
+            employee_id=self.employee.id,
+            customer_phone='1234567890',
+            items_data=[{'item_id': self.item.id, 'quantity': 2}, {'item_id': other.id, 'quantity': 1}]
+        )
+        activity = RentalService.get_customer_activity('1234567890')
+        self.assertEqual(
+            (activity.open_rentals, activity.held_units, activity.lifetime_rentals),
+            (2, 3, 2)
+        )
+        self.assertEqual(activity.earliest_due_date, date.today() + timedelta(days=7))
+        
+        TransactionService.process_return(
+            self.employee.id, '1234567890', items_data=[{'item_id': self.item.id, 'quantity': 2}]
+        )
+        activity = RentalService.get_customer_activity('1234567890')
+        self.assertEqual(
+            (activity.open_rentals, activity.held_units, activity.lifetime_rentals),
+            (1, 1, 2)
+        )
+        
+        # A rebuild from the rentals table gives the same counters
+        RentalService.rebuild_customer_activity()
+        rebuilt = RentalService.get_customer_activity('1234567890')
+        self.assertEqual(
+            (rebuilt.open_rentals, rebuilt.held_units, rebuilt.lifetime_rentals, rebuilt.earliest_due_date),
+            (1, 1, 2, activity.earliest_due_date)
+        )
+
+    def test_outstanding_check_is_one_primary_key_read(self):
+        TransactionService.create_rental(
+            employee_id=self.employee.id,
+            customer_phone='1234567890',
+            items_data=[{'item_id': self.item.id, 'quantity': 1}]
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(RentalService.check_customer_has_outstanding_returns('1234567890'))
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertIn('"customer_activity"."customer_id" =', context.captured_queries[0]['sql'])
+        self.assertNotIn('JOIN', context.captured_queries[0]['sql'])
+
+    def test_refresh_overdue_counts(self):
+        TransactionService.create_rental(
+            employee_id=self.employee.id,
+            customer_phone='1234567890',
+            items_data=[{'item_id': self.item.id, 'quantity': 1}]
+        )
+        self.assertEqual(RentalService.refresh_overdue_counts(), 0)
+        
+        # Eight days later the rental is past due
+        later = date.today() + timedelta(days=8)
+        self.assertEqual(RentalService.refresh_overdue_counts(today=later), 1)
+        activity = RentalService.get_customer_activity('1234567890')
+        self.assertEqual(activity.overdue_rentals, 1)
+        self.assertTrue(activity.has_overdue(today=later))
+        self.assertFalse(activity.has_overdue())
+
+    def test_overdue_status_is_computed_at_query_time(self):
+        TransactionService.create_rental(
+            employee_id=self.employee.id,
+            customer_phone='1234567890',
+            items_data=[{'item_id': self.item.id, 'quantity': 1}]
+        )
+        # Move the due date back without save(), leaving the stored column stale
+        Rental.objects.update(due_date=date.today() - timedelta(days=3), days_overdue=None)
+        
+        overdue = list(RentalService.get_overdue_rentals())
+        self.assertEqual(len(overdue), 1)
+        self.assertEqual(overdue[0].current_days_overdue, 3)
+        self.assertTrue(overdue[0].currently_overdue)
+        self.assertIsNone(overdue[0].days_overdue)
+        self.assertEqual(list(RentalService.get_overdue_rentals('1234567890')), overdue)
+
+    def test_refresh_days_overdue_in_one_update(self):
+        TransactionService.create_rental(
+            employee_id=self.employee.id,
+            customer_phone='1234567890',
+            items_data=[{'item_id': self.item.id, 'quantity': 1}]
+        )
+        Rental.objects.update(due_date=date.today() - timedelta(days=5))
+        
+        with self.assertNumQueries(1):
+            updated = RentalService.refresh_days_overdue()
+        self.assertEqual(updated, 1)
+        self.assertEqual(Rental.objects.get().days_overdue, 5)
+        
+        # A later due date clears the stored value again
+        Rental.objects.update(due_date=date.today() + timedelta(days=1))
+        RentalService.refresh_days_overdue()
+        self.assertIsNone(Rental.objects.get().days_overdue)
+
+
+class ReportingServiceTest(TestCase):
+    def setUp(self):
+        self.employee = Employee.objects.create(
+            username='cashier1',
+            first_name='Cashier',
+            last_name='One',
+            position='Cashier'
+        )
+        self.item = Item.objects.create(legacy_item_id='1001', name='Test Item', price=10.00, quantity=50)
+        self.other = Item.objects.create(legacy_item_id='1002', name='Other Item', price=4.00, quantity=50)
+        self.today = timezone.localdate()
+        # Running on-commit callbacks would hand audit entries to the background writer
+        patcher = mock.patch.object(AuditService, 'log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def checkout(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionService.create_sale(
+                employee_id=self.employee.id,
+                items_data=[{'item_id': self.item.id, 'quantity': 2}, {'item_id': self.other.id, 'quantity': 1}]
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionService.create_sale(
+                employee_id=self.employee.id,
+                items_data=[{'item_id': self.item.id, 'quantity': 1}]
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionService.create_rental(
+                employee_id=self.employee.id,
+                customer_phone='1234567890',
+                items_data=[{'item_id': self.other.id, 'quantity': 3}]
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionService.process_return(
+                self.employee.id, '1234567890', items_data=[{'item_id': self.other.id, 'quantity': 1}]
+            )
+
+    def snapshot(self):
+        return (
+            sorted(DailyTransactionTotal.objects.values_list('day', 'transaction_type', 'transaction_count', 'total_amount')),
+            sorted(DailyEmployeeTotal.objects.values_list('day', 'employee_id', 'transaction_count', 'total_amount')),
+            sorted(DailyItemTotal.objects.values_list('day', 'transaction_type', 'item_id', 'quantity', 'revenue')),
+        )
+
+    def test_transactions_update_rollups_on_commit(self):
+        self.checkout()
+        
+        summary = ReportingService.sales_summary(self.today, self.today)
+        sales = Transaction.objects.filter(transaction_type='Sale')
+        self.assertEqual(summary['count'], 2)
+        self.assertEqual(summary['total'], sum(sale.total_amount for sale in sales))
+        
+        top = ReportingService.top_items(self.today, self.today)
+        self.assertEqual([(row['item__name'], row['total_quantity']) for row in top],
+                         [('Test Item', 3), ('Other Item', 1)])
+        returned = ReportingService.top_items(self.today, self.today, transaction_type='Return')
+        self.assertEqual([(row['item_id'], row['total_quantity']) for row in returned], [(self.other.id, 1)])
+        
+        performance = ReportingService.employee_performance(self.today, self.today)
+        self.assertEqual(len(performance), 1)
+        self.assertEqual(performance[0]['transaction_count'], 4)
+
+    def test_incremental_rollups_match_rebuild(self):
+        self.checkout()
+        incremental = self.snapshot()
+        
+        for model in (DailyTransactionTotal, DailyEmployeeTotal, DailyItemTotal):
+            model.objects.all().delete()
+        ReportingService.rebuild_rollups()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_rollups_add_up_the_stored_totals(self):
+        item = Item.objects.create(legacy_item_id='1003', name='Taxed Item', price=10.99, quantity=50)
+        for _ in range(7):
+            with self.captureOnCommitCallbacks(execute=True):
+                TransactionService.create_sale(employee_id=self.employee.id, items_data=[{'item_id': item.id, 'quantity': 1}])
+        
+        stored = Transaction.objects.aggregate(total=Sum('total_amount'))['total']
+        self.assertEqual(stored, Decimal('81.55'))
+        summary = ReportingService.sales_summary(self.today, self.today)
+        self.assertEqual(summary['total'], stored)
+        self.assertEqual(summary['avg'], stored / 7)
+
+    def test_rollups_not_written_when_transaction_rolls_back(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError):
+                TransactionService.create_sale(
+                    employee_id=self.employee.id,
+                    items_data=[{'item_id': self.item.id, 'quantity': 500}]
+                )
+        self.assertFalse(DailyTransactionTotal.objects.exists())
+
+    def test_report_queries_do_not_grow_with_transactions(self):
+        self.checkout()
+        with self.assertNumQueries(1):
+            ReportingService.sales_summary(self.today - timedelta(days=365), self.today)
+        self.checkout()
+        with self.assertNumQueries(1):
+            summary = ReportingService.sales_summary(self.today - timedelta(days=365), self.today)
+        self.assertEqual(summary['count'], 4)
+        self.assertEqual(DailyTransactionTotal.objects.filter(transaction_type='Sale').count(), 1)
+
+    def test_backfill_command_rejects_bad_dates(self):
+        for value in ('yesterday', '2024-02-30'):
+            with self.assertRaises(CommandError):
+                call_command('backfill_report_rollups', start=value)
+
+    def test_rebuild_limited_to_range(self):
+        self.checkout()
+        yesterday = self.today - timedelta(days=1)
+        DailyTransactionTotal.objects.create(day=yesterday, transaction_type='Sale', transaction_count=9, total_amount=90)
+        
+        ReportingService.rebuild_rollups(yesterday, yesterday)
+        self.assertFalse(DailyTransactionTotal.objects.filter(day=yesterday).exists())
+        self.assertEqual(ReportingService.sales_summary(self.today, self.today)['count'], 2)
+
+    def test_detail_rows_stream_in_one_query(self):
+        self.checkout()
+        self.checkout()
+        with self.assertNumQueries(1):
+            sales = list(ReportingService.sales_rows(self.today, self.today))
+        self.assertEqual(len(sales), 4)
+        self.assertEqual(sales[0][0], self.today)
+        self.assertEqual(sales[0][2], 'cashier1')
+        self.assertEqual([row[1] for row in sales], sorted(row[1] for row in sales))
+        
+        with self.assertNumQueries(1):
+            rentals = list(ReportingService.rental_rows(self.today, self.today))
+        self.assertEqual(len(rentals), 2)
+        self.assertEqual(rentals[0][1:5], ('Other Item', '1234567890', 3, 2))
+        self.assertEqual(rentals[0][6], 'No')
+        
+        self.assertEqual(ReportingService.rental_summary(self.today, self.today),
+                         {'total': 6, 'active': 4, 'returned': 2, 'overdue': 0})
+        self.assertEqual(ReportingService.top_rented_items(self.today, self.today)[0]['count'], 6)
+
+    def test_inventory_summary_and_rows(self):
+        Item.objects.create(legacy_item_id='1003', name='Empty', price=2.50, quantity=0)
+        Item.objects.create(legacy_item_id='1004', name='Low', price=1.00, quantity=3)
+        with self.assertNumQueries(1):
+            summary = ReportingService.inventory_summary()
+        self.assertEqual(summary, {'total': 4, 'total_value': Decimal('703.00'), 'low_stock': 2, 'out_of_stock': 1})
+        self.assertEqual([item['name'] for item in ReportingService.low_stock_items()], ['Empty', 'Low'])
+        
+        rows = {row[1]: row for row in ReportingService.inventory_rows()}
+        self.assertEqual(rows['Empty'][4:], (Decimal('0.00'), 'Out of Stock'))
+        self.assertEqual(rows['Low'][4:], (Decimal('3.00'), 'Low Stock'))
+        self.assertEqual(rows['Test Item'][4:], (Decimal('500.00'), 'In Stock'))
+
+
+class SingleFlightTest(TestCase):
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_concurrent_calls_share_one_run(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+        
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 'report'
+        
+        def request():
+            results.append(flights.do('sales', compute))
+        
+        threads = [threading.Thread(target=request) for _ in range(5)]
+        threads[0].start()
+        self.wait_for(lambda: flights.stats()['in_flight'] == 1)
+        for thread in threads[1:]:
+            thread.start()
+        self.wait_for(lambda: flights.stats()['shared'] == 4)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['report'] * 5)
+        self.assertEqual(flights.stats(), {'in_flight': 0, 'runs': 1, 'shared': 4})
+        
+        # Once finished, the next call runs again
+        self.assertEqual(flights.do('sales', lambda: 'fresh'), 'fresh')
+
+    def test_error_is_shared_and_not_kept(self):
+        flights = SingleFlight()
+        with self.assertRaises(ValueError):
+            flights.do('sales', mock.Mock(side_effect=ValueError('boom')))
+        self.assertEqual(flights.do('sales', lambda: 'ok'), 'ok')
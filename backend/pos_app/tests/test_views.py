@@ -1,10 +1,30 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, LiveServerTestCase, override_settings
 from django.urls import reverse
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+import io
 import json
+import urllib.error
+import urllib.request
+from unittest import mock
+from datetime import date, datetime, timedelta
+from django.utils import timezone
 from pos_app.models.employee import Employee
 from pos_app.models.item import Item
 from pos_app.models.customer import Customer
 from pos_app.models.rental import Rental
+from pos_app.models.transaction import Transaction, TransactionItem
+from pos_app.models.item_tombstone import ItemTombstone
+from django.core.cache import cache
+from pos_app.caching import conditional_get_stats
+from pos_app.services.audit_service import AuditService
+from pos_app.services.inventory_service import InventoryService
+from pos_app.services.rental_service import RentalService
+from pos_app.services.reporting_service import ReportingService
+from pos_app.services.transaction_service import TransactionService
+from pos_app.tests.helpers import QueryCountAssertionsMixin
 
 
 class AuthViewsTest(TestCase):
@@ -97,6 +117,229 @@ class ItemViewsTest(TestCase):
             self.assertGreater(len(items), 0)
 
 
+@override_settings(CATALOG_CACHE_REFRESH_INTERVAL=3600)
+class ItemLookupViewsTest(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        InventoryService.clear_catalog_cache()
+        self.client = Client()
+        employee = Employee.objects.create(
+            username='cashier1',
+            first_name='Cashier',
+            last_name='One',
+            position='Cashier'
+        )
+        employee.set_password('pass123')
+        employee.save()
+        self.item = Item.objects.create(legacy_item_id='1001', name='Test Item', price=19.99, quantity=50)
+        self.other = Item.objects.create(legacy_item_id='1002', name='Other Item', price=5.00, quantity=3)
+        self.client.post('/api/auth/login/', {
+            'username': 'cashier1',
+            'password': 'pass123'
+        }, content_type='application/json')
+
+    def tearDown(self):
+        # The warm catalog would otherwise outlive this test's rolled-back rows
+        InventoryService.clear_catalog_cache()
+
+    def test_lookup_many_codes(self):
+        response = self.client.get('/api/items/lookup/?codes=1001,1002,9999&code=abc')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(
+            data['items'],
+            [
+                {'code': '1001', 'id': self.item.id, 'name': 'Test Item', 'price': '19.99', 'quantity': 50},
+                {'code': '1002', 'id': self.other.id, 'name': 'Other Item', 'price': '5.00', 'quantity': 3},
+            ]
+        )
+        self.assertEqual(sorted(data['missing']), ['9999', 'abc'])
+
+    def test_lookup_by_post(self):
+        response = self.client.post('/api/items/lookup/', {'codes': [1002]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['items'][0]['id'], self.other.id)
+
+    def test_lookup_requires_codes(self):
+        self.assertEqual(self.client.get('/api/items/lookup/').status_code, 400)
+
+    def test_lookup_rejects_nested_codes(self):
+        for codes in ([[1001]], [{'code': 1001}], {'code': 1001}, [True]):
+            response = self.client.post('/api/items/lookup/', {'codes': codes}, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_warm_lookup_runs_no_item_queries(self):
+        self.client.get('/api/items/lookup/?codes=1001')
+        # Only the session is read once the catalog is warm, found or not
+        self.assertFixedQueryCount(self.client, '/api/items/lookup/?codes=1001,1002,9999', 1)
+
+    def test_lookup_sees_saved_changes(self):
+        self.client.get('/api/items/lookup/?codes=1001')
+        self.item.price = 21.50
+        self.item.save()
+        data = json.loads(self.client.get('/api/items/lookup/?codes=1001').content)
+        self.assertEqual(data['items'][0]['price'], '21.50')
+
+    def test_lookup_drops_items_deleted_by_other_workers(self):
+        self.client.get('/api/items/lookup/?codes=1002')
+        # Another worker's delete leaves only its tombstone behind
+        with mock.patch.object(InventoryService, 'invalidate_catalog'):
+            self.other.delete()
+        InventoryService._catalog.refresh()
+        data = json.loads(self.client.get('/api/items/lookup/?codes=1001,1002').content)
+        self.assertEqual([item['code'] for item in data['items']], ['1001'])
+        self.assertEqual(data['missing'], ['1002'])
+
+
+@override_settings(ITEM_CHANGES_SETTLE_SECONDS=0)
+class ItemChangesViewsTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        employee = Employee.objects.create(
+            username='cashier1',
+            first_name='Cashier',
+            last_name='One',
+            position='Cashier'
+        )
+        employee.set_password('pass123')
+        employee.save()
+        self.item = Item.objects.create(legacy_item_id='1001', name='Test Item', price=19.99, quantity=50)
+        self.other = Item.objects.create(legacy_item_id='1002', name='Other Item', price=5.00, quantity=3)
+        self.client.post('/api/auth/login/', {
+            'username': 'cashier1',
+            'password': 'pass123'
+        }, content_type='application/json')
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params['cursor'] = cursor
+        return self.client.get('/api/items/changes/', params)
+
+    def test_full_sync_in_pages(self):
+        first = json.loads(self.sync(limit=1).content)
+        self.assertEqual([item['id'] for item in first['items']], [self.item.id])
+        self.assertEqual(first['items'][0]['price'], '19.99')
+        self.assertTrue(first['has_more'])
+        second = json.loads(self.sync(first['cursor'], limit=1).content)
+        self.assertEqual([item['id'] for item in second['items']], [self.other.id])
+        last = json.loads(self.sync(second['cursor']).content)
+        self.assertEqual(last['items'], [])
+        self.assertFalse(last['has_more'])
+
+    def test_returns_only_later_changes(self):
+        cursor = json.loads(self.sync().content)['cursor']
+        self.other.quantity = 7
+        self.other.save()
+        data = json.loads(self.sync(cursor).content)
+        self.assertEqual([(item['id'], item['quantity']) for item in data['items']], [(self.other.id, 7)])
+        self.assertEqual(data['deleted'], [])
+
+    def test_deleted_items_come_back_as_tombstones(self):
+        cursor = json.loads(self.sync().content)['cursor']
+        item_id = self.item.id
+        self.item.delete()
+        data = json.loads(self.sync(cursor).content)
+        self.assertEqual(data['deleted'], [{'id': item_id, 'legacy_item_id': 1001}])
+        self.assertEqual(json.loads(self.sync(data['cursor']).content)['deleted'], [])
+
+    def test_full_sync_skips_old_tombstones(self):
+        Item.objects.create(legacy_item_id='1003', name='Gone', price=1, quantity=1).delete()
+        self.assertEqual(json.loads(self.sync().content)['deleted'], [])
+
+    def test_regular_polls_do_not_expire_without_deletions(self):
+        # An old deletion, then none for longer than the tombstone retention
+        Item.objects.create(legacy_item_id='1003', name='Gone', price=1, quantity=1).delete()
+        now = timezone.now()
+        ItemTombstone.objects.update(deleted_at=now - timedelta(days=45))
+        
+        cursor = json.loads(self.sync().content)['cursor']
+        with mock.patch('pos_app.services.inventory_service.timezone') as clock:
+            for days in range(10, 100, 10):
+                clock.now.return_value = now + timedelta(days=days)
+                response = self.sync(cursor)
+                self.assertEqual(response.status_code, 200)
+                cursor = json.loads(response.content)['cursor']
+
+    def test_invalid_and_expired_cursors(self):
+        self.assertEqual(self.sync('not-a-cursor').status_code, 400)
+        self.assertEqual(self.sync(limit='many').status_code, 400)
+        cursor = json.loads(self.sync().content)['cursor']
+        with override_settings(ITEM_TOMBSTONE_RETENTION_DAYS=0):
+            self.assertEqual(self.sync(cursor).status_code, 410)
+
+
+@override_settings(ITEM_STREAM_MAX_SECONDS=5, ITEM_STREAM_HEARTBEAT_SECONDS=0.2)
+class ItemStreamViewsTest(LiveServerTestCase):
+    def setUp(self):
+        employee = Employee.objects.create(
+            username='cashier1',
+            first_name='Cashier',
+            last_name='One',
+            position='Cashier'
+        )
+        employee.set_password('pass123')
+        employee.save()
+        self.item = Item.objects.create(legacy_item_id='1001', name='Test Item', price=19.99, quantity=50)
+        client = Client()
+        client.post('/api/auth/login/', {
+            'username': 'cashier1',
+            'password': 'pass123'
+        }, content_type='application/json')
+        self.session_cookie = f"sessionid={client.cookies['sessionid'].value}"
+
+    def tearDown(self):
+        # Drain the audit writer (including a batch it is holding) before the tables are flushed
+        AuditService.get_writer().stop()
+        InventoryService.clear_catalog_cache()
+
+    def open_stream(self, last_event_id=None):
+        request = urllib.request.Request(f'{self.live_server_url}/api/items/stream/', headers={
+            'Accept': 'text/event-stream',
+            'Cookie': self.session_cookie,
+        })
+        if last_event_id:
+            request.add_header('Last-Event-ID', last_event_id)
+        return urllib.request.urlopen(request, timeout=5)
+
+    def read_event(self, stream, kind):
+        """Read events until one of the given kind arrives; return (id, data)"""
+        event_id = event_kind = None
+        for line in stream:
+            line = line.decode().rstrip('\n')
+            if line.startswith('id: '):
+                event_id = line[4:]
+            elif line.startswith('event: '):
+                event_kind = line[7:]
+            elif line.startswith('data: ') and event_kind == kind:
+                return event_id, json.loads(line[6:])
+        self.fail(f'stream ended before a {kind} event')
+
+    def test_requires_auth(self):
+        request = urllib.request.Request(f'{self.live_server_url}/api/items/stream/')
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(request, timeout=5)
+        self.assertEqual(context.exception.code, 403)
+
+    def test_pushes_committed_stock_changes_and_resumes(self):
+        with self.open_stream() as stream:
+            self.assertEqual(stream.headers['Content-Type'], 'text/event-stream')
+            self.read_event(stream, 'ready')
+            InventoryService.decrement_stock({self.item.id: 2})
+            event_id, data = self.read_event(stream, 'item')
+        self.assertEqual((data['id'], data['quantity'], data['price']), (self.item.id, 48, '19.99'))
+
+        # Changes made while disconnected are replayed on reconnect
+        item = Item.objects.get(id=self.item.id)
+        item.price = 21.50
+        item.save()
+        with self.open_stream(event_id) as stream:
+            self.assertEqual(self.read_event(stream, 'ready')[1], {'resumed': True})
+            self.assertEqual(self.read_event(stream, 'item')[1]['price'], '21.50')
+
+    def test_unknown_cursor_resets(self):
+        with self.open_stream('elsewhere-12') as stream:
+            self.assertEqual(self.read_event(stream, 'reset')[1], {'reason': 'resume'})
+
+
 class EmployeeViewsTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -141,6 +384,50 @@ class EmployeeViewsTest(TestCase):
         # May require additional permissions
         self.assertIn(response.status_code, [201, 403, 400])
 
+    def login(self, client, username, password):
+        response = client.post('/api/auth/login/', {
+            'username': username,
+            'password': password
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cashier_cannot_list_employees(self):
+        self.login(self.client, 'cashier', 'cashier123')
+        response = self.client.get('/api/employees/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_admin_check_does_not_load_employee(self):
+        self.login(self.client, 'admin', 'admin123')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/employees/')
+        self.assertEqual(response.status_code, 200)
+        # Only the listing itself reads the employees table
+        employee_queries = [q for q in context.captured_queries if '"employees"' in q['sql']]
+        self.assertEqual(len(employee_queries), 1)
+
+    def test_demotion_ends_active_sessions(self):
+        other_admin = Employee.objects.create(
+            username='admin2',
+            first_name='Other',
+            last_name='Admin',
+            position='Admin'
+        )
+        other_admin.set_password('admin456')
+        other_admin.save()
+        other_client = Client()
+        self.login(self.client, 'admin', 'admin123')
+        self.login(other_client, 'admin2', 'admin456')
+        self.assertEqual(other_client.get('/api/employees/').status_code, 200)
+
+        response = self.client.put(
+            f'/api/employees/{other_admin.id}/',
+            {'position': 'Cashier'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(other_client.get('/api/employees/').status_code, 403)
+        self.assertEqual(self.client.get('/api/employees/').status_code, 200)
+
 
 class TransactionViewsTest(TestCase):
     def setUp(self):
@@ -209,3 +496,493 @@ class TransactionViewsTest(TestCase):
             data = json.loads(response.content)
             self.assertIsInstance(data, list)
 
+
+    def test_process_return_by_rental_ids(self):
+        login_response = self.client.post('/api/auth/login/', {
+            'username': 'cashier1',
+            'password': 'pass123'
+        }, content_type='application/json')
+        self.assertEqual(login_response.status_code, 200)
+
+        self.client.post('/api/transactions/rental/', {
+            'customer_phone': '1234567890',
+            'items': [{'item_id': self.item.id, 'quantity': 2}]
+        }, content_type='application/json')
+        rental = Rental.objects.get(customer=self.customer)
+
+        response = self.client.post('/api/transactions/return/', {
+            'customer_phone': '1234567890',
+            'rental_ids': [rental.id]
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(data[0]['returned_quantity'], 2)
+        self.assertTrue(data[0]['is_returned'])
+
+    def test_process_return_rejects_non_positive_quantities(self):
+        self.client.post('/api/auth/login/', {
+            'username': 'cashier1',
+            'password': 'pass123'
+        }, content_type='application/json')
+        self.client.post('/api/transactions/rental/', {
+            'customer_phone': '1234567890',
+            'items': [{'item_id': self.item.id, 'quantity': 2}]
+        }, content_type='application/json')
+
+        for quantity in (0, -3):
+            response = self.client.post('/api/transactions/return/', {
+                'customer_phone': '1234567890',
+                'items': [{'item_id': self.item.id, 'quantity': quantity}]
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/transactions/return/', {
+            'customer_phone': '1234567890'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.filter(transaction_type='Return').exists())
+
+
+class BulkOutstandingRentalsViewsTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.employee = Employee.objects.create(
+            username='cashier1',
+            first_name='Cashier',
+            last_name='One',
+            position='Cashier'
+        )
+        self.employee.set_password('pass123')
+        self.employee.save()
+        self.item = Item.objects.create(legacy_item_id='1001', name='Test Item', price=10.00, quantity=100)
+        for phone in ('1111111111', '2222222222', '3333333333'):
+            TransactionService.create_rental(
+                employee_id=self.employee.id,
+                customer_phone=phone,
+                items_data=[{'item_id': self.item.id, 'quantity': 2}]
+            )
+        TransactionService.process_return(
+            self.employee.id, '3333333333', items_data=[{'item_id': self.item.id, 'quantity': 2}]
+        )
+        self.client.post('/api/auth/login/', {
+            'username': 'cashier1',
+            'password': 'pass123'
+        }, content_type='application/json')
+
+    def post(self, body, content_type='application/json', **extra):
+        if content_type == 'application/json':
+            body = json.dumps(body)
+        response = self.client.post(
+            '/api/transactions/outstanding-rentals/bulk/', body, content_type=content_type, **extra
+        )
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content.decode()
+
+    def test_json_array_grouped_by_customer(self):
+        response, content = self.post(['2222222222', '0000000000', '1111111111', '3333333333', '2222222222'])
+        self.assertEqual(response.status_code, 200)
+        groups = json.loads(content)
+        self.assertEqual([group['customer_phone'] for group in groups], ['2222222222', '1111111111'])
+        rental = groups[0]['rentals'][0]
+        self.assertEqual((rental['item_name'], rental['quantity'], rental['days_overdue']), ('Test Item', 2, None))
+        self.assertIs(rental['is_overdue'], False)
+
+    def test_csv_in_and_out(self):
+        response, content = self.post(
+            'customer_phone\n1111111111\n0000000000\n', content_type='text/csv', HTTP_ACCEPT='text/csv'
+        )
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = content.strip().splitlines()
+        self.assertTrue(lines[0].startswith('customer_phone,id,'))
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('1111111111,'))
+
+    @override_settings(BULK_RENTAL_LOOKUP_CHUNK_SIZE=2)
+    def test_one_query_per_chunk(self):
+        phones = ['1111111111', '2222222222', '3333333333'] + [str(4000000000 + i) for i in range(7)]
+        with CaptureQueriesContext(connection) as context:
+            response, content = self.post({'customer_phones': phones})
+        # session, then five chunks of two phones
+        self.assertEqual(len(context.captured_queries), 6)
+        self.assertEqual(len(json.loads(content)), 2)
+
+    def test_rejects_empty_input(self):
+        self.assertEqual(self.post([])[0].status_code, 400)
+        self.assertEqual(self.post({'customer_phones': 'nope'})[0].status_code, 400)
+
+
+class TransactionHistoryViewsTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.employee = Employee.objects.create(
+            username='cashier1',
+            first_name='Cashier',
+            last_name='One',
+            position='Cashier'
+        )
+        self.employee.set_password('pass123')
+        self.employee.save()
+        self.customer = Customer.objects.create(phone_number='1234567890')
+        start = timezone.make_aware(datetime(2024, 3, 1, 12, 0))
+        transactions = []
+        for i in range(25):
+            transactions.append(Transaction(
+                transaction_type='Rental' if i % 5 == 0 else 'Sale',
+                employee=self.employee,
+                customer=self.customer if i % 5 == 0 else None,
+                total_amount=i
+            ))
+        Transaction.objects.bulk_create(transactions)
+        # Pairs of rows share a timestamp so the id tie-break is exercised
+        for index, transaction_id in enumerate(Transaction.objects.order_by('id').values_list('id', flat=True)):
+            Transaction.objects.filter(id=transaction_id).update(
+                created_at=start + timedelta(hours=index // 2)
+            )
+        self.client.post('/api/auth/login/', {
+            'username': 'cashier1',
+            'password': 'pass123'
+        }, content_type='application/json')
+
+    def fetch_all(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.content)
+            ids.extend(row['id'] for row in data['results'])
+            url = data['next']
+        return ids
+
+    def test_pages_cover_every_transaction_once(self):
+        ids = self.fetch_all('/api/transactions/history/?page_size=4')
+        expected = list(Transaction.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_to_earlier_page(self):
+        first = json.loads(self.client.get('/api/transactions/history/?page_size=4').content)
+        second = json.loads(self.client.get(first['next']).content)
+        back = json.loads(self.client.get(second['previous']).content)
+        self.assertEqual([row['id'] for row in back['results']], [row['id'] for row in first['results']])
+        self.assertIsNone(first['previous'])
+
+    def test_filters(self):
+        rentals = self.fetch_all('/api/transactions/history/?transaction_type=Rental')
+        self.assertEqual(len(rentals), 5)
+        by_phone = self.fetch_all('/api/transactions/history/?customer_phone=1234567890')
+        self.assertEqual(sorted(by_phone), sorted(rentals))
+        self.assertEqual(self.fetch_all('/api/transactions/history/?customer_phone=0000000000'), [])
+        by_employee = self.fetch_all(f'/api/transactions/history/?employee={self.employee.id}')
+        self.assertEqual(len(by_employee), 25)
+        # 2024-03-01 covers hours 12..23, i.e. the first 24 rows
+        one_day = self.fetch_all('/api/transactions/history/?date_from=2024-03-01&date_to=2024-03-01')
+        self.assertEqual(len(one_day), 24)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/transactions/history/?transaction_type=Gift').status_code, 400)
+        self.assertEqual(self.client.get('/api/transactions/history/?date_from=March').status_code, 400)
+        self.assertEqual(self.client.get('/api/transactions/history/?cursor=bogus').status_code, 404)
+
+    def test_impossible_date_is_rejected(self):
+        response = self.client.get('/api/transactions/history/?date_from=2024-02-30')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['error'], 'date_from must be a date in YYYY-MM-DD format')
+
+    def test_later_pages_cost_the_same_queries(self):
+        first = self.client.get('/api/transactions/history/?page_size=4')
+        with CaptureQueriesContext(connection) as first_page:
+            self.client.get('/api/transactions/history/?page_size=4')
+        with CaptureQueriesContext(connection) as later_page:
+            self.client.get(json.loads(first.content)['next'])
+        self.assertEqual(len(first_page.captured_queries), len(later_page.captured_queries))
+
+
+class ReportViewsTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.admin = Employee.objects.create(
+            username='admin',
+            first_name='Admin',
+            last_name='User',
+            position='Admin'
+        )
+        self.admin.set_password('admin123')
+        self.admin.save()
+        self.cashier = Employee.objects.create(
+            username='cashier',
+            first_name='Cashier',
+            last_name='User',
+            position='Cashier'
+        )
+        self.cashier.set_password('cashier123')
+        self.cashier.save()
+        self.item = Item.objects.create(legacy_item_id='1001', name='Test Item', price=10.00, quantity=100)
+        for quantity in (1, 2):
+            TransactionService.create_sale(
+                employee_id=self.cashier.id,
+                items_data=[{'item_id': self.item.id, 'quantity': quantity}]
+            )
+        # Rollups are written on commit, which TestCase never reaches
+        ReportingService.rebuild_rollups()
+        self.today = timezone.localdate().isoformat()
+        cache.clear()
+
+    def login(self, username, password):
+        response = self.client.post('/api/auth/login/', {
+            'username': username,
+            'password': password
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_reports_require_admin(self):
+        self.login('cashier', 'cashier123')
+        response = self.client.get('/api/reports/sales/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_sales_report(self):
+        self.login('admin', 'admin123')
+        response = self.client.get('/api/reports/sales/', {'date_from': self.today, 'date_to': self.today})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['summary']['count'], 2)
+        self.assertEqual(data['top_items'][0]['total_quantity'], 3)
+        self.assertEqual(len(data['daily']), 1)
+
+    def test_employee_report(self):
+        self.login('admin', 'admin123')
+        response = self.client.get('/api/reports/employees/')
+        self.assertEqual(response.status_code, 200)
+        employees = response.json()['employees']
+        self.assertEqual([row['employee__username'] for row in employees], ['cashier'])
+        self.assertEqual(employees[0]['transaction_count'], 2)
+
+    def test_report_cached_until_transactions_land(self):
+        self.login('admin', 'admin123')
+        with mock.patch.object(ReportingService, 'build_report', wraps=ReportingService.build_report) as build:
+            first = self.client.get('/api/reports/sales/').json()
+            second = self.client.get('/api/reports/sales/').json()
+            self.assertEqual(build.call_count, 1)
+            self.assertEqual(first, second)
+            
+            TransactionService.create_sale(
+                employee_id=self.cashier.id,
+                items_data=[{'item_id': self.item.id, 'quantity': 1}]
+            )
+            ReportingService.rebuild_rollups()
+            third = self.client.get('/api/reports/sales/').json()
+            self.assertEqual(build.call_count, 2)
+            self.assertEqual(third['summary']['count'], 3)
+            
+            # A different period is a different entry
+            self.client.get('/api/reports/sales/', {'date_from': self.today})
+            self.assertEqual(build.call_count, 3)
+
+    def test_report_cache_sees_writes_from_other_processes(self):
+        self.login('admin', 'admin123')
+        self.client.get('/api/reports/sales/')
+        self.client.get('/api/reports/inventory/')
+
+        # A backfill that only corrects item revenue still invalidates the period
+        TransactionItem.objects.update(subtotal=F('subtotal') + 1)
+        call_command('backfill_report_rollups', stdout=io.StringIO())
+        top_items = self.client.get('/api/reports/sales/').json()['top_items']
+        self.assertEqual(top_items[0]['total_revenue'], 32)
+
+        Item.objects.filter(id=self.item.id).update(quantity=0, updated_at=timezone.now())
+        with override_settings(ITEM_CHANGES_SETTLE_SECONDS=0):
+            summary = self.client.get('/api/reports/inventory/').json()['summary']
+        self.assertEqual(summary['out_of_stock'], 1)
+
+    def test_csv_streams_detail_rows(self):
+        self.login('admin', 'admin123')
+        response = self.client.get('/api/reports/sales/', {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Date,Transaction ID,Employee,Total Amount')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith(f'{self.today},'))
+        
+        response = self.client.get('/api/reports/inventory/', HTTP_ACCEPT='text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[1], '1001,Test Item,10.00,97,970.00,In Stock')
+
+    def test_inventory_report(self):
+        self.login('admin', 'admin123')
+        response = self.client.get('/api/reports/inventory/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['summary']['total'], 1)
+        self.assertEqual(response.json()['low_stock'], [])
+
+    def test_invalid_report_and_dates(self):
+        self.login('admin', 'admin123')
+        self.assertEqual(self.client.get('/api/reports/unknown/').status_code, 404)
+        self.assertEqual(self.client.get('/api/reports/sales/', {'date_from': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/sales/', {'date_from': '2024-02-30'}).status_code, 400)
+        response = self.client.get('/api/reports/sales/', {'date_from': '2024-02-01', 'date_to': '2024-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class QueryCountViewsTest(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.employee = Employee.objects.create(
+            username='cashier1',
+            first_name='Cashier',
+            last_name='One',
+            position='Cashier'
+        )
+        self.employee.set_password('pass123')
+        self.employee.save()
+        self.customer = Customer.objects.create(phone_number='1234567890')
+        self.client.post('/api/auth/login/', {
+            'username': 'cashier1',
+            'password': 'pass123'
+        }, content_type='application/json')
+        self.grow()
+
+    def grow(self):
+        """Add a few rentals with several lines each"""
+        count = Item.objects.count()
+        items = [
+            Item.objects.create(legacy_item_id=str(5000 + count + i), name=f'Item {count + i}', price=2.00, quantity=10)
+            for i in range(3)
+        ]
+        for _ in range(3):
+            transaction = Transaction.objects.create(
+                transaction_type='Rental',
+                employee=self.employee,
+                customer=self.customer,
+                total_amount=6
+            )
+            for item in items:
+                transaction.items.create(item=item, quantity=1, unit_price=2, subtotal=2)
+                Rental.objects.create(
+                    transaction=transaction,
+                    item=item,
+                    customer=self.customer,
+                    rental_date=date.today(),
+                    due_date=date.today() + timedelta(days=7)
+                )
+        # The rentals bypassed the services, so rebuild the customer's summary
+        RentalService.rebuild_customer_activity(customer_ids=[self.customer.id])
+
+    def test_transaction_list(self):
+        # session, transactions (+employee, customer), transaction items (+item)
+        self.assertFixedQueryCount(self.client, '/api/transactions/', 3, grow=self.grow)
+
+    def test_transaction_history_whatever_the_page_size(self):
+        self.assertFixedQueryCount(self.client, '/api/transactions/history/?page_size=1', 3)
+        self.assertFixedQueryCount(self.client, '/api/transactions/history/?page_size=50', 3, grow=self.grow)
+
+    def test_transaction_detail(self):
+        transaction = Transaction.objects.first()
+        # The updated_at read lets unchanged transactions be answered with 304
+        self.assertFixedQueryCount(self.client, f'/api/transactions/{transaction.id}/', 4)
+
+    def test_outstanding_rentals(self):
+        # session, activity summary, rentals by customer ID (+item, customer)
+        self.assertFixedQueryCount(
+            self.client, '/api/transactions/outstanding-rentals/?customer_phone=1234567890', 3, grow=self.grow
+        )
+        response = self.client.get('/api/transactions/outstanding-rentals/?customer_phone=1234567890')
+        self.assertEqual(len(json.loads(response.content)), 18)
+
+    def test_outstanding_rentals_unknown_customer(self):
+        # session, activity summary
+        self.assertFixedQueryCount(
+            self.client, '/api/transactions/outstanding-rentals/?customer_phone=0000000000', 2
+        )
+        response = self.client.get('/api/transactions/outstanding-rentals/?customer_phone=0000000000')
+        self.assertEqual(json.loads(response.content), [])
+
+
+
+@override_settings(CATALOG_CACHE_REFRESH_INTERVAL=3600, ITEM_CHANGES_SETTLE_SECONDS=0)
+class ConditionalGetViewsTest(TestCase):
+    def setUp(self):
+        InventoryService.clear_catalog_cache()
+        conditional_get_stats.reset()
+        self.client = Client()
+        self.admin = Employee.objects.create(
+            username='admin',
+            first_name='Admin',
+            last_name='User',
+            position='Admin'
+        )
+        self.admin.set_password('admin123')
+        self.admin.save()
+        self.item = Item.objects.create(legacy_item_id='1001', name='Test Item', price=19.99, quantity=50)
+        self.client.post('/api/auth/login/', {
+            'username': 'admin',
+            'password': 'admin123'
+        }, content_type='application/json')
+
+    def test_item_list_not_modified_until_catalog_changes(self):
+        response = self.client.get('/api/items/')
+        etag = response['ETag']
+        with mock.patch('pos_app.views.item_views.ItemSerializer') as serializer:
+            response = self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag)
+            serializer.assert_not_called()
+        self.assertEqual(response.status_code, 304)
+
+        # Search results have their own ETag
+        self.assertNotEqual(self.client.get('/api/items/?search=test')['ETag'], etag)
+
+        self.item.price = 17.50
+        self.item.save()
+        response = self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_writes_from_other_processes_change_item_list_etag(self):
+        etag = self.client.get('/api/items/')['ETag']
+        # As a script or another worker would, with no signals or services in this process
+        Item.objects.filter(id=self.item.id).update(price=12.00, updated_at=timezone.now())
+        response = self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        Item.objects.filter(id=self.item.id)._raw_delete(connection.alias)
+        self.assertEqual(self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(ITEM_CHANGES_SETTLE_SECONDS=60)
+    def test_item_list_not_cached_while_writes_settle(self):
+        etag = self.client.get('/api/items/')['ETag']
+        self.assertEqual(self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_stock_change_changes_item_list_etag(self):
+        etag = self.client.get('/api/items/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryService.decrement_stock({self.item.id: 1})
+        self.assertEqual(self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_item_detail_not_modified(self):
+        etag = self.client.get(f'/api/items/{self.item.id}/')['ETag']
+        response = self.client.get(f'/api/items/{self.item.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_transaction_detail_uses_updated_at(self):
+        transaction = Transaction.objects.create(transaction_type='Sale', employee=self.admin, total_amount=10)
+        response = self.client.get(f'/api/transactions/{transaction.id}/')
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(
+            f'/api/transactions/{transaction.id}/',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+        transaction.save()
+        response = self.client.get(
+            f'/api/transactions/{transaction.id}/',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_sees_hit_ratio(self):
+        etag = self.client.get('/api/items/')['ETag']
+        self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag)
+        data = json.loads(self.client.get('/api/stats/caches/').content)
+        self.assertEqual(data['conditional_get']['items']['requests'], 2)
+        self.assertEqual(data['conditional_get']['items']['not_modified'], 1)
+        self.assertEqual(data['conditional_get']['items']['hit_ratio'], 0.5)
+        self.assertIn('hit_ratio', data['catalog'])
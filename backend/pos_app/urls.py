@@ -2,10 +2,11 @@ from django.urls import path
 from .views import (
     LoginView, LogoutView,
     EmployeeListView, EmployeeDetailView,
-    ItemListView, ItemDetailView,
-    TransactionListView, TransactionDetailView,
+    ItemListView, ItemDetailView, ItemLookupView, ItemChangesView, ItemStreamView,
+    TransactionListView, TransactionHistoryView, TransactionDetailView,
     CreateSaleView, CreateRentalView, ProcessReturnView,
-    GetOutstandingRentalsView
+    GetOutstandingRentalsView, BulkOutstandingRentalsView,
+    ReportView, CacheStatsView
 )
 from .views.api_root_view import api_root
 
@@ -25,14 +26,25 @@ urlpatterns = [
     
     # Items
     path('items/', ItemListView, name='item-list'),
+    path('items/lookup/', ItemLookupView, name='item-lookup'),
+    path('items/changes/', ItemChangesView, name='item-changes'),
+    path('items/stream/', ItemStreamView, name='item-stream'),
     path('items/<int:pk>/', ItemDetailView, name='item-detail'),
     
     # Transactions
     path('transactions/', TransactionListView, name='transaction-list'),
+    path('transactions/history/', TransactionHistoryView, name='transaction-history'),
     path('transactions/<int:pk>/', TransactionDetailView, name='transaction-detail'),
     path('transactions/sale/', CreateSaleView, name='create-sale'),
     path('transactions/rental/', CreateRentalView, name='create-rental'),
     path('transactions/return/', ProcessReturnView, name='process-return'),
     path('transactions/outstanding-rentals/', GetOutstandingRentalsView, name='get-outstanding-rentals'),
+    path('transactions/outstanding-rentals/bulk/', BulkOutstandingRentalsView, name='bulk-outstanding-rentals'),
+    
+    # Reports
+    path('reports/<str:report>/', ReportView, name='report'),
+    
+    # Statistics
+    path('stats/caches/', CacheStatsView, name='cache-stats'),
 ]
 
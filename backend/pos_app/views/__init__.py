@@ -1,7 +1,9 @@
 from .auth_views import LoginView, LogoutView
 from .employee_views import EmployeeListView, EmployeeDetailView
-from .item_views import ItemListView, ItemDetailView
-from .transaction_views import TransactionListView, TransactionDetailView, CreateSaleView, CreateRentalView, ProcessReturnView, GetOutstandingRentalsView
+from .item_views import ItemListView, ItemDetailView, ItemLookupView, ItemChangesView, ItemStreamView
+from .report_views import ReportView
+from .stats_views import CacheStatsView
+from .transaction_views import TransactionListView, TransactionHistoryView, TransactionDetailView, CreateSaleView, CreateRentalView, ProcessReturnView, GetOutstandingRentalsView, BulkOutstandingRentalsView
 
 __all__ = [
     'LoginView',
@@ -10,11 +12,18 @@ __all__ = [
     'EmployeeDetailView',
     'ItemListView',
     'ItemDetailView',
+    'ItemLookupView',
+    'ItemChangesView',
+    'ItemStreamView',
     'TransactionListView',
+    'TransactionHistoryView',
     'TransactionDetailView',
     'CreateSaleView',
     'CreateRentalView',
     'ProcessReturnView',
     'GetOutstandingRentalsView',
+    'BulkOutstandingRentalsView',
+    'ReportView',
+    'CacheStatsView',
 ]
 
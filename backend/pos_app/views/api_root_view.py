@@ -24,14 +24,29 @@ def api_root(request):
                 'list': '/api/items/',
                 'detail': '/api/items/{id}/',
                 'search': '/api/items/?search=query',
+                'lookup': '/api/items/lookup/?codes={legacy_id},{legacy_id}',
+                'changes': '/api/items/changes/?cursor={cursor}',
+                'stream': '/api/items/stream/ (text/event-stream)',
             },
             'transactions': {
                 'list': '/api/transactions/',
+                'history': '/api/transactions/history/?transaction_type=&employee=&customer_phone=&date_from=&date_to=&cursor=',
                 'detail': '/api/transactions/{id}/',
                 'create_sale': '/api/transactions/sale/',
                 'create_rental': '/api/transactions/rental/',
                 'process_return': '/api/transactions/return/',
                 'outstanding_rentals': '/api/transactions/outstanding-rentals/?customer_phone={phone}',
+                'bulk_outstanding_rentals': '/api/transactions/outstanding-rentals/bulk/ (POST phone list, JSON or CSV)',
+            },
+            'reports': {
+                'sales': '/api/reports/sales/?date_from=&date_to=',
+                'rentals': '/api/reports/rentals/?date_from=&date_to=',
+                'employees': '/api/reports/employees/?date_from=&date_to=',
+                'inventory': '/api/reports/inventory/',
+                'csv': '/api/reports/{report}/?date_from=&date_to=&format=csv (detail rows, streamed)',
+            },
+            'stats': {
+                'caches': '/api/stats/caches/',
             },
             'admin': '/admin/',
         },
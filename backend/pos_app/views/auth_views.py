@@ -15,9 +15,11 @@ def LoginView(request):
     
     if serializer.is_valid():
         employee = serializer.validated_data['employee']
-        # Store employee ID in session
+        # Store employee ID in a fresh session and remember it for revocation
+        request.session.cycle_key()
         request.session['employee_id'] = employee.id
         request.session['employee_position'] = employee.position
+        EmployeeService.start_session(employee.id, request.session.session_key)
         
         return Response({
             'message': 'Login successful',
@@ -34,7 +36,7 @@ def LogoutView(request):
     employee_id = request.session.get('employee_id')
     
     if employee_id:
-        EmployeeService.logout(employee_id)
+        EmployeeService.logout(employee_id, request.session.session_key)
         request.session.flush()
     
     return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
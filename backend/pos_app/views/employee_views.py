@@ -4,26 +4,16 @@ from rest_framework.response import Response
 from ..serializers import EmployeeSerializer, CreateEmployeeSerializer
 from ..services import EmployeeService
 from ..models import Employee
-from ..permissions import IsEmployeeAuthenticated
+from ..permissions import IsAdminEmployee
 
 
 @api_view(['GET', 'POST'])
-@permission_classes([IsEmployeeAuthenticated])
+@permission_classes([IsAdminEmployee])
 def EmployeeListView(request):
     """List all employees or create a new employee"""
     
-    # Only admins can manage employees
-    employee_id = request.session.get('employee_id')
-    if employee_id:
-        employee = Employee.objects.get(id=employee_id)
-        if not employee.is_admin():
-            return Response(
-                {'error': 'Only admins can access this endpoint'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-    
     if request.method == 'GET':
-        employees = EmployeeService.get_all_employees()
+        employees = EmployeeSerializer.setup_eager_loading(EmployeeService.get_all_employees())
         serializer = EmployeeSerializer(employees, many=True)
         return Response(serializer.data)
     
@@ -39,20 +29,10 @@ def EmployeeListView(request):
 
 
 @api_view(['GET', 'PUT', 'DELETE'])
-@permission_classes([IsEmployeeAuthenticated])
+@permission_classes([IsAdminEmployee])
 def EmployeeDetailView(request, pk):
     """Retrieve, update, or delete an employee"""
     
-    # Only admins can manage employees
-    employee_id = request.session.get('employee_id')
-    if employee_id:
-        employee = Employee.objects.get(id=employee_id)
-        if not employee.is_admin():
-            return Response(
-                {'error': 'Only admins can access this endpoint'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-    
     try:
         employee = EmployeeService.get_employee_by_id(pk)
     except Employee.DoesNotExist:
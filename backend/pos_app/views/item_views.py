@@ -1,21 +1,55 @@
+import hashlib
+import time
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from ..caching import conditional_get
+from ..pagination import decode_cursor, decode_key, encode_cursor
+from ..renderers import EventStreamRenderer, format_event
 from ..serializers import ItemSerializer
 from ..services import InventoryService
 from ..permissions import IsEmployeeAuthenticated
 
+MAX_LOOKUP_CODES = 500
+MAX_CHANGES_LIMIT = 5000
+STREAM_RETRY_MILLISECONDS = 3000
+
+
+def catalog_etag(request, *args, **kwargs):
+    """ETag of an item list response: catalog version plus the query string"""
+    params = hashlib.md5(request.GET.urlencode().encode()).hexdigest()[:12]
+    return f'catalog-{InventoryService.catalog_version()}-{params}'
+
+
+def item_etag(request, pk):
+    """ETag of an item detail response, taken from the cached copy that is served"""
+    entry = InventoryService.get_catalog_entries([int(pk)]).get(int(pk))
+    if entry is None:
+        return None
+    return 'item-' + hashlib.md5(repr(tuple(entry)).encode()).hexdigest()[:16]
+
 
 @api_view(['GET'])
 @permission_classes([IsEmployeeAuthenticated])
+@conditional_get('items', etag_func=catalog_etag)
 def ItemListView(request):
     """List all items or search items"""
     query = request.query_params.get('search', None)
     
     if query:
-        items = InventoryService.search_items(query)
+        try:
+            limit = min(int(request.query_params.get('limit', 50)), 500)
+        except ValueError:
+            return Response(
+                {'error': 'limit must be a number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        items = InventoryService.search_items(query, limit)
     else:
-        items = InventoryService.get_all_items()
+        items = ItemSerializer.setup_eager_loading(InventoryService.get_all_items())
     
     serializer = ItemSerializer(items, many=True)
     return Response(serializer.data)
@@ -23,6 +57,7 @@ def ItemListView(request):
 
 @api_view(['GET'])
 @permission_classes([IsEmployeeAuthenticated])
+@conditional_get('item-detail', etag_func=item_etag)
 def ItemDetailView(request, pk):
     """Retrieve a specific item"""
     try:
@@ -35,3 +70,163 @@ def ItemDetailView(request, pk):
             status=status.HTTP_404_NOT_FOUND
         )
 
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsEmployeeAuthenticated])
+def ItemLookupView(request):
+    """
+    Look up items by exact legacy item ID (barcode or keyed code)
+    
+    GET takes ?codes=1001,1002 (or repeated ?code=); POST takes
+    {"codes": [...]}. Returns id, name, price and stock per code, and
+    the codes that matched nothing.
+    """
+    if request.method == 'POST':
+        codes = request.data.get('codes', [])
+        if not isinstance(codes, list):
+            codes = [codes]
+        if any(isinstance(code, bool) or not isinstance(code, (str, int)) for code in codes):
+            return Response(
+                {'error': 'codes must be a list of strings or integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    else:
+        codes = request.query_params.getlist('code')
+        for value in request.query_params.getlist('codes'):
+            codes.extend(code for code in value.split(',') if code)
+    
+    if not codes:
+        return Response(
+            {'error': 'At least one code is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(codes) > MAX_LOOKUP_CODES:
+        return Response(
+            {'error': f'At most {MAX_LOOKUP_CODES} codes per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    found, missing = InventoryService.lookup_items(codes)
+    return Response({
+        'items': [
+            {
+                'code': code,
+                'id': entry.id,
+                'name': entry.name,
+                'price': str(entry.price),
+                'quantity': entry.quantity,
+            }
+            for code, entry in found.items()
+        ],
+        'missing': missing,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsEmployeeAuthenticated])
+def ItemChangesView(request):
+    """
+    Items changed or deleted since a sync cursor
+    
+    Without ?cursor= the response starts a full sync. Every response
+    carries the cursor for the next poll; keep polling while has_more is
+    true. A cursor older than the tombstone retention gets 410 Gone and
+    the register must start over without a cursor.
+    """
+    try:
+        limit = min(int(request.query_params.get('limit', 1000)), MAX_CHANGES_LIMIT)
+    except ValueError:
+        return Response(
+            {'error': 'limit must be a number'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    items_after = tombstones_after = None
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        try:
+            payload = decode_cursor(cursor)
+            items_after = decode_key(payload['items']) if payload['items'] else None
+            tombstones_after = decode_key(payload['deleted'])
+        except (ValueError, KeyError, TypeError):
+            return Response(
+                {'error': 'Invalid cursor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if InventoryService.is_change_position_expired(tombstones_after):
+            return Response(
+                {'error': 'Cursor expired, start a full sync without a cursor'},
+                status=status.HTTP_410_GONE
+            )
+    
+    changes = InventoryService.get_changes(items_after, tombstones_after, max(limit, 1))
+    
+    def position(key):
+        return {'k': key[0].isoformat(), 'i': key[1]} if key else None
+    
+    return Response({
+        'items': [dict(item, price=str(item['price'])) for item in changes['items']],
+        'deleted': [
+            {'id': tombstone['item_id'], 'legacy_item_id': tombstone['legacy_item_id']}
+            for tombstone in changes['deleted']
+        ],
+        'cursor': encode_cursor({
+            'items': position(changes['items_after']),
+            'deleted': position(changes['tombstones_after']),
+        }),
+        'has_more': changes['has_more'],
+    })
+
+
+def item_change_events(last_event_id):
+    """
+    Server-sent events for one change stream connection
+    
+    Sends 'ready' (resumed, or starting from now) or 'reset' (the client
+    must reload its items), then 'item' and 'delete' events as changes
+    commit, with a keep-alive comment when idle.
+    """
+    subscription, resumed = InventoryService.subscribe_changes(last_event_id)
+    try:
+        yield f'retry: {STREAM_RETRY_MILLISECONDS}\n\n'
+        if resumed:
+            # Keep the client's last id; the replayed events carry their own
+            yield format_event('ready', {'resumed': True})
+        elif last_event_id:
+            yield format_event('reset', {'reason': 'resume'}, subscription.position)
+        else:
+            yield format_event('ready', {'resumed': False}, subscription.position)
+        
+        deadline = time.monotonic() + settings.ITEM_STREAM_MAX_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            events, overflowed = subscription.get(min(settings.ITEM_STREAM_HEARTBEAT_SECONDS, remaining))
+            chunks = []
+            if overflowed:
+                InventoryService.record_change_overflow()
+                chunks.append(format_event('reset', {'reason': 'overflow'}))
+            chunks.extend(format_event(event.kind, event.data, event.id) for event in events)
+            yield ''.join(chunks) or ': keep-alive\n\n'
+    finally:
+        InventoryService.unsubscribe_changes(subscription)
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+@permission_classes([IsEmployeeAuthenticated])
+def ItemStreamView(request):
+    """
+    Stream item price and stock changes as server-sent events
+    
+    Changes are pushed as they commit in this worker. The connection is
+    closed after ITEM_STREAM_MAX_SECONDS; EventSource then reconnects with
+    a Last-Event-ID header (or ?cursor= may be given) and gets the events
+    it missed replayed, or a 'reset' event if they are no longer known.
+    """
+    last_event_id = request.META.get('HTTP_LAST_EVENT_ID') or request.query_params.get('cursor')
+    response = StreamingHttpResponse(item_change_events(last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
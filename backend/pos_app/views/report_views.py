@@ -0,0 +1,77 @@
+from datetime import timedelta
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from ..services import ReportingService
+from ..permissions import IsAdminEmployee
+from ..renderers import CSVRenderer, format_csv_row
+
+
+def report_csv(columns, rows):
+    """Stream a header and report rows as CSV"""
+    yield format_csv_row(columns)
+    for row in rows:
+        yield format_csv_row(row)
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, CSVRenderer])
+@permission_classes([IsAdminEmployee])
+def ReportView(request, report):
+    """
+    Report over a period: aggregates as JSON, or the detail rows as CSV
+    
+    Reports: sales, rentals, employees and inventory (current stock,
+    ignores the period). Query parameters: date_from and date_to
+    (inclusive YYYY-MM-DD), defaulting to the last 30 days.
+    
+    JSON aggregates are read from the daily rollups and cached until the
+    data in the period changes. Accept: text/csv (or ?format=csv) streams
+    every detail row straight from the database instead.
+    """
+    if report not in ReportingService.REPORTS:
+        return Response(
+            {'error': f"Unknown report '{report}'"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    today = timezone.localdate()
+    dates = {'date_from': today - timedelta(days=30), 'date_to': today}
+    for name in dates:
+        value = request.query_params.get(name)
+        if not value:
+            continue
+        try:
+            dates[name] = parse_date(value)
+        except ValueError:
+            # Well formed but impossible, like 2024-02-30
+            dates[name] = None
+        if dates[name] is None:
+            return Response(
+                {'error': f'{name} must be a date in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    if dates['date_from'] > dates['date_to']:
+        return Response(
+            {'error': 'date_from must not be after date_to'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if request.accepted_renderer.format == 'csv':
+        columns, rows = ReportingService.report_rows(report, dates['date_from'], dates['date_to'])
+        response = StreamingHttpResponse(report_csv(columns, rows), content_type='text/csv')
+        filename = f"{report}_{dates['date_from']}_{dates['date_to']}.csv"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    data = ReportingService.get_report(report, dates['date_from'], dates['date_to'])
+    return Response({
+        'report': report,
+        'date_from': dates['date_from'],
+        'date_to': dates['date_to'],
+        **data,
+    })
@@ -0,0 +1,25 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from ..caching import conditional_get_stats
+from ..services import AuditService, CouponService, InventoryService, RentalService, ReportingService
+from ..permissions import IsAdminEmployee
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminEmployee])
+def CacheStatsView(request):
+    """
+    Hit ratios and sizes of the caches in the worker serving this request
+    
+    Counters are per process; with several workers each reports its own.
+    """
+    return Response({
+        'conditional_get': conditional_get_stats.stats(),
+        'catalog': InventoryService.catalog_stats(),
+        'search_index': InventoryService.search_stats(),
+        'item_stream': InventoryService.change_stream_stats(),
+        'coupons': CouponService.cache_stats(),
+        'customer_ids': RentalService.customer_id_cache_stats(),
+        'reports': ReportingService.report_cache_stats(),
+        'audit_log': AuditService.stats(),
+    })
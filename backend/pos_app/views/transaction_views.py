@@ -1,11 +1,24 @@
+import json
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes, renderer_classes
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from ..serializers import (
-    TransactionSerializer, CreateSaleSerializer, CreateRentalSerializer
+    TransactionSerializer, CreateSaleSerializer, CreateRentalSerializer, ProcessReturnSerializer
 )
-from ..services import TransactionService
+from ..services import RentalService, TransactionService
+from ..caching import conditional_get
 from ..models import Transaction
+from ..pagination import TransactionHistoryPagination
+from ..parsers import CSVParser
+from ..renderers import CSVRenderer, format_csv_row
 from ..permissions import IsEmployeeAuthenticated
 
 
@@ -13,17 +26,95 @@ from ..permissions import IsEmployeeAuthenticated
 @permission_classes([IsEmployeeAuthenticated])
 def TransactionListView(request):
     """List all transactions"""
-    transactions = Transaction.objects.all().order_by('-created_at')[:100]
+    transactions = TransactionSerializer.setup_eager_loading(Transaction.objects.all())
+    transactions = transactions.order_by('-created_at')[:100]
     serializer = TransactionSerializer(transactions, many=True)
     return Response(serializer.data)
 
 
 @api_view(['GET'])
 @permission_classes([IsEmployeeAuthenticated])
+def TransactionHistoryView(request):
+    """
+    Page through transactions, newest first, with optional filters
+    
+    Query parameters: transaction_type, employee, customer_phone,
+    date_from and date_to (inclusive YYYY-MM-DD), cursor and page_size.
+    """
+    params = request.query_params
+    
+    transaction_type = params.get('transaction_type')
+    if transaction_type and transaction_type not in dict(Transaction.TRANSACTION_TYPES):
+        return Response(
+            {'error': f"Unknown transaction_type '{transaction_type}'"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    employee_id = params.get('employee')
+    if employee_id and not employee_id.isdigit():
+        return Response(
+            {'error': 'employee must be an employee ID'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Dates are whole days; turn them into a half-open datetime range
+    bounds = {}
+    for name in ('date_from', 'date_to'):
+        value = params.get(name)
+        if not value:
+            continue
+        try:
+            day = parse_date(value)
+        except ValueError:
+            # Well formed but impossible, like 2024-02-30
+            day = None
+        if day is None:
+            return Response(
+                {'error': f'{name} must be a date in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if name == 'date_to':
+            day += timedelta(days=1)
+        bounds[name] = timezone.make_aware(datetime.combine(day, time.min))
+    
+    transactions = TransactionService.get_transaction_history(
+        transaction_type=transaction_type,
+        employee_id=employee_id,
+        customer_phone=params.get('customer_phone'),
+        created_from=bounds.get('date_from'),
+        created_before=bounds.get('date_to')
+    )
+    
+    paginator = TransactionHistoryPagination()
+    page = paginator.paginate_queryset(TransactionSerializer.setup_eager_loading(transactions), request)
+    serializer = TransactionSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+def transaction_last_modified(request, pk):
+    """updated_at of the requested transaction, read once per request"""
+    if not hasattr(request, '_transaction_updated_at'):
+        request._transaction_updated_at = Transaction.objects.filter(
+            pk=pk
+        ).values_list('updated_at', flat=True).first()
+    return request._transaction_updated_at
+
+
+def transaction_etag(request, pk):
+    """ETag of a transaction detail response, from its updated_at"""
+    updated_at = transaction_last_modified(request, pk)
+    if updated_at is None:
+        return None
+    return f'transaction-{pk}-{updated_at.timestamp()}'
+
+
+@api_view(['GET'])
+@permission_classes([IsEmployeeAuthenticated])
+@conditional_get('transaction-detail', etag_func=transaction_etag, last_modified_func=transaction_last_modified)
 def TransactionDetailView(request, pk):
     """Retrieve a specific transaction"""
     try:
-        transaction = Transaction.objects.get(pk=pk)
+        transaction = TransactionSerializer.setup_eager_loading(Transaction.objects.all()).get(pk=pk)
         serializer = TransactionSerializer(transaction)
         return Response(serializer.data)
     except Transaction.DoesNotExist:
@@ -54,6 +145,9 @@ def CreateSaleView(request):
                 items_data=serializer.validated_data['items'],
                 coupon_code=serializer.validated_data.get('coupon_code')
             )
+            transaction = TransactionSerializer.setup_eager_loading(
+                Transaction.objects.all()
+            ).get(pk=transaction.pk)
             return Response(
                 TransactionSerializer(transaction).data,
                 status=status.HTTP_201_CREATED
@@ -88,6 +182,9 @@ def CreateRentalView(request):
                 customer_phone=serializer.validated_data['customer_phone'],
                 items_data=serializer.validated_data['items']
             )
+            transaction = TransactionSerializer.setup_eager_loading(
+                Transaction.objects.all()
+            ).get(pk=transaction.pk)
             return Response(
                 TransactionSerializer(transaction).data,
                 status=status.HTTP_201_CREATED
@@ -114,10 +211,13 @@ def GetOutstandingRentalsView(request):
         )
     
     try:
-        from ..services import RentalService
         from ..serializers import RentalSerializer
         
-        rentals = RentalService.get_active_rentals(customer_phone)
+        # Most customers at the counter hold nothing: answer those from the summary row
+        if not RentalService.check_customer_has_outstanding_returns(customer_phone):
+            return Response([], status=status.HTTP_200_OK)
+        
+        rentals = RentalSerializer.setup_eager_loading(RentalService.get_active_rentals(customer_phone))
         serializer = RentalSerializer(rentals, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Exception as e:
@@ -131,23 +231,99 @@ def GetOutstandingRentalsView(request):
 @permission_classes([IsEmployeeAuthenticated])
 def ProcessReturnView(request):
     """Process item returns"""
-    customer_phone = request.data.get('customer_phone')
-    item_ids = request.data.get('item_ids', [])
+    employee_id = request.session.get('employee_id')
+    serializer = ProcessReturnSerializer(data=request.data)
+    
+    if serializer.is_valid():
+        try:
+            returned_rentals = TransactionService.process_return(
+                employee_id=employee_id,
+                customer_phone=serializer.validated_data['customer_phone'],
+                items_data=serializer.validated_data.get('items', []),
+                rental_ids=serializer.validated_data.get('rental_ids', [])
+            )
+            from ..serializers import RentalSerializer
+            serializer = RentalSerializer(returned_rentals, many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+BULK_RENTAL_CSV_COLUMNS = [
+    'customer_phone', 'id', 'transaction_id', 'item_id', 'item_name', 'quantity',
+    'returned_quantity', 'rental_date', 'due_date', 'days_overdue', 'is_overdue'
+]
+
+
+def bulk_rentals_json(groups):
+    """Stream customer groups as a JSON array, one customer at a time"""
+    yield '['
+    for index, (phone, rentals) in enumerate(groups):
+        group = json.dumps({'customer_phone': phone, 'rentals': rentals}, cls=JSONEncoder)
+        yield group if index == 0 else ',' + group
+    yield ']'
+
+
+def bulk_rentals_csv(groups):
+    """Stream customer groups as CSV, one row per rental"""
+    yield format_csv_row(BULK_RENTAL_CSV_COLUMNS)
+    for phone, rentals in groups:
+        yield ''.join(
+            format_csv_row([phone] + [rental[column] for column in BULK_RENTAL_CSV_COLUMNS[1:]])
+            for rental in rentals
+        )
+
+
+@api_view(['POST'])
+@parser_classes([JSONParser, CSVParser])
+@renderer_classes([JSONRenderer, CSVRenderer])
+@permission_classes([IsEmployeeAuthenticated])
+def BulkOutstandingRentalsView(request):
+    """
+    Outstanding rentals for many customers at once
     
-    if not customer_phone or not item_ids:
+    The body is a JSON array of phone numbers, {"customer_phones": [...]},
+    or text/csv with the phone number in the first column (a header row
+    is skipped). Customers holding nothing are left out. The response is
+    streamed as a JSON array of {customer_phone, rentals} or, with
+    Accept: text/csv or ?format=csv, as one CSV row per rental.
+    """
+    data = request.data
+    if isinstance(data, dict):
+        data = data.get('customer_phones') or []
+    if not isinstance(data, list):
         return Response(
-            {'error': 'customer_phone and item_ids are required'},
+            {'error': 'Expected a list of customer phone numbers'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    try:
-        returned_rentals = TransactionService.process_return(customer_phone, item_ids)
-        from ..serializers import RentalSerializer
-        serializer = RentalSerializer(returned_rentals, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    except Exception as e:
+    phones = []
+    for value in data:
+        if isinstance(value, list):
+            value = value[0] if value else ''
+        value = str(value).strip()
+        if value.isdigit():
+            phones.append(value)
+    if not phones:
         return Response(
-            {'error': str(e)},
+            {'error': 'No customer phone numbers given'},
             status=status.HTTP_400_BAD_REQUEST
         )
-
+    if len(phones) > settings.BULK_RENTAL_LOOKUP_MAX_PHONES:
+        return Response(
+            {'error': f'At most {settings.BULK_RENTAL_LOOKUP_MAX_PHONES} phone numbers per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    groups = RentalService.iter_outstanding_rentals(phones)
+    if request.accepted_renderer.format == 'csv':
+        response = StreamingHttpResponse(bulk_rentals_csv(groups), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="outstanding_rentals.csv"'
+    else:
+        response = StreamingHttpResponse(bulk_rentals_json(groups), content_type='application/json')
+    return response
@@ -124,6 +124,49 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Audit log writer (entries are batched by a background thread)
+AUDIT_LOG_ASYNC = config('AUDIT_LOG_ASYNC', default=True, cast=bool)
+AUDIT_LOG_QUEUE_SIZE = config('AUDIT_LOG_QUEUE_SIZE', default=10000, cast=int)
+AUDIT_LOG_BATCH_SIZE = config('AUDIT_LOG_BATCH_SIZE', default=500, cast=int)
+AUDIT_LOG_FLUSH_INTERVAL = config('AUDIT_LOG_FLUSH_INTERVAL', default=1.0, cast=float)
+
+# Coupon lookup cache (per worker process)
+COUPON_CACHE_SIZE = config('COUPON_CACHE_SIZE', default=256, cast=int)
+COUPON_CACHE_TTL = config('COUPON_CACHE_TTL', default=300, cast=float)
+COUPON_NEGATIVE_CACHE_TTL = config('COUPON_NEGATIVE_CACHE_TTL', default=60, cast=float)
+
+# Customer phone number -> ID cache used by rental lookups
+CUSTOMER_ID_CACHE_SIZE = config('CUSTOMER_ID_CACHE_SIZE', default=4096, cast=int)
+CUSTOMER_ID_CACHE_TTL = config('CUSTOMER_ID_CACHE_TTL', default=3600, cast=float)
+
+# Bulk outstanding-rentals lookups: phone numbers per IN query, and per request
+BULK_RENTAL_LOOKUP_CHUNK_SIZE = config('BULK_RENTAL_LOOKUP_CHUNK_SIZE', default=500, cast=int)
+BULK_RENTAL_LOOKUP_MAX_PHONES = config('BULK_RENTAL_LOOKUP_MAX_PHONES', default=50000, cast=int)
+
+# Rows fetched per round trip when streaming report CSVs
+REPORT_CHUNK_SIZE = config('REPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Report API results are cached (Django cache) per report, period and data version
+REPORT_CACHE_TTL = config('REPORT_CACHE_TTL', default=300, cast=int)
+
+# Catalog cache: seconds between incremental refreshes from Item.updated_at
+CATALOG_CACHE_REFRESH_INTERVAL = config('CATALOG_CACHE_REFRESH_INTERVAL', default=5, cast=float)
+
+# Item search index: seconds between incremental refreshes from Item.updated_at
+ITEM_SEARCH_REFRESH_INTERVAL = config('ITEM_SEARCH_REFRESH_INTERVAL', default=5, cast=float)
+
+# Inventory change feed: rows younger than the settle window are held back so that
+# slower concurrent commits with earlier timestamps are not skipped by a cursor
+ITEM_CHANGES_SETTLE_SECONDS = config('ITEM_CHANGES_SETTLE_SECONDS', default=2, cast=float)
+ITEM_TOMBSTONE_RETENTION_DAYS = config('ITEM_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+
+# Item change stream: per-client buffer, replayable history (events), keep-alive
+# interval and connection lifetime (seconds) before the client reconnects
+ITEM_STREAM_BUFFER_SIZE = config('ITEM_STREAM_BUFFER_SIZE', default=1000, cast=int)
+ITEM_STREAM_HISTORY = config('ITEM_STREAM_HISTORY', default=5000, cast=int)
+ITEM_STREAM_HEARTBEAT_SECONDS = config('ITEM_STREAM_HEARTBEAT_SECONDS', default=15, cast=float)
+ITEM_STREAM_MAX_SECONDS = config('ITEM_STREAM_MAX_SECONDS', default=300, cast=float)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
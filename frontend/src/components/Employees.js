@@ -49,7 +49,7 @@ const Employees = ({ onBack }) => {
     } catch (error) {
       setMessage({
         type: 'error',
-        text: error.response?.data?.error || 'Failed to create employee'
+        text: error.response?.data?.error || error.response?.data?.detail || 'Failed to create employee'
       });
     }
   };
@@ -65,7 +65,7 @@ const Employees = ({ onBack }) => {
     } catch (error) {
       setMessage({
         type: 'error',
-        text: error.response?.data?.error || 'Failed to delete employee'
+        text: error.response?.data?.error || error.response?.data?.detail || 'Failed to delete employee'
       });
     }
   };
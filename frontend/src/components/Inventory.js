@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { FaArrowLeft, FaWarehouse, FaSearch } from 'react-icons/fa';
 import { itemAPI } from '../services/api';
+import useItemStream from '../services/useItemStream';
 import './Inventory.css';
 
 const Inventory = ({ onBack }) => {
@@ -21,6 +22,8 @@ const Inventory = ({ onBack }) => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [searchTerm]);
 
+  useItemStream(setItems, () => loadItems());
+
   const loadItems = async () => {
     try {
       setLoading(true);
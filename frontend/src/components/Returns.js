@@ -44,12 +44,7 @@ const Returns = ({ employee, onBack }) => {
 
     setLoading(true);
     try {
-      // Extract item IDs from selected rental IDs
-      const itemIds = outstandingRentals
-        .filter(rental => selectedItems.includes(rental.id))
-        .map(rental => rental.item_id);
-      
-      await transactionAPI.processReturn(customerPhone, itemIds);
+      await transactionAPI.processReturn(customerPhone, selectedItems);
       setMessage({ type: 'success', text: 'Return processed successfully!' });
       setSelectedItems([]);
       setOutstandingRentals([]);
@@ -131,7 +126,7 @@ const Returns = ({ employee, onBack }) => {
                 <div className="rental-info">
                   <div className="rental-item-name">{rental.item_name}</div>
                   <div className="rental-details">
-                    Rented: {new Date(rental.rental_date).toLocaleDateString()} | Due: {new Date(rental.due_date).toLocaleDateString()}
+                    Qty: {rental.quantity - rental.returned_quantity} | Rented: {new Date(rental.rental_date).toLocaleDateString()} | Due: {new Date(rental.due_date).toLocaleDateString()}
                     {rental.days_overdue > 0 && (
                       <span className="overdue-badge">Overdue: {rental.days_overdue} days</span>
                     )}
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { FaArrowLeft, FaSearch, FaShoppingCart, FaPlus, FaMinus, FaTimes } from 'react-icons/fa';
 import { itemAPI, transactionAPI } from '../services/api';
+import useItemStream from '../services/useItemStream';
 import './Sales.css';
 
 const Sales = ({ employee, onBack }) => {
@@ -20,6 +21,8 @@ const Sales = ({ employee, onBack }) => {
     }
   };
 
+  useItemStream(setItems, () => loadItems());
+
   useEffect(() => {
     loadItems();
     // eslint-disable-next-line react-hooks/exhaustive-deps
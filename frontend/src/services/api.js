@@ -67,6 +67,10 @@ export const itemAPI = {
   
   get: (id) =>
     api.get(`/items/${id}/`),
+  
+  // Server-sent price/stock changes; EventSource reconnects and resumes by itself
+  stream: () =>
+    new EventSource(`${API_BASE_URL}/items/stream/`, { withCredentials: true }),
 };
 
 // Transaction API
@@ -95,10 +99,10 @@ export const transactionAPI = {
       }))
     }),
   
-  processReturn: (customerPhone, itemIds) =>
+  processReturn: (customerPhone, rentalIds) =>
     api.post('/transactions/return/', {
       customer_phone: customerPhone,
-      item_ids: itemIds
+      rental_ids: rentalIds
     }),
   
   getOutstandingRentals: (customerPhone) =>
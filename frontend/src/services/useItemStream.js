@@ -0,0 +1,31 @@
+import { useEffect, useRef } from 'react';
+import { itemAPI } from './api';
+
+// Keeps a loaded item list current with price and stock changes pushed by the server.
+// `reload` is called when the stream could not replay what was missed.
+const useItemStream = (setItems, reload) => {
+  const reloadRef = useRef(reload);
+  reloadRef.current = reload;
+
+  useEffect(() => {
+    const source = itemAPI.stream();
+
+    source.addEventListener('item', (event) => {
+      const change = JSON.parse(event.data);
+      setItems((items) =>
+        items.map((item) => (item.id === change.id ? { ...item, ...change } : item))
+      );
+    });
+
+    source.addEventListener('delete', (event) => {
+      const { id } = JSON.parse(event.data);
+      setItems((items) => items.filter((item) => item.id !== id));
+    });
+
+    source.addEventListener('reset', () => reloadRef.current());
+
+    return () => source.close();
+  }, [setItems]);
+};
+
+export default useItemStream;
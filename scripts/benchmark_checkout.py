@@ -0,0 +1,131 @@
+"""
+Checkout Benchmark Script
+Compares the legacy per-line sale path with the bulk checkout path
+"""
+import os
+import sys
+import django
+import time
+from decimal import Decimal
+
+# Add backend directory to path
+backend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+sys.path.insert(0, backend_path)
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pos_system.settings')
+django.setup()
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from pos_app.models import Employee, Item, Transaction, TransactionItem, AuditLog
+from pos_app.services import TransactionService
+
+
+@transaction.atomic
+def legacy_create_sale(employee_id, items_data):
+    """Per-line sale path as it was before the bulk checkout (reference only)"""
+    employee = Employee.objects.get(id=employee_id)
+    total_amount = Decimal('0.00')
+    transaction_items = []
+
+    for item_data in items_data:
+        item = Item.objects.get(id=item_data['item_id'])
+        quantity = item_data['quantity']
+        if not item.is_available(quantity):
+            raise ValueError(f"Insufficient quantity for item {item.name}")
+        subtotal = item.price * quantity
+        total_amount += subtotal
+        transaction_items.append({
+            'item': item,
+            'quantity': quantity,
+            'unit_price': item.price,
+            'subtotal': subtotal
+        })
+
+    tax_rate = TransactionService.DEFAULT_TAX_RATE
+    sale_transaction = Transaction.objects.create(
+        transaction_type='Sale',
+        employee=employee,
+        total_amount=total_amount * (1 + tax_rate),
+        tax_rate=tax_rate
+    )
+
+    for item_data in transaction_items:
+        TransactionItem.objects.create(transaction=sale_transaction, **item_data)
+        item_data['item'].quantity -= item_data['quantity']
+        item_data['item'].save()
+
+    AuditLog.objects.create(
+        employee=employee,
+        action='transaction_created',
+        details=f"Sale transaction #{sale_transaction.id} created"
+    )
+    return sale_transaction
+
+
+def seed(max_lines):
+    """Create one cashier and enough items for the largest cart"""
+    employee = Employee(username='bench', first_name='Bench', last_name='Mark', position='Cashier')
+    employee.set_password('bench123')
+    employee.save()
+    Item.objects.bulk_create([
+        Item(legacy_item_id=100000 + i, name=f'Bench Item {i}', price=Decimal('1.99'), quantity=1000000)
+        for i in range(max_lines)
+    ])
+    return employee, list(Item.objects.values_list('id', flat=True)[:max_lines])
+
+
+def measure(create_sale, employee_id, items_data, repeat):
+    """Return (best wall time in ms, queries per sale) for a checkout function"""
+    best = None
+    queries = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            create_sale(employee_id, items_data)
+            elapsed = (time.perf_counter() - start) * 1000
+        queries = len(context.captured_queries)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, queries
+
+
+def main():
+    """Run the checkout benchmark against a throwaway test database"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark checkout paths')
+    parser.add_argument('--sizes', type=str, default='1,10,100,1000',
+                        help='Comma-separated cart sizes (lines per sale)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per size (best is reported)')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    print("=" * 60)
+    print("Checkout Benchmark")
+    print("=" * 60)
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        employee, item_ids = seed(max(sizes))
+
+        print(f"{'Lines':>6} | {'Legacy ms':>10} {'Queries':>8} | {'Bulk ms':>10} {'Queries':>8} | {'Speedup':>7}")
+        print("-" * 60)
+        for size in sizes:
+            items_data = [{'item_id': item_id, 'quantity': 1} for item_id in item_ids[:size]]
+            legacy_ms, legacy_queries = measure(legacy_create_sale, employee.id, items_data, args.repeat)
+            bulk_ms, bulk_queries = measure(
+                lambda employee_id, data: TransactionService.create_sale(employee_id, data),
+                employee.id, items_data, args.repeat
+            )
+            print(f"{size:>6} | {legacy_ms:>10.2f} {legacy_queries:>8} | "
+                  f"{bulk_ms:>10.2f} {bulk_queries:>8} | {legacy_ms / bulk_ms:>6.1f}x")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
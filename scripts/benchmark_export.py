@@ -0,0 +1,139 @@
+"""
+Export Benchmark Script
+Measures throughput and peak memory of the streaming exporter in export_data.py
+"""
+import os
+import sys
+import django
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+# Add backend directory to path
+backend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+sys.path.insert(0, backend_path)
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pos_system.settings')
+django.setup()
+
+from django.db import connection
+from django.utils import timezone
+from pos_app.models import AuditLog, Employee
+from export_data import DEFAULT_CHUNK_SIZE, export_model
+
+FORMATS = ['csv', 'ndjson', 'json']
+
+
+def legacy_export_to_json(model_class, filename):
+    """Whole-table export as it was before streaming (reference only)"""
+    queryset = model_class.objects.all()
+    if not queryset.exists():
+        return 0
+    fields = [f.name for f in model_class._meta.get_fields() if f.concrete]
+    data = []
+    for obj in queryset:
+        record = {}
+        for field in fields:
+            value = getattr(obj, field, None)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif hasattr(value, '__str__'):
+                value = str(value)
+            record[field] = value
+        data.append(record)
+    with open(filename, 'w', encoding='utf-8') as jsonfile:
+        json.dump(data, jsonfile, indent=2, ensure_ascii=False)
+    return len(data)
+
+
+def grow_audit_log(size, employees):
+    """Insert audit log rows until the table holds size rows"""
+    existing = AuditLog.objects.count()
+    now = timezone.now()
+    while existing < size:
+        batch = min(5000, size - existing)
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                employee=employees[index % len(employees)],
+                action='transaction_created',
+                details=f'Sale transaction #{index} created with total $19.99',
+                timestamp=now - timedelta(seconds=index),
+                ip_address='10.0.0.1'
+            )
+            for index in range(existing, existing + batch)
+        ])
+        existing += batch
+
+
+def measure(export, trace_memory):
+    """Run an export, returning (rows, seconds, peak MB or None)"""
+    if trace_memory:
+        # tracemalloc slows exports down; throughput is not comparable then
+        tracemalloc.start()
+    start = time.perf_counter()
+    rows = export()
+    seconds = time.perf_counter() - start
+    peak_mb = None
+    if trace_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return rows, seconds, peak_mb
+
+
+def main():
+    """Run the export benchmark"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the streaming data export')
+    parser.add_argument('--sizes', type=str, default='1000,100000,1000000',
+                        help='Comma-separated audit log sizes')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per round trip')
+    parser.add_argument('--legacy-max', type=int, default=100000,
+                        help='Largest size also run through the old whole-table JSON export (0 to skip)')
+    parser.add_argument('--memory', action='store_true', help='Also report peak Python memory (slower)')
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    print("=" * 70)
+    print("Export Benchmark (audit_logs table)")
+    print("=" * 70)
+    print(f"{'Rows':>9} | {'Format':<8} {'Seconds':>8} {'Rows/s':>10} {'MB/s':>7} {'Peak MB':>8}")
+    print("-" * 70)
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    output_dir = tempfile.mkdtemp(prefix='export_benchmark_')
+    try:
+        employees = [
+            Employee.objects.create(username=f'bench{index}', first_name='Bench', last_name=str(index),
+                                    position='Cashier')
+            for index in range(10)
+        ]
+        for size in sizes:
+            grow_audit_log(size, employees)
+            runs = [(export_format, lambda filename, export_format=export_format: export_model(
+                AuditLog, filename, export_format, args.chunk_size, quiet=True
+            )) for export_format in FORMATS]
+            if size <= args.legacy_max:
+                runs.append(('legacy', lambda filename: legacy_export_to_json(AuditLog, filename)))
+
+            for label, export in runs:
+                filename = os.path.join(output_dir, f'audit_logs_{size}.{label}')
+                rows, seconds, peak_mb = measure(lambda: export(filename), args.memory)
+                megabytes = os.path.getsize(filename) / (1024 * 1024)
+                os.remove(filename)
+                peak_column = f"{peak_mb:>8.1f}" if peak_mb is not None else f"{'-':>8}"
+                print(f"{size:>9} | {label:<8} {seconds:>8.2f} {rows / seconds:>10.0f} "
+                      f"{megabytes / seconds:>7.1f} {peak_column}")
+    finally:
+        os.rmdir(output_dir)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
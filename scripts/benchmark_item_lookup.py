@@ -0,0 +1,113 @@
+"""
+Item Lookup Benchmark Script
+Compares exact-code lookups through /api/items/lookup/ with the ?search= item list
+"""
+import os
+import sys
+import django
+import random
+import time
+from decimal import Decimal
+
+# Add backend directory to path
+backend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+sys.path.insert(0, backend_path)
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pos_system.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from pos_app.models import Employee, Item
+
+
+def seed(count):
+    """Create a cashier and count items"""
+    employee = Employee(username='bench', first_name='Bench', last_name='Mark', position='Cashier')
+    employee.set_password('bench123')
+    employee.save()
+    for start in range(0, count, 5000):
+        Item.objects.bulk_create([
+            Item(legacy_item_id=100000 + i, name=f'Bench Item {i}', price=Decimal('1.99'), quantity=10)
+            for i in range(start, min(start + 5000, count))
+        ])
+
+
+def measure(client, make_request, batches):
+    """Return (median ms per request, queries per request) over the given code batches"""
+    samples = []
+    queries = 0
+    for codes in batches:
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = make_request(client, codes)
+            samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.content
+        queries = len(context.captured_queries)
+    samples.sort()
+    return samples[len(samples) // 2], queries
+
+
+def lookup(client, codes):
+    return client.get('/api/items/lookup/', {'codes': ','.join(str(code) for code in codes)})
+
+
+def search_each(client, codes):
+    """What a register does today: one ?search= request per scanned code"""
+    for code in codes:
+        response = client.get('/api/items/', {'search': str(code)})
+    return response
+
+
+def main():
+    """Run the lookup benchmark against a throwaway test database"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark item lookup')
+    parser.add_argument('--items', type=int, default=100000, help='Catalog size')
+    parser.add_argument('--batch-sizes', type=str, default='1,10,100', help='Codes per request')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per batch size')
+    args = parser.parse_args()
+
+    # Allow the test client's host and keep the timing free of debug overhead
+    setup_test_environment()
+    settings.DEBUG = False
+
+    print("=" * 72)
+    print(f"Item Lookup Benchmark ({args.items} items, server time incl. session read)")
+    print("=" * 72)
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(args.items)
+        client = Client()
+        client.post('/api/auth/login/', {'username': 'bench', 'password': 'bench123'},
+                    content_type='application/json')
+        rng = random.Random(7)
+        # Warm the catalog and the search index once, as a running worker would be
+        lookup(client, [100000])
+        search_each(client, [100000])
+
+        print(f"{'Codes':>6} | {'Lookup ms':>10} {'per code':>9} {'Queries':>8} | "
+              f"{'Search ms':>10} {'per code':>9} {'Queries':>8}")
+        print("-" * 72)
+        for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+            batches = [
+                [100000 + rng.randrange(args.items) for _ in range(batch_size)]
+                for _ in range(args.requests)
+            ]
+            lookup_ms, lookup_queries = measure(client, lookup, batches)
+            search_ms, search_queries = measure(client, search_each, batches[:max(1, args.requests // 10)])
+            print(f"{batch_size:>6} | {lookup_ms:>10.3f} {lookup_ms / batch_size:>9.4f} {lookup_queries:>8} | "
+                  f"{search_ms:>10.3f} {search_ms / batch_size:>9.4f} {search_queries:>8}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print("=" * 72)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Item Search Benchmark Script
+Compares the in-memory item search index with the icontains database search
+"""
+import os
+import sys
+import django
+import random
+import time
+import tracemalloc
+from decimal import Decimal
+
+# Add backend directory to path
+backend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+sys.path.insert(0, backend_path)
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pos_system.settings')
+django.setup()
+
+from django.db import connection
+from django.utils import timezone
+from pos_app.models import Item
+from pos_app.services.search_index import ItemSearchIndex
+
+WORDS = [
+    'star', 'wars', 'lord', 'rings', 'matrix', 'alien', 'jurassic', 'park', 'titanic', 'avatar',
+    'batman', 'begins', 'dark', 'knight', 'return', 'empire', 'strikes', 'back', 'toy', 'story',
+    'finding', 'nemo', 'shrek', 'frozen', 'gladiator', 'inception', 'memento', 'heat', 'jaws', 'rocky',
+    'deluxe', 'edition', 'collector', 'box', 'set', 'dvd', 'bluray', 'console', 'controller', 'game',
+]
+QUERIES = ['star', 'st', 'knight', 'edition 2', 'xyz', 'ret', '10042', '1']
+
+
+def generate_rows(count, seed=42):
+    """Generate (id, legacy_item_id, name, updated_at) rows with realistic names"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    for index in range(count):
+        words = rng.sample(WORDS, rng.randint(2, 4))
+        name = ' '.join(words).title() + f' {rng.randint(1, 9)}'
+        yield index + 1, 10000 + index, name, now
+
+
+def time_queries(search, repeat):
+    """Return (median, 99th percentile) latency in microseconds over QUERIES"""
+    samples = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            search(query)
+            samples.append((time.perf_counter() - start) * 1000000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def benchmark_index(size, repeat, trace_memory):
+    """Build an index of size items and time top-50 queries against it"""
+    index = ItemSearchIndex()
+    if trace_memory:
+        # tracemalloc slows the build down several times; build time is not comparable then
+        tracemalloc.start()
+    start = time.perf_counter()
+    index.build(generate_rows(size))
+    build_seconds = time.perf_counter() - start
+    peak_mb = None
+    if trace_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    median, p99 = time_queries(lambda query: index.search(query, 50), repeat)
+    return build_seconds, peak_mb, median, p99
+
+
+def benchmark_database(size, repeat):
+    """Time the previous name/legacy_item_id icontains query on size items"""
+    Item.objects.all().delete()
+    rows = generate_rows(size)
+    while True:
+        chunk = []
+        for row in rows:
+            chunk.append(Item(legacy_item_id=row[1], name=row[2], price=Decimal('1.99'), quantity=5))
+            if len(chunk) == 5000:
+                break
+        if not chunk:
+            break
+        Item.objects.bulk_create(chunk)
+
+    def search(query):
+        list((Item.objects.filter(name__icontains=query) |
+              Item.objects.filter(legacy_item_id__icontains=query))[:50])
+
+    return time_queries(search, repeat)
+
+
+def main():
+    """Run the search benchmark"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark item search')
+    parser.add_argument('--sizes', type=str, default='10000,100000,1000000',
+                        help='Comma-separated catalog sizes')
+    parser.add_argument('--repeat', type=int, default=20, help='Passes over the query set')
+    parser.add_argument('--db-max', type=int, default=100000,
+                        help='Largest size also timed against the database (0 to skip)')
+    parser.add_argument('--memory', action='store_true', help='Also report peak memory of the build')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    print("=" * 78)
+    print("Item Search Benchmark (top 50 results, latency in microseconds)")
+    print("=" * 78)
+    print(f"{'Items':>9} | {'Build s':>8} {'Peak MB':>8} {'Index p50':>10} {'p99':>9} | "
+          f"{'DB p50':>10} {'p99':>10}")
+    print("-" * 78)
+
+    old_name = connection.creation.create_test_db(verbosity=0) if args.db_max else None
+    try:
+        for size in sizes:
+            build_seconds, peak_mb, median, p99 = benchmark_index(size, args.repeat, args.memory)
+            peak_column = f"{peak_mb:>8.1f}" if peak_mb is not None else f"{'-':>8}"
+            db_columns = f"{'-':>10} {'-':>10}"
+            if old_name and size <= args.db_max:
+                db_median, db_p99 = benchmark_database(size, max(1, args.repeat // 4))
+                db_columns = f"{db_median:>10.0f} {db_p99:>10.0f}"
+            print(f"{size:>9} | {build_seconds:>8.2f} {peak_column} {median:>10.1f} {p99:>9.1f} | {db_columns}")
+    finally:
+        if old_name:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print("=" * 78)
+
+
+if __name__ == '__main__':
+    main()
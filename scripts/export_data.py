@@ -2,12 +2,16 @@
 Data Export Script
 Exports database data to CSV or JSON format
 """
+import argparse
 import os
 import sys
 import django
 import csv
 import json
+import multiprocessing
+import time
 from datetime import datetime
+from functools import partial
 
 # Add backend directory to path
 backend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
@@ -17,95 +21,286 @@ sys.path.insert(0, backend_path)
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pos_system.settings')
 django.setup()
 
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Max, Min
 from pos_app.models import Employee, Item, Customer, Transaction, Rental, Coupon, AuditLog
 
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_PART_SIZE = 1000000
+WRITE_BUFFER_SIZE = 1024 * 1024
 
-def export_to_csv(model_class, filename, fields=None):
-    """Export model data to CSV"""
-    queryset = model_class.objects.all()
+
+def positive_int(value):
+    """argparse type for sizes and counts that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {number}")
+    return number
+
+
+def export_columns(model_class):
+    """
+    Columns exported for a model: every concrete field, by attname
     
-    if not queryset.exists():
-        print(f"  No data to export for {model_class.__name__}")
-        return False
+    Foreign keys are exported as their raw id column (employee_id), read
+    straight from the row instead of loading the related object.
     
-    # Get field names
-    if fields is None:
-        fields = [f.name for f in model_class._meta.get_fields() if f.concrete]
+    Returns:
+        List of (column name, field) pairs
+    """
+    return [(field.attname, field) for field in model_class._meta.concrete_fields]
+
+
+def iter_rows(model_class, columns, chunk_size, pk_range=None):
+    """
+    Stream rows as tuples in primary key order
     
-    try:
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fields)
-            writer.writeheader()
-            
-            for obj in queryset:
-                row = {}
-                for field in fields:
-                    value = getattr(obj, field, None)
-                    # Handle dates and foreign keys
-                    if hasattr(value, 'isoformat'):
-                        value = value.isoformat()
-                    elif hasattr(value, '__str__'):
-                        value = str(value)
-                    row[field] = value
-                writer.writerow(row)
-        
-        print(f"  ✅ Exported {queryset.count()} {model_class.__name__} records to {filename}")
-        return True
-    except Exception as e:
-        print(f"  ❌ Error exporting {model_class.__name__}: {e}")
-        return False
+    iterator() fetches chunk_size rows per round trip (a server-side
+    cursor on PostgreSQL) and skips the queryset cache, so only one chunk
+    is held in memory at a time.
+    
+    Args:
+        pk_range: Optional inclusive (first pk, last pk) to export
+    """
+    queryset = model_class.objects.order_by('pk')
+    if pk_range is not None:
+        queryset = queryset.filter(pk__gte=pk_range[0], pk__lte=pk_range[1])
+    return queryset.values_list(*columns).iterator(chunk_size=chunk_size)
 
 
-def export_to_json(model_class, filename, fields=None):
-    """Export model data to JSON"""
-    queryset = model_class.objects.all()
+def convert_rows(rows, fields):
+    """
+    Write dates and times as full-precision ISO 8601 strings
     
-    if not queryset.exists():
-        print(f"  No data to export for {model_class.__name__}")
-        return False
+    DjangoJSONEncoder would cut datetimes to milliseconds, and the CSV
+    writer would use str() ('2024-01-01 10:00:00'), so both get isoformat().
+    """
+    # DateTimeField is a DateField subclass
+    positions = [
+        index for index, field in enumerate(fields)
+        if isinstance(field, (models.DateField, models.TimeField))
+    ]
+    if not positions:
+        yield from rows
+        return
+    for row in rows:
+        row = list(row)
+        for index in positions:
+            if row[index] is not None:
+                row[index] = row[index].isoformat()
+        yield row
+
+
+def write_csv(output, columns, rows):
+    """Write a header and rows as CSV, returning the number of rows"""
+    writer = csv.writer(output)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_ndjson(output, columns, rows):
+    """Write one JSON object per line, returning the number of rows"""
+    encode = DjangoJSONEncoder(ensure_ascii=False).encode
+    count = 0
+    for row in rows:
+        output.write(encode(dict(zip(columns, row))))
+        output.write('\n')
+        count += 1
+    return count
+
+
+def write_json_array(output, columns, rows):
+    """Write a JSON array, one object per line, returning the number of rows"""
+    encode = DjangoJSONEncoder(ensure_ascii=False).encode
+    count = 0
+    output.write('[')
+    for row in rows:
+        output.write(',\n' if count else '\n')
+        output.write(encode(dict(zip(columns, row))))
+        count += 1
+    output.write('\n]\n')
+    return count
+
+
+WRITERS = {
+    'csv': write_csv,
+    'json': write_json_array,
+    'ndjson': write_ndjson,
+}
+
+
+def export_model(model_class, filename, export_format, chunk_size=DEFAULT_CHUNK_SIZE, quiet=False,
+                 pk_range=None):
+    """
+    Stream a model's rows (or a primary key range of them) into a file
     
-    # Get field names
-    if fields is None:
-        fields = [f.name for f in model_class._meta.get_fields() if f.concrete]
+    Rows go from a chunked cursor straight to the file, so memory stays
+    flat whatever the table size. There is no separate exists()/count()
+    pass: rows are counted while writing, and an empty export removes
+    its file.
     
+    Returns:
+        Number of rows exported, or None on error
+    """
+    columns, fields = zip(*export_columns(model_class))
+    newline = '' if export_format == 'csv' else None
     try:
-        data = []
-        for obj in queryset:
-            record = {}
-            for field in fields:
-                value = getattr(obj, field, None)
-                # Handle dates and foreign keys
-                if hasattr(value, 'isoformat'):
-                    value = value.isoformat()
-                elif hasattr(value, '__str__'):
-                    value = str(value)
-                record[field] = value
-            data.append(record)
-        
-        with open(filename, 'w', encoding='utf-8') as jsonfile:
-            json.dump(data, jsonfile, indent=2, ensure_ascii=False)
-        
-        print(f"  ✅ Exported {len(data)} {model_class.__name__} records to {filename}")
-        return True
+        with open(filename, 'w', newline=newline, encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as output:
+            rows = convert_rows(iter_rows(model_class, columns, chunk_size, pk_range), fields)
+            count = WRITERS[export_format](output, columns, rows)
     except Exception as e:
+        if os.path.exists(filename):
+            os.remove(filename)
         print(f"  ❌ Error exporting {model_class.__name__}: {e}")
-        return False
+        return None
+    
+    if not count:
+        os.remove(filename)
+        if not quiet:
+            print(f"  No data to export for {model_class.__name__}")
+        return 0
+    if not quiet:
+        print(f"  ✅ Exported {count} {model_class.__name__} records to {filename}")
+    return count
+
+
+MODELS = {
+    'employees': Employee,
+    'items': Item,
+    'customers': Customer,
+    'transactions': Transaction,
+    'rentals': Rental,
+    'coupons': Coupon,
+    'audit_logs': AuditLog,
+}
+
+
+def plan_exports(model_names, formats, output_dir, base_name, part_size):
+    """
+    Split the export into tasks for the worker pool
+    
+    A table whose primary keys span more than part_size values is cut
+    into consecutive pk ranges, each written to a numbered part file. The
+    upper bound is the largest pk when planning, so rows inserted during
+    the export are left for the next one instead of landing in no part
+    or two. Tasks come largest first so the long ones start early.
+    
+    Returns:
+        List of task dicts
+    """
+    tasks = []
+    for model_name in model_names:
+        bounds = MODELS[model_name].objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            print(f"  No data to export for {MODELS[model_name].__name__}")
+            continue
+        ranges = [
+            (start, min(start + part_size - 1, bounds['last']))
+            for start in range(bounds['first'], bounds['last'] + 1, part_size)
+        ]
+        for export_format in formats:
+            for part, pk_range in enumerate(ranges, 1):
+                suffix = f".part{part:04d}" if len(ranges) > 1 else ''
+                tasks.append({
+                    'model': model_name,
+                    'format': export_format,
+                    'part': part,
+                    'parts': len(ranges),
+                    'pk_range': pk_range,
+                    'file': os.path.join(output_dir, f"{model_name}_{base_name}{suffix}.{export_format}"),
+                })
+    tasks.sort(key=lambda task: task['pk_range'][0] - task['pk_range'][1])
+    return tasks
+
+
+def run_export_task(task, chunk_size):
+    """
+    Export one task's rows
+    
+    Returns:
+        The task dict with 'rows' (None on error), 'bytes' and 'seconds' added
+    """
+    started = time.perf_counter()
+    rows = export_model(
+        MODELS[task['model']], task['file'], task['format'], chunk_size, quiet=True, pk_range=task['pk_range']
+    )
+    return dict(
+        task,
+        rows=rows,
+        bytes=os.path.getsize(task['file']) if rows else 0,
+        seconds=time.perf_counter() - started
+    )
+
+
+def run_exports(tasks, chunk_size, workers):
+    """
+    Run export tasks, in a process pool when workers > 1
+    
+    Yields:
+        Finished task dicts, in completion order
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield run_export_task(task, chunk_size)
+        return
+    
+    # Spawned workers open their own database connections instead of sharing this one
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(min(workers, len(tasks))) as pool:
+        yield from pool.imap_unordered(partial(run_export_task, chunk_size=chunk_size), tasks)
+
+
+def write_manifest(filename, results, formats, chunk_size, part_size):
+    """Write the list of files (with rows, bytes and pk range of each part) per model and format"""
+    exports = {}
+    for result in sorted(results, key=lambda result: (result['model'], result['format'], result['part'])):
+        entry = exports.setdefault(result['model'], {}).setdefault(result['format'], {'rows': 0, 'files': []})
+        if not result['rows']:
+            # Parts over a gap in the primary keys hold no rows and leave no file
+            continue
+        entry['rows'] += result['rows']
+        entry['files'].append({
+            'file': os.path.basename(result['file']),
+            'part': result['part'],
+            'pk_from': result['pk_range'][0],
+            'pk_to': result['pk_range'][1],
+            'rows': result['rows'],
+            'bytes': result['bytes'],
+        })
+    with open(filename, 'w', encoding='utf-8') as manifest:
+        json.dump({
+            'created_at': datetime.now().isoformat(),
+            'formats': formats,
+            'chunk_size': chunk_size,
+            'part_size': part_size,
+            'exports': exports,
+        }, manifest, indent=2)
 
 
 def main():
     """Main export function"""
-    import argparse
-    
     parser = argparse.ArgumentParser(description='Export database data to CSV or JSON')
-    parser.add_argument('--format', choices=['csv', 'json', 'both'], default='csv',
-                        help='Export format (default: csv)')
+    parser.add_argument('--format', choices=['csv', 'json', 'ndjson', 'both'], default='csv',
+                        help='Export format; both = csv and json (default: csv)')
     parser.add_argument('--output-dir', default=None,
                         help='Output directory (default: exports/)')
-    parser.add_argument('--models', nargs='+', 
-                        choices=['employees', 'items', 'customers', 'transactions', 
-                                'rentals', 'coupons', 'audit_logs', 'all'],
+    parser.add_argument('--models', nargs='+', choices=list(MODELS) + ['all'],
                         default=['all'],
                         help='Models to export (default: all)')
+    parser.add_argument('--chunk-size', type=positive_int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Rows fetched per database round trip (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--workers', type=positive_int, default=None,
+                        help='Export processes (default: CPU count; 1 exports here, one file at a time)')
+    parser.add_argument('--part-size', type=positive_int, default=DEFAULT_PART_SIZE,
+                        help=f'Primary keys per part file for large tables (default: {DEFAULT_PART_SIZE})')
     
     args = parser.parse_args()
     
@@ -126,46 +321,48 @@ def main():
     print(f"Format: {args.format}")
     print()
     
-    # Model mapping
-    model_map = {
-        'employees': Employee,
-        'items': Item,
-        'customers': Customer,
-        'transactions': Transaction,
-        'rentals': Rental,
-        'coupons': Coupon,
-        'audit_logs': AuditLog,
-    }
-    
     # Determine which models to export
     if 'all' in args.models:
-        models_to_export = list(model_map.keys())
+        models_to_export = list(MODELS.keys())
     else:
-        models_to_export = args.models
+        models_to_export = list(dict.fromkeys(args.models))
     
-    # Export each model
+    formats = ['csv', 'json'] if args.format == 'both' else [args.format]
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
-    for model_name in models_to_export:
-        if model_name not in model_map:
-            print(f"  ⚠️  Unknown model: {model_name}")
-            continue
-        
-        model_class = model_map[model_name]
-        base_filename = f"{model_name}_{timestamp}"
-        
-        if args.format in ['csv', 'both']:
-            csv_filename = os.path.join(output_dir, f"{base_filename}.csv")
-            export_to_csv(model_class, csv_filename)
-        
-        if args.format in ['json', 'both']:
-            json_filename = os.path.join(output_dir, f"{base_filename}.json")
-            export_to_json(model_class, json_filename)
+    tasks = plan_exports(models_to_export, formats, output_dir, timestamp, args.part_size)
+    workers = args.workers or os.cpu_count() or 1
+    print(f"Exporting {len(tasks)} files with {max(1, min(workers, len(tasks)))} worker(s)")
+    
+    started = time.perf_counter()
+    results = []
+    failed = 0
+    for result in run_exports(tasks, args.chunk_size, workers):
+        results.append(result)
+        label = f"{result['model']}.{result['format']}"
+        if result['parts'] > 1:
+            label += f" part {result['part']}/{result['parts']}"
+        progress = f"[{len(results):>{len(str(len(tasks)))}}/{len(tasks)}]"
+        if result['rows'] is None:
+            failed += 1
+            print(f"  {progress} ❌ {label} failed")
+        else:
+            rate = result['rows'] / result['seconds'] if result['seconds'] else 0
+            print(f"  {progress} ✅ {label}: {result['rows']} rows in {result['seconds']:.1f}s "
+                  f"({rate:.0f} rows/s, {time.perf_counter() - started:.1f}s elapsed)")
+    
+    manifest_file = os.path.join(output_dir, f"manifest_{timestamp}.json")
+    write_manifest(manifest_file, [result for result in results if result['rows'] is not None],
+                   formats, args.chunk_size, args.part_size)
+    total_rows = sum(result['rows'] or 0 for result in results)
+    print(f"\n  {total_rows} rows in {time.perf_counter() - started:.1f}s, manifest: {manifest_file}")
     
     print("\n" + "=" * 60)
     print("Export Complete!")
     print("=" * 60)
     print(f"Files saved to: {output_dir}")
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
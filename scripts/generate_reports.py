@@ -5,10 +5,20 @@ Generates various business reports from the database
 import os
 import sys
 import django
+import io
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
 from datetime import datetime, timedelta
-from decimal import Decimal
 import csv
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 # Add backend directory to path
 backend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
 sys.path.insert(0, backend_path)
@@ -17,30 +27,37 @@ sys.path.insert(0, backend_path)
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pos_system.settings')
 django.setup()
 
-from pos_app.models import Transaction, TransactionItem, Rental, Item, Employee, Customer
-from django.db.models import Sum, Count, Avg, Q
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from pos_app.services import ReportingService
+
+
+def report_period(start_date, end_date):
+    """Default to the last 30 days, inclusive"""
+    if end_date is None:
+        end_date = timezone.localdate()
+    if start_date is None:
+        start_date = end_date - timedelta(days=30)
+    return start_date, end_date
+
+
+def write_csv(output_file, columns, rows):
+    """Write a header and a stream of rows without holding them in memory"""
+    with open(output_file, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    print(f"\n  ✅ Report exported to {output_file}")
 
 
 def sales_report(start_date=None, end_date=None, output_file=None):
     """Generate sales report"""
     print("Generating Sales Report...")
     
-    if start_date is None:
-        start_date = datetime.now().date() - timedelta(days=30)
-    if end_date is None:
-        end_date = datetime.now().date()
-    
-    transactions = Transaction.objects.filter(
-        transaction_type='Sale',
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
-    )
+    start_date, end_date = report_period(start_date, end_date)
     
-    total_sales = transactions.aggregate(
-        total=Sum('total_amount'),
-        count=Count('id'),
-        avg=Avg('total_amount')
-    )
+    # Totals and top items come from the daily rollups, one row per day and key
+    total_sales = ReportingService.sales_summary(start_date, end_date)
     
     print(f"  Period: {start_date} to {end_date}")
     print(f"  Total Sales: ${total_sales['total'] or 0:.2f}")
@@ -48,12 +65,7 @@ def sales_report(start_date=None, end_date=None, output_file=None):
     print(f"  Average Transaction: ${total_sales['avg'] or 0:.2f}")
     
     # Top selling items
-    top_items = TransactionItem.objects.filter(
-        transaction__in=transactions
-    ).values('item__name').annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('subtotal')
-    ).order_by('-total_quantity')[:10]
+    top_items = ReportingService.top_items(start_date, end_date)
     
     print("\n  Top 10 Selling Items:")
     for item in top_items:
@@ -61,17 +73,7 @@ def sales_report(start_date=None, end_date=None, output_file=None):
     
     # Export to CSV if requested
     if output_file:
-        with open(output_file, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Date', 'Transaction ID', 'Employee', 'Total Amount'])
-            for txn in transactions:
-                writer.writerow([
-                    txn.created_at.date(),
-                    txn.id,
-                    txn.employee.username if txn.employee else 'N/A',
-                    txn.total_amount
-                ])
-        print(f"\n  ✅ Report exported to {output_file}")
+        write_csv(output_file, ReportingService.SALES_COLUMNS, ReportingService.sales_rows(start_date, end_date))
     
     return total_sales
 
@@ -80,34 +82,18 @@ def rental_report(start_date=None, end_date=None, output_file=None):
     """Generate rental report"""
     print("Generating Rental Report...")
     
-    if start_date is None:
-        start_date = datetime.now().date() - timedelta(days=30)
-    if end_date is None:
-        end_date = datetime.now().date()
+    start_date, end_date = report_period(start_date, end_date)
     
-    rentals = Rental.objects.filter(
-        rental_date__gte=start_date,
-        rental_date__lte=end_date
-    )
-    
-    total_rentals = rentals.count()
-    active_rentals = rentals.filter(is_returned=False).count()
-    returned_rentals = rentals.filter(is_returned=True).count()
-    overdue_rentals = rentals.filter(
-        is_returned=False,
-        due_date__lt=datetime.now().date()
-    ).count()
+    summary = ReportingService.rental_summary(start_date, end_date)
     
     print(f"  Period: {start_date} to {end_date}")
-    print(f"  Total Rentals: {total_rentals}")
-    print(f"  Active Rentals: {active_rentals}")
-    print(f"  Returned Rentals: {returned_rentals}")
-    print(f"  Overdue Rentals: {overdue_rentals}")
+    print(f"  Total Rentals: {summary['total']}")
+    print(f"  Active Rentals: {summary['active']}")
+    print(f"  Returned Rentals: {summary['returned']}")
+    print(f"  Overdue Rentals: {summary['overdue']}")
     
     # Most rented items
-    top_rented = rentals.values('item__name').annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]
+    top_rented = ReportingService.top_rented_items(start_date, end_date)
     
     print("\n  Top 10 Rented Items:")
     for item in top_rented:
@@ -115,93 +101,40 @@ def rental_report(start_date=None, end_date=None, output_file=None):
     
     # Export to CSV if requested
     if output_file:
-        with open(output_file, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Rental Date', 'Item', 'Customer', 'Due Date', 'Returned', 'Return Date'])
-            for rental in rentals:
-                writer.writerow([
-                    rental.rental_date,
-                    rental.item.name,
-                    rental.customer.phone_number if rental.customer else 'N/A',
-                    rental.due_date,
-                    'Yes' if rental.is_returned else 'No',
-                    rental.return_date or 'N/A'
-                ])
-        print(f"\n  ✅ Report exported to {output_file}")
-    
-    return {
-        'total': total_rentals,
-        'active': active_rentals,
-        'returned': returned_rentals,
-        'overdue': overdue_rentals
-    }
+        write_csv(output_file, ReportingService.RENTAL_COLUMNS, ReportingService.rental_rows(start_date, end_date))
+    
+    return summary
 
 
 def inventory_report(output_file=None):
     """Generate inventory report"""
     print("Generating Inventory Report...")
     
-    items = Item.objects.all()
-    total_items = items.count()
-    low_stock_items = items.filter(quantity__lt=10)
-    out_of_stock_items = items.filter(quantity=0)
+    summary = ReportingService.inventory_summary()
     
-    total_value = sum(item.price * item.quantity for item in items)
-    
-    print(f"  Total Items: {total_items}")
-    print(f"  Total Inventory Value: ${total_value:.2f}")
-    print(f"  Low Stock Items (< 10): {low_stock_items.count()}")
-    print(f"  Out of Stock Items: {out_of_stock_items.count()}")
+    print(f"  Total Items: {summary['total']}")
+    print(f"  Total Inventory Value: ${summary['total_value']:.2f}")
+    print(f"  Low Stock Items (< {ReportingService.LOW_STOCK_THRESHOLD}): {summary['low_stock']}")
+    print(f"  Out of Stock Items: {summary['out_of_stock']}")
     
     print("\n  Low Stock Items:")
-    for item in low_stock_items[:10]:
-        print(f"    {item.name}: {item.quantity} units")
+    for item in ReportingService.low_stock_items():
+        print(f"    {item['name']}: {item['quantity']} units")
     
     # Export to CSV if requested
     if output_file:
-        with open(output_file, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Item ID', 'Name', 'Price', 'Quantity', 'Total Value', 'Status'])
-            for item in items:
-                status = 'Out of Stock' if item.quantity == 0 else \
-                        'Low Stock' if item.quantity < 10 else 'In Stock'
-                writer.writerow([
-                    item.legacy_item_id,
-                    item.name,
-                    item.price,
-                    item.quantity,
-                    item.price * item.quantity,
-                    status
-                ])
-        print(f"\n  ✅ Report exported to {output_file}")
-    
-    return {
-        'total': total_items,
-        'total_value': total_value,
-        'low_stock': low_stock_items.count(),
-        'out_of_stock': out_of_stock_items.count()
-    }
+        write_csv(output_file, ReportingService.INVENTORY_COLUMNS, ReportingService.inventory_rows())
+    
+    return summary
 
 
 def employee_performance_report(start_date=None, end_date=None, output_file=None):
     """Generate employee performance report"""
     print("Generating Employee Performance Report...")
     
-    if start_date is None:
-        start_date = datetime.now().date() - timedelta(days=30)
-    if end_date is None:
-        end_date = datetime.now().date()
-    
-    transactions = Transaction.objects.filter(
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
-    )
+    start_date, end_date = report_period(start_date, end_date)
     
-    employee_stats = transactions.values('employee__username', 'employee__first_name', 'employee__last_name').annotate(
-        transaction_count=Count('id'),
-        total_revenue=Sum('total_amount'),
-        avg_transaction=Avg('total_amount')
-    ).order_by('-total_revenue')
+    employee_stats = ReportingService.employee_performance(start_date, end_date)
     
     print(f"  Period: {start_date} to {end_date}")
     print(f"\n  Employee Performance:")
@@ -214,32 +147,150 @@ def employee_performance_report(start_date=None, end_date=None, output_file=None
     
     # Export to CSV if requested
     if output_file:
-        with open(output_file, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Employee', 'Username', 'Transactions', 'Total Revenue', 'Avg Transaction'])
-            for stat in employee_stats:
-                writer.writerow([
-                    f"{stat['employee__first_name']} {stat['employee__last_name']}",
-                    stat['employee__username'],
-                    stat['transaction_count'],
-                    stat['total_revenue'] or 0,
-                    stat['avg_transaction'] or 0
-                ])
-        print(f"\n  ✅ Report exported to {output_file}")
+        write_csv(output_file, ReportingService.EMPLOYEE_COLUMNS, ReportingService.employee_rows(start_date, end_date))
     
     return employee_stats
 
 
+REPORTS = {
+    'sales': ('sales_report', sales_report),
+    'rental': ('rental_report', rental_report),
+    'inventory': ('inventory_report', lambda start_date, end_date, output_file: inventory_report(output_file)),
+    'employee': ('employee_report', employee_performance_report),
+}
+
+
+def begin_read_snapshot(snapshot_id=None):
+    """
+    Make the current transaction read one consistent view of the database
+    
+    Must run before the first query of the transaction. On PostgreSQL the
+    transaction becomes REPEATABLE READ and, given the id of a snapshot
+    exported by another session, sees exactly what that session sees. A
+    SQLite transaction keeps one view once it starts reading.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            if snapshot_id:
+                cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot_id])
+
+
+@contextmanager
+def shared_snapshot():
+    """
+    Export a snapshot that report worker processes can all read from
+    
+    SQLite: the database is copied with the online backup API into a
+    temporary file, which the workers open instead. PostgreSQL: this
+    session holds a REPEATABLE READ transaction open and exports its
+    snapshot id; workers attach to it with SET TRANSACTION SNAPSHOT.
+    
+    Yields:
+        Dict describing the snapshot, passed to init_worker
+    """
+    if connection.vendor == 'sqlite':
+        handle, path = tempfile.mkstemp(suffix='.sqlite3', prefix='report_snapshot_')
+        os.close(handle)
+        try:
+            connection.ensure_connection()
+            target = sqlite3.connect(path)
+            try:
+                connection.connection.backup(target)
+            finally:
+                target.close()
+            yield {'vendor': 'sqlite', 'path': path}
+        finally:
+            os.remove(path)
+    elif connection.vendor == 'postgresql':
+        with transaction.atomic():
+            begin_read_snapshot()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_export_snapshot()')
+                snapshot_id = cursor.fetchone()[0]
+            yield {'vendor': 'postgresql', 'id': snapshot_id}
+    else:
+        print(f"  ⚠️  {connection.vendor} cannot share a snapshot; each report reads its own")
+        yield {'vendor': connection.vendor}
+
+
+_worker_snapshot = {}
+
+
+def init_worker(snapshot):
+    """Point a freshly spawned worker at the shared snapshot"""
+    _worker_snapshot.update(snapshot)
+    if snapshot['vendor'] == 'sqlite':
+        connections['default'].close()
+        connections['default'].settings_dict['NAME'] = snapshot['path']
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB, or None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_report(name, start_date, end_date, output_file):
+    """
+    Run one report, capturing what it prints
+    
+    Returns:
+        Tuple of (name, printed output, wall seconds, peak memory in MB)
+    """
+    output = io.StringIO()
+    started = time.perf_counter()
+    with redirect_stdout(output), transaction.atomic():
+        begin_read_snapshot(_worker_snapshot.get('id'))
+        REPORTS[name][1](start_date, end_date, output_file)
+    return name, output.getvalue(), time.perf_counter() - started, peak_memory_mb()
+
+
+def run_report_task(task):
+    return run_report(*task)
+
+
+def run_reports(names, start_date, end_date, output_files, workers):
+    """
+    Run reports against one consistent view of the database
+    
+    With one worker the reports run here, in a single read transaction.
+    Otherwise each report runs in its own spawned process (so its peak
+    memory is its own) and all of them read the same exported snapshot.
+    
+    Yields:
+        (name, printed output, wall seconds, peak memory in MB), in completion order
+    """
+    tasks = [(name, start_date, end_date, output_files[name]) for name in names]
+    if workers <= 1:
+        with transaction.atomic():
+            begin_read_snapshot()
+            for task in tasks:
+                yield run_report(*task)
+        return
+    
+    with shared_snapshot() as snapshot:
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers, initializer=init_worker, initargs=(snapshot,), maxtasksperchild=1) as pool:
+            yield from pool.imap_unordered(run_report_task, tasks)
+
+
 def main():
     """Main report generation function"""
     import argparse
     
     parser = argparse.ArgumentParser(description='Generate business reports')
-    parser.add_argument('--report', choices=['sales', 'rental', 'inventory', 'employee', 'all'],
-                        default='all', help='Type of report to generate')
+    parser.add_argument('--report', nargs='+', choices=list(REPORTS) + ['all'],
+                        default=['all'], help='Reports to generate')
     parser.add_argument('--start-date', type=str, help='Start date (YYYY-MM-DD)')
     parser.add_argument('--end-date', type=str, help='End date (YYYY-MM-DD)')
     parser.add_argument('--output-dir', default=None, help='Output directory for CSV files')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Reports run in parallel (default: one per report, up to the CPU count; '
+                             '1 runs them here one after another)')
     
     args = parser.parse_args()
     
@@ -252,6 +303,9 @@ def main():
     if args.end_date:
         end_date = datetime.strptime(args.end_date, '%Y-%m-%d').date()
     
+    names = list(REPORTS) if 'all' in args.report else list(dict.fromkeys(args.report))
+    workers = args.workers or min(len(names), os.cpu_count() or 1)
+    
     # Determine output directory
     if args.output_dir:
         output_dir = args.output_dir
@@ -267,34 +321,30 @@ def main():
     print()
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    output_files = {
+        name: os.path.join(output_dir, f'{REPORTS[name][0]}_{timestamp}.csv')
+        for name in names
+    }
     
-    if args.report in ['sales', 'all']:
-        output_file = os.path.join(output_dir, f'sales_report_{timestamp}.csv') if args.output_dir or True else None
-        sales_report(start_date, end_date, output_file)
-        print()
-    
-    if args.report in ['rental', 'all']:
-        output_file = os.path.join(output_dir, f'rental_report_{timestamp}.csv') if args.output_dir or True else None
-        rental_report(start_date, end_date, output_file)
-        print()
-    
-    if args.report in ['inventory', 'all']:
-        output_file = os.path.join(output_dir, f'inventory_report_{timestamp}.csv') if args.output_dir or True else None
-        inventory_report(output_file)
-        print()
-    
-    if args.report in ['employee', 'all']:
-        output_file = os.path.join(output_dir, f'employee_report_{timestamp}.csv') if args.output_dir or True else None
-        employee_performance_report(start_date, end_date, output_file)
-        print()
+    started = time.perf_counter()
+    timings = []
+    for name, output, seconds, peak_mb in run_reports(names, start_date, end_date, output_files, workers):
+        print(output)
+        timings.append((name, seconds, peak_mb))
+    elapsed = time.perf_counter() - started
     
     print("=" * 60)
     print("Report Generation Complete!")
     print("=" * 60)
-    if args.output_dir or True:
-        print(f"Reports saved to: {output_dir}")
+    print(f"{'Report':<12} {'Wall s':>8} {'Peak MB':>9}")
+    for name, seconds, peak_mb in timings:
+        peak_column = f"{peak_mb:>9.1f}" if peak_mb is not None else f"{'-':>9}"
+        print(f"{name:<12} {seconds:>8.2f} {peak_column}")
+    print(f"{'total':<12} {elapsed:>8.2f}   ({workers} worker{'s' if workers != 1 else ''})")
+    if workers <= 1:
+        print("  Peak MB is the peak of this process so far, not of each report alone")
+    print(f"Reports saved to: {output_dir}")
 
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,121 @@
+"""
+Stock Decrement Stress Script
+Runs many concurrent registers against the same items and checks for overselling
+"""
+import os
+import sys
+import django
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+# Add backend directory to path
+backend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+sys.path.insert(0, backend_path)
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pos_system.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import connection, OperationalError
+from pos_app.models import Employee, Item, TransactionItem
+
+
+def run_registers(registers, employee_id, item_ids, stock):
+    """Sell one unit at a time from every register until the hot items run out"""
+    from pos_app.services import TransactionService
+
+    Item.objects.filter(id__in=item_ids).update(quantity=stock)
+    TransactionItem.objects.all().delete()
+    counters = {'sales': 0, 'retries': 0}
+    lock = threading.Lock()
+
+    def register(index):
+        basket = [{'item_id': item_ids[index % len(item_ids)], 'quantity': 1}]
+        try:
+            while True:
+                try:
+                    TransactionService.create_sale(employee_id, basket)
+                except ValueError:
+                    return
+                except OperationalError:
+                    # SQLite serializes writers; back off and retry like a busy register
+                    with lock:
+                        counters['retries'] += 1
+                    time.sleep(0.001)
+                    continue
+                with lock:
+                    counters['sales'] += 1
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=register, args=(i,)) for i in range(registers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    remaining = dict(Item.objects.filter(id__in=item_ids).values_list('id', 'quantity'))
+    sold_lines = TransactionItem.objects.filter(item_id__in=item_ids).count()
+    oversold = any(quantity < 0 for quantity in remaining.values()) or \
+        sold_lines != stock * len(item_ids) - sum(remaining.values())
+    return counters, elapsed, oversold
+
+
+def main():
+    """Run the stress test against a throwaway test database"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Stress concurrent stock decrements')
+    parser.add_argument('--registers', type=str, default='1,2,4,8',
+                        help='Comma-separated register (thread) counts')
+    parser.add_argument('--items', type=int, default=4, help='Number of hot items shared by the registers')
+    parser.add_argument('--stock', type=int, default=500, help='Starting units per hot item')
+    args = parser.parse_args()
+
+    database = settings.DATABASES['default']
+    if database['ENGINE'].endswith('sqlite3'):
+        # Threads need a real file; the in-memory test database cannot be shared safely
+        database.setdefault('TEST', {})['NAME'] = os.path.join(tempfile.mkdtemp(), 'stress.sqlite3')
+        database.setdefault('OPTIONS', {})['timeout'] = 30
+        print("Note: SQLite allows one writer at a time, so throughput cannot scale here.")
+        print("      Point DATABASES at PostgreSQL to measure scaling across registers.")
+
+    print("=" * 60)
+    print("Stock Decrement Stress Test")
+    print("=" * 60)
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        employee = Employee(username='stress', first_name='Stress', last_name='Test', position='Cashier')
+        employee.set_password('stress123')
+        employee.save()
+        Item.objects.bulk_create([
+            Item(legacy_item_id=200000 + i, name=f'Hot Item {i}', price=Decimal('1.00'), quantity=0)
+            for i in range(args.items)
+        ])
+        item_ids = list(Item.objects.order_by('id').values_list('id', flat=True))
+        connection.close()
+
+        print(f"{'Registers':>9} | {'Sales':>6} {'Seconds':>8} {'Sales/s':>8} {'Retries':>8} | Oversold")
+        print("-" * 60)
+        failed = False
+        for registers in [int(count) for count in args.registers.split(',')]:
+            counters, elapsed, oversold = run_registers(registers, employee.id, item_ids, args.stock)
+            failed = failed or oversold
+            print(f"{registers:>9} | {counters['sales']:>6} {elapsed:>8.2f} "
+                  f"{counters['sales'] / elapsed:>8.1f} {counters['retries']:>8} | "
+                  f"{'YES' if oversold else 'no'}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print("=" * 60)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()